@@ -0,0 +1 @@
+# Este arquivo torna o diretório benchmarks um pacote Python
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""
+Teste de estresse do CacheManager com muitas threads simultâneas.
+
+Carrega um cache pré-preenchido e dispara N threads (64 ou mais) que fazem leituras
+(get_record) e gravações (set_record) misturadas, como as threads de busca do
+MediaProcessor. Mede as operações por segundo e a latência das leituras e das
+gravações (p50, p99 e máxima), e verifica ao final:
+
+- leituras consistentes: todo registro lido está completo e pertence à chave lida
+- nenhuma gravação perdida: depois de close(), o cache é carregado de novo do disco
+  e cada chave tem o último valor gravado
+
+Cada thread grava as suas próprias chaves novas (além de regravar chaves existentes),
+para que o último valor de cada chave nova seja conhecido.
+
+Uso:
+    python -m benchmarks.bench_cache_concurrency --workers 64 128 --keys 200000 --backend json sqlite
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from src.cache.cache_manager import CacheManager
+from config.settings import CACHE_DIR, CACHE_SQLITE_FILE
+
+RECORD_FIELDS = ("name", "is_series", "year", "language", "tmdb_id", "imdb_id", "created_at", "checked_at")
+
+def key_for(name):
+    return CacheManager.make_key(name, False, 2000)
+
+def populate(cache_file, backend, keys):
+    """
+    Cria o cache inicial com `keys` registros
+    """
+    cache = CacheManager(cache_file, backend=backend)
+    for index in range(keys):
+        name = f"titulo {index}"
+        cache.set_record(key_for(name), name, False, 2000, "pt-br", index, f"tt{index:08d}")
+    cache.close()
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run_workers(cache, workers, operations, write_ratio, keys, seed):
+    """
+    Executa as threads e devolve as latências, as leituras inconsistentes e o último
+    valor gravado em cada chave nova
+    """
+    barrier = threading.Barrier(workers + 1)
+    results = [None] * workers
+
+    def worker(number):
+        rng = random.Random(seed + number)
+        reads, writes, inconsistent = [], [], 0
+        written = {}
+        barrier.wait()
+        for operation in range(operations):
+            if rng.random() < write_ratio:
+                # Metade das gravações cria chaves próprias da thread; a outra metade regrava chaves existentes
+                if operation % 2:
+                    name = f"thread {number} titulo {operation % 500}"
+                    written[key_for(name)] = operation
+                else:
+                    name = f"titulo {rng.randrange(keys)}"
+                start = time.perf_counter()
+                cache.set_record(key_for(name), name, False, 2000, "pt-br", operation, f"tt{operation:08d}")
+                writes.append(time.perf_counter() - start)
+            else:
+                name = f"titulo {rng.randrange(keys)}"
+                start = time.perf_counter()
+                record = cache.get_record(key_for(name))
+                reads.append(time.perf_counter() - start)
+                if record is not None and (any(field not in record for field in RECORD_FIELDS)
+                                           or record["name"] != name):
+                    inconsistent += 1
+        results[number] = (reads, writes, inconsistent, written)
+
+    threads = [threading.Thread(target=worker, args=(number,)) for number in range(workers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+def bench(backend, workers, args, temp_dir):
+    cache_file = os.path.join(temp_dir, f"stress_{backend}_{workers}.json")
+    # Cada execução começa com um banco novo
+    sqlite_file = os.path.join(temp_dir, CACHE_DIR, CACHE_SQLITE_FILE)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(sqlite_file + suffix):
+            os.remove(sqlite_file + suffix)
+    with contextlib.redirect_stdout(io.StringIO()):
+        populate(cache_file, backend, args.keys)
+        cache = CacheManager(cache_file, backend=backend)
+
+    results, elapsed = run_workers(cache, workers, args.operations, args.write_ratio, args.keys, args.seed)
+    start = time.perf_counter()
+    cache.close()
+    close_seconds = time.perf_counter() - start
+    writer_stats = cache.writer.stats()
+
+    reads = [value for result in results for value in result[0]]
+    writes = [value for result in results for value in result[1]]
+    inconsistent = sum(result[2] for result in results)
+
+    # Recarrega do disco e confere o último valor gravado em cada chave nova
+    with contextlib.redirect_stdout(io.StringIO()):
+        reloaded = CacheManager(cache_file, backend=backend)
+    lost = sum(1 for result in results for key, tmdb_id in result[3].items()
+               if (reloaded.get_record(key) or {}).get("tmdb_id") != tmdb_id)
+    reloaded.close()
+
+    operations = len(reads) + len(writes)
+    return {
+        "workers": workers,
+        "operations": operations,
+        "ops_per_second": round(operations / elapsed),
+        "read_p50_us": round(percentile(reads, 0.5) * 1e6, 1),
+        "read_p99_us": round(percentile(reads, 0.99) * 1e6, 1),
+        "write_p50_us": round(percentile(writes, 0.5) * 1e6, 1),
+        "write_p99_us": round(percentile(writes, 0.99) * 1e6, 1),
+        "write_max_ms": round(max(writes, default=0) * 1e3, 1),
+        "close_seconds": round(close_seconds, 3),
+        "flushes": writer_stats["flushes"],
+        "inconsistent_reads": inconsistent,
+        "lost_writes": lost,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de estresse do CacheManager com muitas threads')
+    parser.add_argument('--workers', type=int, nargs='+', default=[64, 128], help='Números de threads testados')
+    parser.add_argument('--keys', type=int, default=200000, help='Registros do cache inicial')
+    parser.add_argument('--operations', type=int, default=2000, help='Operações por thread')
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='Fração das operações que são gravações')
+    parser.add_argument('--backend', nargs='+', default=['json', 'sqlite'], choices=['json', 'sqlite'],
+                        help='Backends testados')
+    parser.add_argument('--seed', type=int, default=42, help='Semente das operações')
+    parser.add_argument('--save', help='Salva os resultados neste arquivo JSON')
+    args = parser.parse_args()
+
+    results = {}
+    failed = False
+    working_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # O backend sqlite usa o arquivo de CACHE_SQLITE_FILE dentro de CACHE_DIR (relativo ao diretório atual)
+        os.chdir(temp_dir)
+        try:
+            for backend in args.backend:
+                for workers in args.workers:
+                    run = results[f"{backend}_{workers}"] = bench(backend, workers, args, temp_dir)
+                    failed = failed or run["inconsistent_reads"] or run["lost_writes"]
+                    print(f"{backend:<7} {workers:>4} threads  {run['ops_per_second']:>9,} op/s  "
+                          f"leitura p50 {run['read_p50_us']:7.1f}µs p99 {run['read_p99_us']:8.1f}µs  "
+                          f"gravação p50 {run['write_p50_us']:7.1f}µs p99 {run['write_p99_us']:8.1f}µs "
+                          f"máx {run['write_max_ms']:7.1f}ms  {run['flushes']:>4} flushes  "
+                          f"close {run['close_seconds']:.2f}s  inconsistentes {run['inconsistent_reads']}  "
+                          f"perdidas {run['lost_writes']}")
+        finally:
+            os.chdir(working_dir)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=4)
+        print(f"Resultados salvos em '{args.save}'.")
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
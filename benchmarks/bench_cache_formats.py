@@ -0,0 +1,182 @@
+"""
+Benchmark dos formatos do arquivo de cache e da compactação das saídas.
+
+Cache: grava e carrega um cache sintético (por padrão, 1 milhão de registros no
+formato do CacheManager) em cada formato do backend "json" (CACHE_FORMAT) e mede o
+tamanho do arquivo, o tempo de salvamento, o tempo de carga, o tempo para ler 10 mil
+registros depois da carga (no formato binário, os valores só são decodificados na leitura)
+e o tempo do salvamento seguinte.
+A linha "stdlib" é o cache_ids.json original: json.dump(indent=4) e json.load.
+
+Saídas: grava as entradas em JSON indentado, NDJSON, NDJSON.gz e NDJSON.zst com o
+StreamingJSONExporter e mede o tamanho, o tempo de gravação e o tempo de leitura com
+o JSONReader.
+
+Os formatos que dependem de pacotes não instalados (msgpack, zstandard) são pulados;
+o orjson é usado pelos demais quando estiver instalado.
+
+Uso:
+    python -m benchmarks.bench_cache_formats --keys 1000000 --entries 200000
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from src.cache.backends import CACHE_FORMATS, JSONCacheBackend
+from src.cache.cache_manager import CacheManager
+from src.utils import serialization
+from src.utils.json_exporter import StreamingJSONExporter
+from src.utils.json_reader import JSONReader
+from benchmarks.synthetic import make_title
+
+def make_cache(keys):
+    """
+    Registros sintéticos no formato gravado pelo CacheManager.set_record
+    """
+    now = time.time()
+    data = {}
+    for index in range(keys):
+        is_series = index % 3 == 0
+        year = 1980 + index % 45
+        name = make_title(index).lower()
+        data[CacheManager.make_key(name, is_series, year)] = {
+            "name": name,
+            "is_series": is_series,
+            "year": year,
+            "language": "pt-br",
+            "tmdb_id": index,
+            "imdb_id": f"tt{index:08d}" if index % 10 else None,
+            "created_at": now - index,
+            "checked_at": now,
+        }
+    return data
+
+def timed(function):
+    gc.collect()
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+def bench_cache_format(data, file_path, format, sample):
+    """
+    Salva e carrega o cache em um formato do JSONCacheBackend
+    """
+    # A saída do backend ("Carregando cache...") é descartada
+    with contextlib.redirect_stdout(io.StringIO()):
+        backend = JSONCacheBackend(file_path, format=format)
+        backend.data = dict(data)
+        _, save_seconds = timed(backend.flush)
+        del backend
+
+        loaded, load_seconds = timed(lambda: JSONCacheBackend(file_path, format=format))
+    _, read_seconds = timed(lambda: [loaded.get(key) for key in sample])
+    assert loaded.get(sample[0]) == data[sample[0]]
+    # Salvamento seguinte, com poucas alterações (o binário copia os valores não lidos)
+    _, resave_seconds = timed(loaded.flush)
+    return {
+        "bytes": os.path.getsize(file_path),
+        "save_seconds": round(save_seconds, 3),
+        "load_seconds": round(load_seconds, 3),
+        "read_sample_seconds": round(read_seconds, 4),
+        "resave_seconds": round(resave_seconds, 3),
+    }
+
+def bench_cache_stdlib(data, file_path, sample):
+    """
+    Referência: o cache_ids.json original, com o json da biblioteca padrão
+    """
+    def save():
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, indent=4, ensure_ascii=False)
+
+    def load():
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    _, save_seconds = timed(save)
+    loaded, load_seconds = timed(load)
+    _, read_seconds = timed(lambda: [loaded.get(key) for key in sample])
+    return {
+        "bytes": os.path.getsize(file_path),
+        "save_seconds": round(save_seconds, 3),
+        "load_seconds": round(load_seconds, 3),
+        "read_sample_seconds": round(read_seconds, 4),
+    }
+
+def bench_output(records, file_path, format, indent):
+    """
+    Grava as entradas com o StreamingJSONExporter e as lê de volta com o JSONReader
+    """
+    def write():
+        with StreamingJSONExporter(file_path, format=format, indent=indent) as exporter:
+            for record in records:
+                exporter.write(record)
+
+    _, write_seconds = timed(write)
+    count, read_seconds = timed(lambda: sum(1 for _ in JSONReader.iter_records(file_path)))
+    assert count == len(records)
+    return {
+        "bytes": os.path.getsize(file_path),
+        "write_seconds": round(write_seconds, 3),
+        "read_seconds": round(read_seconds, 3),
+    }
+
+def print_row(label, run, baseline):
+    ratio = run["bytes"] / baseline["bytes"]
+    times = "  ".join(f"{name.replace('_seconds', '')} {value:8.3f}s" for name, value in run.items() if name != "bytes")
+    print(f"{label:<12} {run['bytes'] / (1024 * 1024):9.1f} MiB ({ratio:5.1%})  {times}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos formatos de cache e da compactação das saídas')
+    parser.add_argument('--keys', type=int, default=1000000, help='Registros do cache sintético')
+    parser.add_argument('--entries', type=int, default=200000, help='Entradas gravadas em cada formato de saída')
+    parser.add_argument('--sample', type=int, default=10000, help='Registros lidos depois de carregar o cache')
+    parser.add_argument('--seed', type=int, default=42, help='Semente da amostra de leitura')
+    parser.add_argument('--save', help='Salva os resultados neste arquivo JSON')
+    args = parser.parse_args()
+
+    print(f"orjson: {'sim' if serialization.orjson else 'não'}  msgpack: {'sim' if serialization.msgpack else 'não'}  "
+          f"zstandard: {'sim' if serialization.zstandard else 'não'}")
+    results = {"cache": {}, "output": {}}
+
+    data = make_cache(args.keys)
+    sample = random.Random(args.seed).sample(list(data), min(args.sample, len(data)))
+    print(f"\nCache com {len(data):,} registros")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        baseline = results["cache"]["stdlib"] = bench_cache_stdlib(data, os.path.join(temp_dir, "stdlib.json"), sample)
+        print_row("stdlib", baseline, baseline)
+        for format in CACHE_FORMATS:
+            if format == "msgpack" and serialization.msgpack is None:
+                continue
+            run = results["cache"][format] = bench_cache_format(data, os.path.join(temp_dir, f"{format}.cache"),
+                                                                format, sample)
+            print_row(format, run, baseline)
+            gc.collect()
+
+    records = [dict(record, url=f"http://provider.example/{index}.mp4") for index, record
+               in zip(range(args.entries), data.values())]
+    del data
+    print(f"\nSaída com {len(records):,} entradas")
+    outputs = [("json", "saida.json", "json", 4), ("ndjson", "saida.ndjson", "ndjson", None),
+               ("ndjson.gz", "saida.ndjson.gz", "ndjson", None)]
+    if serialization.zstandard is not None:
+        outputs.append(("ndjson.zst", "saida.ndjson.zst", "ndjson", None))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        baseline = None
+        for label, file_name, format, indent in outputs:
+            run = results["output"][label] = bench_output(records, os.path.join(temp_dir, file_name), format, indent)
+            baseline = baseline or run
+            print_row(label, run, baseline)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=4)
+        print(f"Resultados salvos em '{args.save}'.")
+
+if __name__ == "__main__":
+    main()
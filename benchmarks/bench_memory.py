@@ -0,0 +1,64 @@
+"""
+Benchmark de memória: bytes por entrada mantida em memória para o MediaEntry antigo
+(com __dict__), o MediaEntry atual (com __slots__) e o MediaEntryBatch colunar.
+
+Uso:
+    python -m benchmarks.bench_memory --entries 1000000
+"""
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+from benchmarks.bench_parser import generate_playlist
+from src.parsers.m3u_parser import M3UParser
+
+class LegacyMediaEntry:
+    """
+    Cópia da representação original de MediaEntry (atributos em __dict__), mantida como referência
+    """
+    def __init__(self, entry):
+        self.name = entry.name
+        self.url = entry.url
+        self.language = entry.language
+        self.group_title = entry.group_title
+        self.tvg_id = entry.tvg_id
+        self.imdb_id = entry.imdb_id
+        self.season = entry.season
+        self.episode = entry.episode
+        self.is_series = entry.is_series
+        self.fingerprint = entry.fingerprint
+
+def measure(label, build, entries):
+    """
+    Mede a memória retida pela estrutura retornada por build() e imprime bytes por entrada
+    """
+    gc.collect()
+    tracemalloc.start()
+    container = build()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {current / entries:>8.1f} bytes/entrada  pico {peak / 2**20:>8.1f} MiB")
+    del container
+    return current
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de memória das entradas de mídia')
+    parser.add_argument('--entries', type=int, default=1000000, help='Número de entradas sintéticas')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "bench.m3u")
+        generate_playlist(file_path, args.entries)
+
+        m3u_parser = M3UParser()
+        parsed = sum(1 for _ in m3u_parser.iter_entries(file_path))
+
+        legacy = measure("antes (__dict__)", lambda: [LegacyMediaEntry(e) for e in m3u_parser.iter_entries(file_path)], parsed)
+        slots = measure("MediaEntry (__slots__)", lambda: list(m3u_parser.iter_entries(file_path)), parsed)
+        batch = measure("MediaEntryBatch", lambda: list(m3u_parser.iter_batches(file_path)), parsed)
+        print(f"Redução: __slots__ {legacy / slots:.2f}x, lote colunar {legacy / batch:.2f}x")
+
+if __name__ == "__main__":
+    main()
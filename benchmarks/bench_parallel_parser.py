@@ -0,0 +1,45 @@
+"""
+Benchmark do parser paralelo: mede o tempo de análise e normalização de uma lista
+sintética com 1 a 16 processos, comparando com o parser sequencial.
+
+Uso:
+    python -m benchmarks.bench_parallel_parser --entries 2000000 --workers 1 2 4 8 16
+"""
+import argparse
+import os
+import tempfile
+import time
+from benchmarks.bench_parser import generate_playlist
+from src.parsers.m3u_parser import M3UParser
+from src.parsers.parallel_parser import ParallelM3UParser
+
+def measure(iter_batches):
+    """
+    Consome os lotes gerados e retorna (entradas, segundos)
+    """
+    start = time.perf_counter()
+    count = sum(len(batch) for batch in iter_batches())
+    return count, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do parser M3U paralelo')
+    parser.add_argument('--entries', type=int, default=2000000, help='Número de entradas sintéticas')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16], help='Números de processos testados')
+    parser.add_argument('--chunk-size', type=int, default=4 * 1024 * 1024, help='Tamanho dos blocos em bytes')
+    args = parser.parse_args()
+
+    print(f"Núcleos disponíveis: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "bench.m3u")
+        generate_playlist(file_path, args.entries)
+
+        count, baseline = measure(lambda: M3UParser().iter_batches(file_path))
+        print(f"{'sequencial':<14} {count:>10} entradas  {baseline:8.2f}s")
+
+        for workers in args.workers:
+            parallel_parser = ParallelM3UParser(workers, args.chunk_size)
+            count, elapsed = measure(lambda: parallel_parser.iter_batches(file_path))
+            print(f"{f'{workers} processos':<14} {count:>10} entradas  {elapsed:8.2f}s  {baseline / elapsed:5.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Microbenchmark do parser M3U: compara a implementação antiga (readlines + re.search
+sem compilação) com o tokenizador de passagem única atual.
+
+Uso:
+    python -m benchmarks.bench_parser --entries 1000000
+"""
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+from src.models.media_entry import MediaEntry
+from src.parsers.m3u_parser import M3UParser
+
+def generate_playlist(file_path, entries, seed=42):
+    """
+    Gera uma lista M3U sintética com filmes, séries e canais
+    """
+    rng = random.Random(seed)
+    with open(file_path, 'w', encoding='utf-8') as file:
+        file.write("#EXTM3U\n")
+        for i in range(entries):
+            kind = rng.random()
+            if kind < 0.05:
+                name, group = f"Canal {i}", "Canais | Abertos"
+            elif kind < 0.55:
+                tag = rng.choice(["", " [L]", " (L)", " (2019)", " - 2018", " 4K"])
+                name, group = f"Filme {i % 5000}{tag}", rng.choice(["Filmes | Ação", "Filmes Legendado"])
+            else:
+                name = f"Serie {i % 800} S{rng.randint(1, 9):02d}E{rng.randint(1, 24):02d}"
+                group = "Series | Drama"
+            file.write(
+                f'#EXTINF:-1 tvg-id="" tvg-name="{name}" tvg-logo="http://logo/{i}.png" '
+                f'group-title="{group}",{name}\n'
+            )
+            file.write(f"http://provider.example/{i}.mp4\n")
+
+def legacy_parse_file(file_path):
+    """
+    Cópia da implementação original de M3UParser.parse_file, mantida como referência
+    """
+    def clean_name(name):
+        name = re.sub(r'\[[Ll]\]', '', name)
+        name = re.sub(r'\(\s?[Ll]\s?\)', '', name)
+        name = re.sub(r'-\s?\d{4}$', '', name)
+        name = re.sub(r'\(\d{4}\)', '', name).strip()
+        return name.strip()
+
+    def extract_series_info(name):
+        match = re.search(r'[Ss](\d+)[Ee](\d+)', name)
+        if match:
+            series_name = clean_name(re.sub(r'[Ss]\d+[Ee]\d+', '', name).strip())
+            return series_name, int(match.group(1)), int(match.group(2))
+        return clean_name(name), None, None
+
+    entries = []
+    with open(file_path, 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+
+    for i, line in enumerate(lines):
+        if line.startswith("#EXTINF"):
+            match_group_title = re.search(r'group-title="([^"]+)"', line)
+            group_title = match_group_title.group(1) if match_group_title else ""
+            if group_title.startswith("Canais"):
+                continue
+            match_name = re.search(r'tvg-name="([^"]+)"', line)
+            if match_name and i + 1 < len(lines):
+                name = match_name.group(1).strip()
+                url = lines[i + 1].strip()
+                if not url.startswith("http"):
+                    continue
+                language = "legendado" if ("[L]" in name or "(L)" in name or "Legendado" in group_title) else "portuguese"
+                entry = MediaEntry(name, url, language, group_title)
+                series_name, season, episode = extract_series_info(name)
+                entry.name = series_name
+                if season is not None and episode is not None:
+                    entry.set_series_info(season, episode)
+                entries.append(entry)
+    return entries
+
+def measure(label, func, file_path, lines):
+    """
+    Executa a função de parsing e imprime a taxa de linhas por segundo
+    """
+    start = time.perf_counter()
+    count = func(file_path)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {count:>10} entradas  {elapsed:8.2f}s  {lines / elapsed:>12,.0f} linhas/s")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmark do parser M3U')
+    parser.add_argument('--entries', type=int, default=1000000, help='Número de entradas sintéticas')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "bench.m3u")
+        generate_playlist(file_path, args.entries)
+        lines = args.entries * 2 + 1
+
+        m3u_parser = M3UParser()
+        before = measure("antes", lambda path: len(legacy_parse_file(path)), file_path, lines)
+        after = measure("depois", lambda path: sum(1 for _ in m3u_parser.iter_entries(path)), file_path, lines)
+        print(f"Ganho: {before / after:.2f}x")
+
+if __name__ == "__main__":
+    main()
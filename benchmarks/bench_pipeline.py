@@ -0,0 +1,297 @@
+"""
+Benchmark reproduzível do pipeline completo, sem rede e sem credenciais.
+
+Gera uma lista sintética (benchmarks.synthetic) e mede:
+
+- M3UParser: entradas por segundo e pico de memória da análise em streaming
+- CacheManager: gravações e leituras de registros por segundo (backends json e sqlite)
+- JSONExporter: entradas por segundo em cada formato de saída
+- MultiExporter: entradas por segundo gravando JSON, NDJSON, M3U e saídas particionadas
+  por tipo e por grupo na mesma passagem
+- main.py de ponta a ponta contra o TMDb falso (benchmarks.mock_tmdb): tempo,
+  entradas por segundo, requisições feitas, pico de RSS e tempo das etapas,
+  nos modos síncrono e assíncrono, com o cache vazio e com o cache já preenchido
+
+Os resultados podem ser salvos em JSON e comparados com uma execução anterior;
+a comparação falha (código de saída 1) se alguma métrica piorar além da tolerância.
+
+Uso:
+    python -m benchmarks.bench_pipeline --save baseline.json
+    python -m benchmarks.bench_pipeline --compare baseline.json --tolerance 0.2
+    python -m benchmarks.bench_pipeline --e2e-entries 5000 --latency 0.05 --throttle-every 100 --rate-limit 200
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.mock_tmdb import MockTMDbServer
+from benchmarks.synthetic import generate_playlist
+from src.cache.cache_manager import CacheManager
+from src.parsers.m3u_parser import M3UParser
+from src.utils.json_exporter import JSONExporter, StreamingJSONExporter
+from src.utils.multi_exporter import MultiExporter, ShardedExporter
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+def bench_parser(file_path):
+    """
+    Mede a taxa de análise (sem rastreamento) e o pico de memória (com tracemalloc, em outra passagem)
+    """
+    m3u_parser = M3UParser()
+    start = time.perf_counter()
+    count = sum(1 for _ in m3u_parser.iter_entries(file_path))
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    for _ in m3u_parser.iter_entries(file_path):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "entries": count,
+        "seconds": round(elapsed, 3),
+        "entries_per_second": round(count / elapsed),
+        "peak_kib": round(peak / 1024),
+    }
+
+def bench_cache(backend, operations):
+    """
+    Grava e lê registros pelo CacheManager (com o salvamento periódico padrão)
+    """
+    cache = CacheManager(f"bench_{backend}.json", backend=backend)
+    keys = [CacheManager.make_key(f"titulo {index}", index % 2 == 0, 2000 + index % 25) for index in range(operations)]
+
+    start = time.perf_counter()
+    for index, key in enumerate(keys):
+        cache.set_record(key, f"Titulo {index}", index % 2 == 0, 2000 + index % 25, "pt-br",
+                         index, f"tt{index:08d}" if index % 10 else None)
+    cache.save_cache(force=True)
+    write_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys:
+        cache.get_record(key)
+    read_seconds = time.perf_counter() - start
+    cache.close()
+
+    return {
+        "operations": operations,
+        "writes_per_second": round(operations / write_seconds),
+        "reads_per_second": round(operations / read_seconds),
+    }
+
+def bench_exporter(entries, file_path, format, indent):
+    start = time.perf_counter()
+    JSONExporter.export_to_file(entries, file_path, format=format, indent=indent)
+    elapsed = time.perf_counter() - start
+    return {
+        "entries": len(entries),
+        "entries_per_second": round(len(entries) / elapsed),
+        "bytes": os.path.getsize(file_path),
+    }
+
+def bench_fanout(entries, directory):
+    """
+    Grava todas as saídas de uma só vez, como main.py --ndjson --m3u --shard-by type --shard-by group
+    """
+    exporter = MultiExporter([
+        StreamingJSONExporter(os.path.join(directory, "fanout.json")),
+        StreamingJSONExporter(os.path.join(directory, "fanout.ndjson"), format="ndjson"),
+        StreamingJSONExporter(os.path.join(directory, "fanout.m3u"), format="m3u"),
+        ShardedExporter(os.path.join(directory, "fanout_partes"), "type"),
+        ShardedExporter(os.path.join(directory, "fanout_partes"), "group"),
+    ])
+    start = time.perf_counter()
+    with exporter:
+        for entry in entries:
+            exporter.write(entry)
+    elapsed = time.perf_counter() - start
+    files = sum(len(sink.shards) if isinstance(sink, ShardedExporter) else 1 for sink in exporter.sinks)
+    return {
+        "entries": len(entries),
+        "entries_per_second": round(len(entries) / elapsed),
+        "files": files,
+    }
+
+def run_main(server, playlist, work_dir, arguments, env):
+    """
+    Executa main.py em um subprocesso contra o TMDb falso
+
+    Returns:
+        dict: Tempo, requisições, pico de RSS do subprocesso e tempo das etapas
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    output = os.path.join(work_dir, "output.json")
+    metrics_file = os.path.join(work_dir, "metrics.json")
+    log_file = os.path.join(work_dir, "main.log")
+
+    server.reset_stats()
+    start = time.perf_counter()
+    with open(log_file, 'w', encoding='utf-8') as log:
+        process = subprocess.Popen(
+            [sys.executable, MAIN_SCRIPT, "-i", playlist, "-o", output, "--metrics", metrics_file] + arguments,
+            cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+        # wait4 devolve o uso de recursos apenas deste subprocesso
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - start
+
+    if process.returncode != 0:
+        with open(log_file, encoding='utf-8') as log:
+            print(log.read()[-2000:])
+        raise RuntimeError(f"main.py terminou com o código {process.returncode}")
+
+    with open(metrics_file, encoding='utf-8') as file:
+        report = json.load(file)
+    entries = report["counters"].get("entries_total", 0)
+    stats = server.stats()
+    # ru_maxrss é informado em KiB no Linux e em bytes no macOS
+    peak_rss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return {
+        "entries": entries,
+        "seconds": round(elapsed, 3),
+        "entries_per_second": round(entries / elapsed, 1),
+        "requests": stats["requests"],
+        "throttled": stats["throttled"],
+        "peak_rss_kib": peak_rss,
+        "stages": {name: stage["wall_seconds"] for name, stage in report["stages"].items()},
+    }
+
+def bench_end_to_end(args, temp_dir):
+    playlist = os.path.join(temp_dir, "e2e.m3u")
+    generate_playlist(playlist, args.e2e_entries, seed=args.seed)
+
+    server = MockTMDbServer(latency=args.latency, throttle_every=args.throttle_every,
+                            miss_ratio=args.miss_ratio, seed=args.seed)
+    env = dict(os.environ, TMDB_BASE_URL=server.base_url, API_KEY="benchmark", BEARER_TOKEN="benchmark",
+               RATE_LIMIT_PER_SECOND=str(args.rate_limit), RATE_LIMIT_BURST=str(int(args.rate_limit)))
+    results = {}
+    with server:
+        sync_dir = os.path.join(temp_dir, "sync")
+        results["sync_cold"] = run_main(server, playlist, sync_dir, [], env)
+        # Segunda execução no mesmo diretório: tudo deve vir do cache
+        results["sync_warm"] = run_main(server, playlist, sync_dir, [], env)
+        results["async_cold"] = run_main(server, playlist, os.path.join(temp_dir, "async"),
+                                         ["--async", "--concurrency", str(args.concurrency)], env)
+    return results
+
+def flatten(results, prefix=""):
+    """
+    Achata o dicionário de resultados em {"parser.entries_per_second": valor, ...}
+    """
+    flat = {}
+    for name, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{name}."))
+        elif isinstance(value, (int, float)):
+            flat[f"{prefix}{name}"] = value
+    return flat
+
+def compare(results, baseline, tolerance):
+    """
+    Compara com uma execução anterior. Taxas (*_per_second) devem ser maiores;
+    tempo, memória e requisições, menores
+
+    Returns:
+        list: Descrição das métricas que pioraram além da tolerância
+    """
+    regressions = []
+    current, previous = flatten(results), flatten(baseline)
+    for name, value in current.items():
+        old = previous.get(name)
+        if not old or name.endswith(".entries") or name.endswith(".operations") or name.endswith(".bytes"):
+            continue
+        if name.endswith("_per_second"):
+            worse = value < old * (1 - tolerance)
+        elif name.endswith(("seconds", "_kib", "requests", "throttled")):
+            worse = value > old * (1 + tolerance)
+        else:
+            continue
+        if worse:
+            regressions.append(f"{name}: {old} -> {value}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do pipeline com lista sintética e TMDb falso')
+    parser.add_argument('--entries', type=int, default=200000, help='Entradas da lista usada no parser e no exportador')
+    parser.add_argument('--e2e-entries', type=int, default=2000, help='Entradas da lista usada de ponta a ponta')
+    parser.add_argument('--cache-ops', type=int, default=2000, help='Registros gravados e lidos no benchmark do cache')
+    parser.add_argument('--latency', type=float, default=0.02, help='Latência do TMDb falso (segundos)')
+    parser.add_argument('--throttle-every', type=int, default=0, help='O TMDb falso responde 429 a cada N requisições')
+    parser.add_argument('--miss-ratio', type=float, default=0.05, help='Fração dos títulos sem resultados no TMDb falso')
+    parser.add_argument('--rate-limit', type=float, default=40, help='Requisições por segundo permitidas ao cliente')
+    parser.add_argument('--concurrency', type=int, default=50, help='Requisições simultâneas no modo assíncrono')
+    parser.add_argument('--seed', type=int, default=42, help='Semente da lista sintética')
+    parser.add_argument('--skip-e2e', action='store_true', help='Mede apenas os componentes')
+    parser.add_argument('--save', help='Salva os resultados neste arquivo JSON')
+    parser.add_argument('--compare', help='Compara com os resultados salvos neste arquivo')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Piora relativa tolerada na comparação')
+    args = parser.parse_args()
+
+    for option in ("save", "compare"):
+        if getattr(args, option):
+            setattr(args, option, os.path.abspath(getattr(args, option)))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # O CacheManager usa o diretório de cache relativo ao diretório atual
+        os.chdir(temp_dir)
+        playlist = os.path.join(temp_dir, "bench.m3u")
+        stats = generate_playlist(playlist, args.entries, seed=args.seed)
+        print(f"Lista sintética: {', '.join(f'{name}: {value}' for name, value in stats.items())}")
+
+        results["parser"] = bench_parser(playlist)
+        print(f"M3UParser        {results['parser']['entries_per_second']:>10,} entradas/s  "
+              f"pico {results['parser']['peak_kib']:,} KiB")
+
+        for backend in ("json", "sqlite"):
+            cache = results[f"cache_{backend}"] = bench_cache(backend, args.cache_ops)
+            print(f"CacheManager {backend:<6} {cache['writes_per_second']:>8,} gravações/s  "
+                  f"{cache['reads_per_second']:>10,} leituras/s")
+
+        entries = list(M3UParser().iter_entries(playlist))
+        for label, format, indent in (("json", "json", 4), ("json_compact", "json", None), ("ndjson", "ndjson", None),
+                                      ("m3u", "m3u", None)):
+            exporter = results[f"exporter_{label}"] = bench_exporter(
+                entries, os.path.join(temp_dir, f"export.{format}"), format, indent
+            )
+            print(f"JSONExporter {label:<12} {exporter['entries_per_second']:>10,} entradas/s  "
+                  f"{exporter['bytes'] / len(entries):.0f} bytes/entrada")
+        fanout = results["exporter_fanout"] = bench_fanout(entries, temp_dir)
+        print(f"MultiExporter fan-out {fanout['entries_per_second']:>10,} entradas/s  {fanout['files']} arquivos")
+        del entries
+
+        if not args.skip_e2e:
+            results["end_to_end"] = bench_end_to_end(args, temp_dir)
+            for label, run in results["end_to_end"].items():
+                stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in run["stages"].items())
+                print(f"main.py {label:<11} {run['seconds']:7.2f}s  {run['entries_per_second']:>8} entradas/s  "
+                      f"{run['requests']:>6} requisições ({run['throttled']} com 429)  "
+                      f"pico {run['peak_rss_kib']:,} KiB  [{stages}]")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=4)
+        print(f"Resultados salvos em '{args.save}'.")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressões acima de {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"Nenhuma regressão acima de {args.tolerance:.0%} em relação a '{args.compare}'.")
+
+if __name__ == "__main__":
+    main()
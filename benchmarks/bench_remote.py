@@ -0,0 +1,232 @@
+"""
+Benchmark da leitura de listas remotas (-i http://...) contra um servidor HTTP local.
+
+O servidor (PlaylistServer) publica uma lista sintética em /lista.m3u, com ETag,
+Last-Modified, respostas 304 para requisições condicionais, Content-Encoding: gzip
+quando o cliente aceita (exceto com ?gzip=0), a mesma lista compactada em
+/lista.m3u.gz e um limite de banda opcional, para simular o servidor do provedor.
+
+Mede, para cada forma de leitura, o tempo até a primeira entrada analisada (quando
+as buscas podem começar), o tempo total, os bytes transferidos e o pico de memória:
+
+- download_then_parse: baixa a lista inteira para o disco e depois a analisa (como antes)
+- stream: RemotePlaylist alimentando o parser enquanto a lista é baixada
+- stream_gzip: o mesmo, com Content-Encoding: gzip
+- stream_gz_file: o mesmo, lendo o arquivo .m3u.gz
+- conditional: segunda leitura com o ETag salvo (304, nada é baixado)
+
+Uso:
+    python -m benchmarks.bench_remote --entries 200000 --bandwidth-mb 20
+"""
+import argparse
+import email.utils
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import requests
+from benchmarks.synthetic import generate_playlist
+from src.parsers.m3u_parser import M3UParser
+from src.parsers.remote_playlist import RemotePlaylist
+
+class PlaylistServer:
+    """
+    Servidor HTTP local que publica uma lista M3U, executado em uma thread
+
+    Args:
+        file_path (str): Lista publicada em /lista.m3u (e compactada em /lista.m3u.gz)
+        bandwidth (float): Limite de envio em bytes por segundo (0 = sem limite)
+    """
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, file_path, host="127.0.0.1", port=0, bandwidth=0):
+        with open(file_path, 'rb') as file:
+            self.content = file.read()
+        self.compressed = gzip.compress(self.content, compresslevel=6)
+        self.etag = f'"{hashlib.sha1(self.content).hexdigest()}"'
+        self.last_modified = email.utils.formatdate(os.path.getmtime(file_path), usegmt=True)
+        self.bandwidth = bandwidth
+        self.mutex = threading.Lock()
+        self.bytes_sent = 0
+        self.responses = {}
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_stats(self):
+        with self.mutex:
+            self.bytes_sent = 0
+            self.responses = {}
+
+    def stats(self):
+        with self.mutex:
+            return {"bytes_sent": self.bytes_sent, "responses": dict(self.responses)}
+
+    def _count(self, status, size):
+        with self.mutex:
+            self.bytes_sent += size
+            self.responses[str(status)] = self.responses.get(str(status), 0) + 1
+
+    def _handler_class(self):
+        playlist = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path not in ("/lista.m3u", "/lista.m3u.gz"):
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    playlist._count(404, 0)
+                    return
+
+                if (self.headers.get("If-None-Match") == playlist.etag
+                        or self.headers.get("If-Modified-Since") == playlist.last_modified):
+                    self.send_response(304)
+                    self.send_header("ETag", playlist.etag)
+                    self.end_headers()
+                    playlist._count(304, 0)
+                    return
+
+                headers = {"ETag": playlist.etag, "Last-Modified": playlist.last_modified}
+                if url.path.endswith(".gz"):
+                    body = playlist.compressed
+                    headers["Content-Type"] = "application/gzip"
+                elif "gzip" in self.headers.get("Accept-Encoding", "") and url.query != "gzip=0":
+                    body = playlist.compressed
+                    headers["Content-Type"] = "audio/x-mpegurl"
+                    headers["Content-Encoding"] = "gzip"
+                else:
+                    body = playlist.content
+                    headers["Content-Type"] = "audio/x-mpegurl"
+
+                self.send_response(200)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                start = time.perf_counter()
+                for offset in range(0, len(body), playlist.CHUNK_SIZE):
+                    chunk = body[offset:offset + playlist.CHUNK_SIZE]
+                    self.wfile.write(chunk)
+                    if playlist.bandwidth:
+                        # Mantém a taxa média de envio no limite configurado
+                        delay = (offset + len(chunk)) / playlist.bandwidth - (time.perf_counter() - start)
+                        if delay > 0:
+                            time.sleep(delay)
+                playlist._count(200, len(body))
+
+        return Handler
+
+def measure(server, read_entries):
+    """
+    Mede uma forma de leitura: tempo até a primeira entrada, tempo total, entradas,
+    bytes enviados pelo servidor e pico de memória (tracemalloc)
+    """
+    server.reset_stats()
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    count = 0
+    for _ in read_entries():
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "entries": count,
+        "first_entry_seconds": round(first or 0.0, 4),
+        "seconds": round(elapsed, 3),
+        "bytes_sent": server.stats()["bytes_sent"],
+        "peak_kib": round(peak / 1024),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da leitura de listas remotas')
+    parser.add_argument('--entries', type=int, default=200000, help='Entradas da lista sintética')
+    parser.add_argument('--bandwidth-mb', type=float, default=20,
+                        help='Limite de banda do servidor em MiB/s (0 = sem limite)')
+    parser.add_argument('--seed', type=int, default=42, help='Semente da lista sintética')
+    parser.add_argument('--save', help='Salva os resultados neste arquivo JSON')
+    args = parser.parse_args()
+
+    m3u_parser = M3UParser()
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        playlist = os.path.join(temp_dir, "lista.m3u")
+        generate_playlist(playlist, args.entries, seed=args.seed)
+        state_file = os.path.join(temp_dir, "saida.json.source.json")
+
+        with PlaylistServer(playlist, bandwidth=args.bandwidth_mb * 1024 * 1024) as server:
+            url = f"{server.base_url}/lista.m3u"
+            print(f"Lista de {os.path.getsize(playlist) / (1024 * 1024):.1f} MiB "
+                  f"({len(server.compressed) / (1024 * 1024):.1f} MiB compactada) em {url}")
+
+            def download_then_parse():
+                downloaded = os.path.join(temp_dir, "baixada.m3u")
+                # Sem gzip, como um download simples para o disco
+                with requests.get(f"{url}?gzip=0", stream=True) as response:
+                    response.raise_for_status()
+                    with open(downloaded, 'wb') as file:
+                        for chunk in response.iter_content(64 * 1024):
+                            file.write(chunk)
+                yield from m3u_parser.iter_entries(downloaded)
+
+            def stream(source_url, state=None):
+                def read_entries():
+                    remote = RemotePlaylist(source_url, state)
+                    if not remote.open():
+                        return
+                    yield from m3u_parser.iter_entries(remote.stream())
+                    remote.save_state()
+                return read_entries
+
+            runs = (
+                ("download_then_parse", download_then_parse),
+                ("stream", stream(f"{url}?gzip=0")),
+                ("stream_gzip", stream(url)),
+                ("stream_gz_file", stream(f"{url}.gz")),
+                ("conditional_first", stream(url, state=state_file)),
+                ("conditional", stream(url, state=state_file)),
+            )
+            for label, read_entries in runs:
+                run = results[label] = measure(server, read_entries)
+                print(f"{label:<20} primeira entrada {run['first_entry_seconds']:8.3f}s  total {run['seconds']:7.2f}s  "
+                      f"{run['entries']:>8,} entradas  {run['bytes_sent'] / (1024 * 1024):7.1f} MiB enviados  "
+                      f"pico {run['peak_kib']:,} KiB")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=4)
+        print(f"Resultados salvos em '{args.save}'.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Servidor HTTP local que imita os endpoints do TMDb usados pelo conversor
+(/search/movie, /search/tv, /{movie,tv}/{id}/external_ids, /tv/{id}/season/{n}
+e /tv/{id}/season/{n}/episode/{e}/external_ids).
+
+As respostas são determinísticas (derivadas do hash do título), com latência
+configurável, respostas 429 injetadas e resultados "isca" parecidos com o título
+buscado, para exercitar a ordenação do TitleMatcher. O conversor é apontado para
+ele pela variável de ambiente TMDB_BASE_URL.
+
+Uso:
+    python -m benchmarks.mock_tmdb --port 8765 --latency 0.05 --throttle-every 50
+    TMDB_BASE_URL=http://127.0.0.1:8765/3 API_KEY=x BEARER_TOKEN=x python main.py -i lista.m3u
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_EXTERNAL_IDS_PATH = re.compile(r"^/3/(movie|tv)/(\d+)/external_ids$")
+_SEASON_PATH = re.compile(r"^/3/tv/(\d+)/season/(\d+)$")
+_EPISODE_EXTERNAL_IDS_PATH = re.compile(r"^/3/tv/(\d+)/season/(\d+)/episode/(\d+)/external_ids$")
+
+def _digest(text):
+    return int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "big")
+
+class MockTMDbServer:
+    """
+    Servidor TMDb falso executado em uma thread
+
+    Args:
+        port (int): Porta (0 escolhe uma livre)
+        latency (float): Atraso (em segundos) de cada resposta
+        jitter (float): Variação aleatória máxima somada à latência
+        throttle_every (int): Responde 429 a cada N requisições (0 desativa)
+        retry_after (int): Valor do cabeçalho Retry-After das respostas 429
+        results (int): Número de resultados de cada busca (o título exato e iscas)
+        miss_ratio (float): Fração dos títulos sem nenhum resultado
+        missing_imdb_ratio (float): Fração dos IDs do TMDb sem IMDb ID
+
+    Uso:
+        with MockTMDbServer(latency=0.02) as server:
+            os.environ["TMDB_BASE_URL"] = server.base_url
+            ...
+            print(server.stats())
+    """
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, throttle_every=0,
+                 retry_after=1, results=3, miss_ratio=0.0, missing_imdb_ratio=0.0, seed=42):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.results = results
+        self.miss_ratio = miss_ratio
+        self.missing_imdb_ratio = missing_imdb_ratio
+        self.rng = random.Random(seed)
+        self.mutex = threading.Lock()
+        self.counts = {}
+        self.requests = 0
+        self.throttled = 0
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/3"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.stop()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        """
+        Requisições recebidas por endpoint, total e respostas 429 injetadas
+        """
+        with self.mutex:
+            return {"requests": self.requests, "throttled": self.throttled, "endpoints": dict(self.counts)}
+
+    def reset_stats(self):
+        with self.mutex:
+            self.counts = {}
+            self.requests = 0
+            self.throttled = 0
+
+    def _count(self, endpoint):
+        """
+        Contabiliza a requisição e indica se ela deve receber um 429
+        """
+        with self.mutex:
+            self.requests += 1
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            throttled = bool(self.throttle_every) and self.requests % self.throttle_every == 0
+            if throttled:
+                self.throttled += 1
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        return throttled, delay
+
+    def search(self, query, media_type):
+        """
+        Resultados de uma busca: o título exato (salvo os "não encontrados") e iscas
+        menos populares com títulos parecidos
+        """
+        seed = _digest(f"{media_type}|{query.lower()}")
+        if (seed % 1000) / 1000 < self.miss_ratio:
+            return []
+        title_field, date_field = ("name", "first_air_date") if media_type == "tv" else ("title", "release_date")
+        year = 1960 + seed % 65
+        titles = [query.title(), f"{query.title()} 2", f"O Retorno de {query.title()}", f"{query.title()}: A Origem"]
+        results = []
+        for position, title in enumerate(titles[:self.results]):
+            results.append({
+                "id": (seed + position) % 10_000_000 + 1,
+                title_field: title,
+                date_field: f"{year + position}-01-01",
+                "popularity": round(50.0 / (position + 1), 3),
+            })
+        # A isca mais parecida vem primeiro, como às vezes acontece no TMDb
+        if len(results) > 1:
+            results[0], results[1] = results[1], results[0]
+        return results
+
+    def external_ids(self, tmdb_id, media_type):
+        if (_digest(f"{media_type}|{tmdb_id}") % 1000) / 1000 < self.missing_imdb_ratio:
+            return {"id": tmdb_id, "imdb_id": None}
+        return {"id": tmdb_id, "imdb_id": f"tt{tmdb_id:08d}"}
+
+    def season(self, tmdb_id, season):
+        """
+        Detalhes de uma temporada: de 6 a 25 episódios, conforme o hash
+        """
+        episodes = 6 + _digest(f"season|{tmdb_id}|{season}") % 20
+        return {
+            "season_number": season,
+            "episodes": [{"episode_number": number, "season_number": season} for number in range(1, episodes + 1)],
+        }
+
+    def episode_external_ids(self, tmdb_id, season, episode):
+        """
+        IDs externos de um episódio, ou None se ele não existe na temporada
+        """
+        if episode > len(self.season(tmdb_id, season)["episodes"]):
+            return None
+        return {"imdb_id": f"tt{_digest(f'episode|{tmdb_id}|{season}|{episode}') % 10**8:08d}"}
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Mantém as conexões abertas, como o TMDb
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, body=None, headers=None):
+                data = json.dumps(body).encode("utf-8") if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                external_ids = _EXTERNAL_IDS_PATH.match(url.path)
+                season = _SEASON_PATH.match(url.path)
+                episode_ids = _EPISODE_EXTERNAL_IDS_PATH.match(url.path)
+                if url.path in ("/3/search/movie", "/3/search/tv"):
+                    endpoint = f"search_{url.path.rsplit('/', 1)[-1]}"
+                elif external_ids:
+                    endpoint = f"external_ids_{external_ids.group(1)}"
+                elif season:
+                    endpoint = "season"
+                elif episode_ids:
+                    endpoint = "external_ids_episode"
+                else:
+                    self.send_json(404, {"status_message": "Endpoint não simulado"})
+                    return
+
+                throttled, delay = mock._count(endpoint)
+                if throttled:
+                    self.send_json(429, {"status_code": 25}, {"Retry-After": str(mock.retry_after)})
+                    return
+                if delay:
+                    time.sleep(delay)
+
+                if external_ids:
+                    self.send_json(200, mock.external_ids(int(external_ids.group(2)), external_ids.group(1)))
+                elif season:
+                    self.send_json(200, mock.season(int(season.group(1)), int(season.group(2))))
+                elif episode_ids:
+                    body = mock.episode_external_ids(*(int(group) for group in episode_ids.groups()))
+                    if body is None:
+                        self.send_json(404, {"status_code": 34})
+                    else:
+                        self.send_json(200, body)
+                else:
+                    query = parse_qs(url.query).get("query", [""])[0]
+                    media_type = "tv" if endpoint == "search_tv" else "movie"
+                    results = mock.search(query, media_type)
+                    self.send_json(200, {"page": 1, "results": results, "total_results": len(results)})
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor TMDb falso para benchmarks')
+    parser.add_argument('--port', type=int, default=8765, help='Porta do servidor')
+    parser.add_argument('--latency', type=float, default=0.02, help='Latência de cada resposta (segundos)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Variação aleatória da latência (segundos)')
+    parser.add_argument('--throttle-every', type=int, default=0, help='Responde 429 a cada N requisições')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After das respostas 429')
+    parser.add_argument('--results', type=int, default=3, help='Resultados por busca')
+    parser.add_argument('--miss-ratio', type=float, default=0.05, help='Fração dos títulos sem resultados')
+    args = parser.parse_args()
+
+    server = MockTMDbServer(
+        port=args.port, latency=args.latency, jitter=args.jitter, throttle_every=args.throttle_every,
+        retry_after=args.retry_after, results=args.results, miss_ratio=args.miss_ratio
+    )
+    print(f"TMDb falso em {server.base_url} (Ctrl+C para encerrar)")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\n{server.stats()}")
+        server.server.server_close()
+
+if __name__ == "__main__":
+    main()
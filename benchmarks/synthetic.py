@@ -0,0 +1,152 @@
+"""
+Gerador de listas M3U sintéticas e reproduzíveis para os benchmarks.
+
+Os títulos são combinações de palavras em português (sem números, para não
+interferir na comparação de sequências do TitleMatcher), e cada entrada pode
+receber os ruídos encontrados nas listas reais: "[L]", "(L)", "4K", "(2019)" e "- 2018".
+
+Uso:
+    python -m benchmarks.synthetic lista.m3u --entries 100000 --series-ratio 0.5 --duplicate-ratio 0.3
+"""
+import argparse
+import random
+
+_WORDS_A = (
+    "Amor", "Caminho", "Sombra", "Reino", "Cidade", "Noite", "Guerra", "Segredo", "Destino", "Jornada",
+    "Lenda", "Herdeiro", "Fronteira", "Coração", "Tempestade", "Ilha", "Espelho", "Promessa", "Vingança", "Silêncio",
+    "Labirinto", "Horizonte", "Guardião", "Império", "Verão", "Inverno", "Floresta", "Oceano", "Castelo", "Deserto",
+)
+_WORDS_B = (
+    "Perdido", "Eterno", "Proibido", "Secreto", "Selvagem", "Sombrio", "Dourado", "Final", "Esquecido", "Invisível",
+    "Partido", "Distante", "Sagrado", "Gelado", "Vermelho", "Oculto", "Infinito", "Quebrado", "Antigo", "Brilhante",
+)
+_WORDS_C = (
+    "", "do Norte", "da Meia-Noite", "das Estrelas", "do Mar", "de Fogo", "da Lua", "do Tempo", "de Prata", "do Vale",
+    "da Serra", "dos Reis", "de Cristal", "da Aurora", "do Abismo",
+)
+
+# Grupos usados para filmes, séries e canais (os canais são descartados pelo parser)
+_MOVIE_GROUPS = ("Filmes | Ação", "Filmes | Drama", "Filmes | Comédia", "Filmes Legendado", "Filmes | 4K")
+_SERIES_GROUPS = ("Series | Drama", "Series | Netflix", "Series | Legendadas")
+_CHANNEL_GROUP = "Canais | Abertos"
+
+# Ruídos acrescentados ao nome; os de ano usam o ano do título
+_NOISE_TAGS = (" [L]", " (L)", " 4K", " ({year})", " - {year}")
+
+def make_title(index):
+    """
+    Título determinístico e único para o índice (acima das combinações, recebe um sufixo em palavras)
+    """
+    combinations = len(_WORDS_A) * len(_WORDS_B) * len(_WORDS_C)
+    base, cycle = index % combinations, index // combinations
+    word_a = _WORDS_A[base % len(_WORDS_A)]
+    word_b = _WORDS_B[(base // len(_WORDS_A)) % len(_WORDS_B)]
+    word_c = _WORDS_C[base // (len(_WORDS_A) * len(_WORDS_B))]
+    title = f"{word_a} {word_b} {word_c}".strip()
+    if cycle:
+        # Sufixo sem dígitos: "Parte Ab", "Parte Ac"... (letras em base 26)
+        suffix = ""
+        while cycle:
+            cycle, letter = divmod(cycle, 26)
+            suffix = chr(ord("a") + letter) + suffix
+        title = f"{title} Parte {suffix.capitalize()}"
+    return title
+
+def generate_playlist(file_path, entries, series_ratio=0.4, channel_ratio=0.05, duplicate_ratio=0.2,
+                      noise_ratio=0.3, max_episodes=24, seed=42):
+    """
+    Gera uma lista M3U sintética
+
+    Args:
+        file_path (str): Arquivo de saída
+        entries (int): Número de entradas (linhas #EXTINF)
+        series_ratio (float): Fração das entradas que são episódios de séries
+        channel_ratio (float): Fração das entradas que são canais (ignorados pelo parser)
+        duplicate_ratio (float): Fração dos filmes e séries que repetem um título já gerado
+            (com outra URL e, possivelmente, outro ruído)
+        noise_ratio (float): Fração das entradas com ruído no nome ([L], 4K, ano...)
+        max_episodes (int): Número máximo de episódios gerados em sequência para cada série
+        seed (int): Semente do gerador, para listas reproduzíveis
+
+    Returns:
+        dict: Contagem de entradas geradas por tipo e número de títulos distintos
+    """
+    rng = random.Random(seed)
+    stats = {"entries": 0, "movies": 0, "episodes": 0, "channels": 0, "duplicates": 0, "noisy": 0}
+    movie_titles = []
+    series_titles = []
+    next_title = 0
+    pending_episodes = []
+
+    def new_title():
+        nonlocal next_title
+        title = make_title(next_title)
+        next_title += 1
+        return title, rng.randint(1960, 2024)
+
+    with open(file_path, 'w', encoding='utf-8') as file:
+        file.write("#EXTM3U\n")
+        for index in range(entries):
+            kind = rng.random()
+            if kind < channel_ratio:
+                name, group = f"Canal {index}", _CHANNEL_GROUP
+                stats["channels"] += 1
+            elif kind < channel_ratio + series_ratio:
+                # Uma série gera vários episódios seguidos, como nas listas dos provedores
+                if not pending_episodes:
+                    if series_titles and rng.random() < duplicate_ratio:
+                        title, year = rng.choice(series_titles)
+                        stats["duplicates"] += 1
+                    else:
+                        title, year = new_title()
+                        series_titles.append((title, year))
+                    season = rng.randint(1, 5)
+                    pending_episodes = [(title, year, season, episode)
+                                        for episode in range(rng.randint(1, max_episodes), 0, -1)]
+                title, year, season, episode = pending_episodes.pop()
+                name = f"{title} S{season:02d}E{episode:02d}"
+                group = rng.choice(_SERIES_GROUPS)
+                stats["episodes"] += 1
+            else:
+                if movie_titles and rng.random() < duplicate_ratio:
+                    title, year = rng.choice(movie_titles)
+                    stats["duplicates"] += 1
+                else:
+                    title, year = new_title()
+                    movie_titles.append((title, year))
+                name = title
+                if rng.random() < noise_ratio:
+                    name += rng.choice(_NOISE_TAGS).format(year=year)
+                    stats["noisy"] += 1
+                group = rng.choice(_MOVIE_GROUPS)
+                stats["movies"] += 1
+
+            file.write(
+                f'#EXTINF:-1 tvg-id="" tvg-name="{name}" tvg-logo="http://logo.example/{index}.png" '
+                f'group-title="{group}",{name}\n'
+            )
+            file.write(f"http://provider.example/{index}.mp4\n")
+            stats["entries"] += 1
+
+    stats["titles"] = next_title
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera uma lista M3U sintética para benchmarks')
+    parser.add_argument('output', help='Arquivo M3U de saída')
+    parser.add_argument('--entries', type=int, default=100000, help='Número de entradas')
+    parser.add_argument('--series-ratio', type=float, default=0.4, help='Fração de episódios de séries')
+    parser.add_argument('--channel-ratio', type=float, default=0.05, help='Fração de canais')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.2, help='Fração de títulos repetidos')
+    parser.add_argument('--noise-ratio', type=float, default=0.3, help='Fração de nomes com ruído')
+    parser.add_argument('--seed', type=int, default=42, help='Semente do gerador')
+    args = parser.parse_args()
+
+    stats = generate_playlist(
+        args.output, args.entries, series_ratio=args.series_ratio, channel_ratio=args.channel_ratio,
+        duplicate_ratio=args.duplicate_ratio, noise_ratio=args.noise_ratio, seed=args.seed
+    )
+    print(", ".join(f"{name}: {value}" for name, value in stats.items()))
+
+if __name__ == "__main__":
+    main()
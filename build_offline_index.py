@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import time
+from config.settings import CACHE_DIR, OFFLINE_INDEX_FILE
+from src.api.offline_resolver import OfflineIndexBuilder
+
+def parse_arguments():
+    """
+    Analisa os argumentos da linha de comando
+    """
+    parser = argparse.ArgumentParser(description='Gera o índice offline de títulos a partir dos dumps do TMDb e do IMDb')
+    parser.add_argument('--imdb-basics', help='Arquivo title.basics.tsv(.gz) do IMDb')
+    parser.add_argument('--imdb-akas', help='Arquivo title.akas.tsv(.gz) do IMDb (títulos regionais)')
+    parser.add_argument('--aka-regions', nargs='*', default=['BR'], help='Regiões dos títulos alternativos (padrão: BR)')
+    parser.add_argument('--aka-languages', nargs='*', default=['pt'], help='Idiomas dos títulos alternativos (padrão: pt)')
+    parser.add_argument('--tmdb-movies', help='Export diário movie_ids_*.json(.gz) do TMDb')
+    parser.add_argument('--tmdb-tv', help='Export diário tv_series_ids_*.json(.gz) do TMDb')
+    parser.add_argument('-o', '--output', default=os.path.join(CACHE_DIR, OFFLINE_INDEX_FILE), help='Arquivo do índice')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+
+    dumps = [args.imdb_basics, args.imdb_akas, args.tmdb_movies, args.tmdb_tv]
+    if not any(dumps):
+        print("Erro: Informe ao menos um dump (--imdb-basics, --tmdb-movies ou --tmdb-tv).")
+        sys.exit(1)
+    if args.imdb_akas and not args.imdb_basics:
+        print("Erro: --imdb-akas precisa do --imdb-basics para obter o tipo e o ano dos títulos.")
+        sys.exit(1)
+    for file_path in dumps:
+        if file_path and not os.path.exists(file_path):
+            print(f"Erro: O arquivo '{file_path}' não existe.")
+            sys.exit(1)
+
+    start = time.time()
+    builder = OfflineIndexBuilder(args.output)
+    if args.imdb_basics:
+        print(f"Importando {args.imdb_basics}...")
+        builder.import_imdb_basics(args.imdb_basics)
+    if args.imdb_akas:
+        print(f"Importando {args.imdb_akas}...")
+        builder.import_imdb_akas(args.imdb_akas, args.aka_regions, args.aka_languages)
+    if args.tmdb_movies:
+        print(f"Importando {args.tmdb_movies}...")
+        builder.import_tmdb_ids(args.tmdb_movies, "movie")
+    if args.tmdb_tv:
+        print(f"Importando {args.tmdb_tv}...")
+        builder.import_tmdb_ids(args.tmdb_tv, "tv")
+    counts = builder.finish()
+
+    summary = ", ".join(f"{source}: {count}" for source, count in counts.items())
+    print(f"Índice salvo em '{args.output}' em {time.time() - start:.1f}s ({summary}).")
+
+if __name__ == "__main__":
+    main()
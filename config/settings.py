@@ -11,19 +11,100 @@ BEARER_TOKEN = os.getenv('BEARER_TOKEN')
 # Configurações de cache
 CACHE_FILE = os.getenv('CACHE_FILE', 'cache_ids.json')
 CACHE_DIR = 'cache'
+# Backend do cache: "json" (arquivo único) ou "sqlite" (escritas incrementais em modo WAL)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'json')
+CACHE_SQLITE_FILE = os.getenv('CACHE_SQLITE_FILE', 'cache_ids.sqlite3')
+# Formato dos arquivos do backend "json": "json" (indentado com 4 espaços), "compact" (JSON sem espaços),
+# "msgpack" (requer o pacote msgpack) ou "binary". Na leitura, o formato é detectado pelo conteúdo
+CACHE_FORMAT = os.getenv('CACHE_FORMAT', 'json')
+# Caches de segundo nível: busca -> TMDb ID e TMDb ID -> IMDb ID
+SEARCH_CACHE_NAME = 'search_ids'
+EXTERNAL_IDS_CACHE_NAME = 'external_ids'
+SEASON_CACHE_NAME = 'seasons'  # Episódios de cada temporada e seus IMDb IDs
+LRU_CACHE_SIZE = int(os.getenv('LRU_CACHE_SIZE', 50000))  # Entradas mantidas em memória por cache
+# Defasagem máxima (em segundos) entre uma alteração do cache e a sua gravação no disco pela thread de gravação
+CACHE_FLUSH_INTERVAL = float(os.getenv('CACHE_FLUSH_INTERVAL', 30))
+# Validade dos registros do cache em segundos (0 = nunca expira)
+CACHE_POSITIVE_TTL = int(os.getenv('CACHE_POSITIVE_TTL', 180 * 24 * 3600))
+CACHE_NEGATIVE_TTL = int(os.getenv('CACHE_NEGATIVE_TTL', 7 * 24 * 3600))
+# Índice offline gerado a partir dos dumps do TMDb/IMDb (usado somente se o arquivo existir)
+OFFLINE_INDEX_FILE = os.getenv('OFFLINE_INDEX_FILE', 'offline_index.sqlite3')
+# Sem ano para desempatar, o título mais popular só é aceito se for N vezes mais popular que o segundo
+OFFLINE_POPULARITY_RATIO = float(os.getenv('OFFLINE_POPULARITY_RATIO', 10))
 
 # Configurações do parser
 DEFAULT_INPUT_FILE = "input.m3u"
 DEFAULT_OUTPUT_FILE = "output.json"
+# Processos usados na análise do arquivo M3U (1 = sequencial, no processo principal)
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', 1))
+# Tamanho aproximado de cada bloco do arquivo entregue a um processo de análise
+PARSE_CHUNK_SIZE = int(os.getenv('PARSE_CHUNK_SIZE', 8 * 1024 * 1024))
+# Listas remotas (-i http://...): tempo limite da conexão e de cada leitura, e tamanho dos blocos lidos
+DOWNLOAD_TIMEOUT = int(os.getenv('DOWNLOAD_TIMEOUT', 30))
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Entradas concluídas entre dois checkpoints no modo de tarefa retomável (--job / --resume)
+CHECKPOINT_INTERVAL = int(os.getenv('CHECKPOINT_INTERVAL', 1000))
+# Buffer de escrita de cada saída e de cada arquivo das saídas particionadas (--shard-by)
+EXPORT_BUFFER_SIZE = 1024 * 1024
+SHARD_BUFFER_SIZE = 64 * 1024
+# Arquivos das saídas particionadas abertos ao mesmo tempo; os usados há mais tempo são
+# fechados e reabertos quando voltam a receber entradas (evita esgotar os descritores)
+SHARD_MAX_OPEN_FILES = int(os.getenv('SHARD_MAX_OPEN_FILES', 128))
+# Nível de compactação das saídas .gz e .zst
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))
+ZSTD_LEVEL = int(os.getenv('ZSTD_LEVEL', 3))
+
+# Configurações do modo servidor (--serve) e do modo de observação (--watch)
+SERVER_HOST = os.getenv('SERVER_HOST', '127.0.0.1')
+SERVER_PORT = int(os.getenv('SERVER_PORT', 8080))
+SERVER_MAX_JOBS = int(os.getenv('SERVER_MAX_JOBS', 4))  # Conversões simultâneas (as demais aguardam na fila)
+SERVER_MAX_UPLOAD_MB = int(os.getenv('SERVER_MAX_UPLOAD_MB', 1024))  # Tamanho máximo de uma lista enviada
+WATCH_INTERVAL = float(os.getenv('WATCH_INTERVAL', 5))  # Segundos entre duas verificações do arquivo observado
 
 # Configurações da API do TMDb
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
+TMDB_BASE_URL = os.getenv('TMDB_BASE_URL', "https://api.themoviedb.org/3")
 TMDB_SEARCH_MOVIE = f"{TMDB_BASE_URL}/search/movie"
 TMDB_SEARCH_TV = f"{TMDB_BASE_URL}/search/tv"
 TMDB_MOVIE_EXTERNAL_IDS = f"{TMDB_BASE_URL}/movie/{{tmdb_id}}/external_ids"
 TMDB_TV_EXTERNAL_IDS = f"{TMDB_BASE_URL}/tv/{{tmdb_id}}/external_ids"
+TMDB_TV_SEASON = f"{TMDB_BASE_URL}/tv/{{tmdb_id}}/season/{{season}}"
+TMDB_TV_EPISODE_EXTERNAL_IDS = f"{TMDB_BASE_URL}/tv/{{tmdb_id}}/season/{{season}}/episode/{{episode}}/external_ids"
 DEFAULT_LANGUAGE = "pt-br"
 
 # Configurações de requisição
 MAX_RETRIES = 5
-MAX_WORKERS = 3 
\ No newline at end of file
+MAX_WORKERS = 3
+# Faz as buscas com e sem ano em paralelo: menos latência quando a busca com ano falha, mas uma
+# requisição a mais por título com ano mesmo quando ela encontra o resultado (desativado por padrão)
+PARALLEL_YEAR_SEARCH = os.getenv('PARALLEL_YEAR_SEARCH', 'false').lower() == 'true'
+# Tenta primeiro uma única busca (sem ano), escolhendo o resultado pela similaridade do título,
+# ano e popularidade; as buscas por variantes só são feitas se nenhum resultado for parecido o bastante
+TITLE_MATCHING = os.getenv('TITLE_MATCHING', 'true').lower() == 'true'
+MATCH_MIN_SIMILARITY = float(os.getenv('MATCH_MIN_SIMILARITY', 0.6))
+# Similaridade mínima (trigramas) para reaproveitar um título já resolvido sem nenhuma requisição
+NEAR_DUPLICATE_MIN_SIMILARITY = float(os.getenv('NEAR_DUPLICATE_MIN_SIMILARITY', 0.85))
+# Máximo de títulos do cache carregados no índice de títulos resolvidos (montado na primeira busca
+# que não está no cache); os resolvidos durante a execução entram sempre
+TITLE_INDEX_MAX_TITLES = int(os.getenv('TITLE_INDEX_MAX_TITLES', 100000))
+# Depois de resolver a série, busca o IMDb ID de cada episódio (detalhes da temporada + IDs externos do episódio)
+SERIES_EPISODE_IDS = os.getenv('SERIES_EPISODE_IDS', 'true').lower() == 'true'
+# Por quanto tempo (em segundos) uma temporada buscada é considerada completa: até lá, um episódio
+# que não está nela não gera requisições (relevante nos modos servidor e de observação)
+SEASON_FRESH_SECONDS = int(os.getenv('SEASON_FRESH_SECONDS', 6 * 3600))
+REQUEST_TIMEOUT = 10  # Tempo limite de cada requisição (em segundos)
+DEFAULT_RETRY_AFTER = 30  # Pausa usada quando o 429 não informa o Retry-After
+
+# Configurações do controle de taxa adaptativo (AIMD), compartilhado por todas as requisições
+RATE_LIMIT_PER_SECOND = float(os.getenv('RATE_LIMIT_PER_SECOND', 40))  # Requisições por segundo permitidas pelo TMDb
+RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', 40))  # Requisições que podem ser feitas de uma vez após um período ocioso
+THROTTLE_MIN_RATE = 1  # Taxa mínima (req/s) após reduções por 429
+THROTTLE_DECREASE_FACTOR = 0.5  # Fator de redução da taxa a cada pausa por 429
+THROTTLE_INCREASE_STEP = 1  # Aumento aproximado da taxa (req/s) a cada segundo sem erros
+BACKOFF_BASE = 0.5  # Atraso base (em segundos) para novas tentativas após erros de conexão e 5xx
+BACKOFF_MAX = 30  # Atraso máximo (em segundos) entre novas tentativas
+
+# Configurações do modo assíncrono
+ASYNC_CONCURRENCY = 50  # Número máximo de requisições simultâneas
+
+# Número máximo de entradas em processamento simultâneo (limita o uso de memória)
+MAX_PENDING_ENTRIES = 500
@@ -1,47 +1,359 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
+import cProfile
 import os
+import pstats
 import sys
-from config.settings import DEFAULT_INPUT_FILE, DEFAULT_OUTPUT_FILE
+import zlib
+import requests
+from config.settings import (
+    DEFAULT_INPUT_FILE, DEFAULT_OUTPUT_FILE, ASYNC_CONCURRENCY, PARSE_WORKERS, CHECKPOINT_INTERVAL,
+    SERVER_HOST, SERVER_PORT, SERVER_MAX_JOBS, WATCH_INTERVAL
+)
 from src.parsers.m3u_parser import M3UParser
+from src.parsers.parallel_parser import ParallelM3UParser
+from src.parsers.remote_playlist import RemotePlaylist
 from src.utils.media_processor import MediaProcessor
-from src.utils.json_exporter import JSONExporter
+from src.utils.json_exporter import StreamingJSONExporter
+from src.utils.serialization import compression_for, require_compression, strip_compression
+from src.utils.multi_exporter import MultiExporter, ShardedExporter, SHARD_KEYS
+from src.utils.incremental import IncrementalManifest
+from src.utils.checkpoint import JobCheckpoint
+from src.server.watcher import PlaylistWatcher
 
 def main():
     # Configura os argumentos da linha de comando
     parser = argparse.ArgumentParser(description='Conversor de M3U para JSON com busca de IMDb IDs')
-    parser.add_argument('-i', '--input', help='Arquivo M3U de entrada', default=DEFAULT_INPUT_FILE)
-    parser.add_argument('-o', '--output', help='Arquivo JSON de saída', default=DEFAULT_OUTPUT_FILE)
+    parser.add_argument('-i', '--input', help='Arquivo M3U de entrada ou URL http(s)', default=DEFAULT_INPUT_FILE)
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT_FILE,
+                        help='Arquivo JSON de saída (.gz ou .zst para gravá-lo compactado)')
     parser.add_argument('-v', '--verbose', help='Modo verboso com logs detalhados', action='store_true')
     parser.add_argument('-t', '--test', help='Modo de teste com exemplo específico', action='store_true')
+    parser.add_argument('--refresh', help='Busca novamente as entradas do cache sem IMDb ID com validade expirada',
+                        action='store_true')
+    parser.add_argument('--incremental', help='Processa apenas as entradas novas ou alteradas desde a última execução',
+                        action='store_true')
+    parser.add_argument('--manifest', help='Arquivo de manifesto do modo incremental (padrão: <saída>.manifest.sqlite3)')
+    parser.add_argument('-f', '--format', choices=StreamingJSONExporter.FORMATS,
+                        help='Formato de saída: array JSON, NDJSON (um objeto por linha) ou M3U anotado '
+                             '(padrão: pela extensão da saída, ou json)')
+    parser.add_argument('--compact', help='Gera a saída sem indentação', action='store_true')
+    parser.add_argument('--ndjson', help='Também grava a saída em NDJSON neste arquivo')
+    parser.add_argument('--m3u', help='Também grava uma lista M3U anotada (IMDb ID no tvg-id) neste arquivo')
+    parser.add_argument('--shard-by', action='append', choices=sorted(SHARD_KEYS),
+                        help='Também grava um arquivo por tipo, idioma ou grupo (pode ser repetido)')
+    parser.add_argument('--shard-dir', help='Diretório das saídas particionadas (padrão: <saída>_partes)')
+    parser.add_argument('--shard-format', choices=StreamingJSONExporter.FORMATS, default='ndjson',
+                        help='Formato dos arquivos particionados (padrão: ndjson)')
+    parser.add_argument('--async', dest='use_async', help='Usa o cliente assíncrono com pool de conexões', action='store_true')
+    parser.add_argument('--concurrency', type=int, default=ASYNC_CONCURRENCY,
+                        help=f'Requisições simultâneas no modo assíncrono (padrão: {ASYNC_CONCURRENCY})')
+    parser.add_argument('--parse-workers', type=int, default=PARSE_WORKERS,
+                        help=f'Processos usados na análise do M3U (0 = um por núcleo, padrão: {PARSE_WORKERS})')
+    parser.add_argument('--offline-index', help='Índice offline gerado por build_offline_index.py '
+                        '(padrão: cache/offline_index.sqlite3, usado se existir)')
+    parser.add_argument('--job', help='Modo de tarefa retomável: salva o progresso em <saída>.checkpoint.json',
+                        action='store_true')
+    parser.add_argument('--resume', help='Continua a conversão a partir do último checkpoint (implica --job)',
+                        action='store_true')
+    parser.add_argument('--checkpoint-every', type=int, default=CHECKPOINT_INTERVAL,
+                        help=f'Entradas concluídas entre dois checkpoints (padrão: {CHECKPOINT_INTERVAL})')
+    parser.add_argument('--force', help='Converte a lista remota mesmo que ela não tenha mudado desde a última conversão',
+                        action='store_true')
+    parser.add_argument('--watch', help='Depois da conversão, converte a lista de novo sempre que o arquivo mudar',
+                        action='store_true')
+    parser.add_argument('--watch-interval', type=float, default=WATCH_INTERVAL,
+                        help=f'Segundos entre duas verificações do arquivo no modo --watch (padrão: {WATCH_INTERVAL:g})')
+    parser.add_argument('--serve', help='Inicia o servidor HTTP local de conversão (POST /convert)', action='store_true')
+    parser.add_argument('--host', default=SERVER_HOST, help=f'Endereço do servidor (padrão: {SERVER_HOST})')
+    parser.add_argument('--port', type=int, default=SERVER_PORT, help=f'Porta do servidor (padrão: {SERVER_PORT})')
+    parser.add_argument('--max-jobs', type=int, default=SERVER_MAX_JOBS,
+                        help=f'Conversões simultâneas no servidor (padrão: {SERVER_MAX_JOBS})')
+    parser.add_argument('--metrics', help='Salva o relatório de métricas da execução (JSON) neste arquivo')
+    parser.add_argument('--prometheus', help='Salva as métricas no formato texto do Prometheus neste arquivo')
+    parser.add_argument('--profile', nargs='?', const='profile.pstats',
+                        help='Executa com o cProfile e salva as estatísticas (padrão: profile.pstats)')
     args = parser.parse_args()
     
+    if args.offline_index and not os.path.exists(args.offline_index):
+        print(f"Erro: O índice offline '{args.offline_index}' não foi encontrado.")
+        sys.exit(1)
+    
+    args.format = args.format or StreamingJSONExporter.detect_format(args.output)
+    for output in (args.output, args.ndjson, args.m3u):
+        try:
+            require_compression(compression_for(output))
+        except ValueError as e:
+            print(f"Erro: {e}")
+            sys.exit(1)
+    
+    args.job = args.job or args.resume
+    if args.job and args.incremental:
+        print("Erro: O modo de tarefa retomável não pode ser combinado com o modo incremental.")
+        sys.exit(1)
+    if args.job and args.parse_workers != 1:
+        print("Erro: O modo de tarefa retomável usa a análise sequencial (--parse-workers 1).")
+        sys.exit(1)
+    if args.job and (args.ndjson or args.m3u or args.shard_by):
+        print("Erro: O modo de tarefa retomável grava apenas a saída principal (sem --ndjson, --m3u ou --shard-by).")
+        sys.exit(1)
+    if args.job and compression_for(args.output):
+        print("Erro: O modo de tarefa retomável não pode gravar uma saída compactada (.gz ou .zst).")
+        sys.exit(1)
+    if args.job and args.watch:
+        print("Erro: O modo de tarefa retomável não pode ser combinado com o modo de observação.")
+        sys.exit(1)
+    if RemotePlaylist.is_url(args.input) and (args.job or args.watch or args.parse_workers != 1):
+        print("Erro: Uma lista remota não pode ser usada com --job, --watch ou --parse-workers (requerem um arquivo local).")
+        sys.exit(1)
+    if args.serve and (args.job or args.incremental or args.watch or args.use_async):
+        print("Erro: O modo servidor não pode ser combinado com --job, --incremental, --watch ou --async.")
+        sys.exit(1)
+    
+    if args.profile:
+        run_profiled(args)
+    else:
+        run(args)
+
+def run(args):
+    """
+    Executa o modo escolhido nos argumentos da linha de comando
+    """
     # Modo de teste para verificar as melhorias
     if args.test:
         run_test_mode(args.verbose)
         return
     
+    # Modo de atualização do cache, sem processar nenhuma lista
+    if args.refresh:
+        media_processor = MediaProcessor(verbose=args.verbose, offline_index=args.offline_index)
+        checked, recovered = media_processor.refresh_expired()
+        print(f"\nAtualização concluída! {checked} entradas verificadas, {recovered} IMDb IDs encontrados.")
+        return
+    
+    # Modo servidor: as conversões chegam pela API HTTP
+    if args.serve:
+        run_server(args)
+        return
+    
     # Verifica se o arquivo de entrada existe
-    if not os.path.exists(args.input):
+    if not RemotePlaylist.is_url(args.input) and not os.path.exists(args.input):
         print(f"Erro: O arquivo de entrada '{args.input}' não foi encontrado.")
         sys.exit(1)
     
-    # Cria as instâncias das classes
-    m3u_parser = M3UParser()
-    media_processor = MediaProcessor(verbose=args.verbose)
+    media_processor = MediaProcessor(verbose=args.verbose, offline_index=args.offline_index)
+    convert(args, media_processor)
+    
+    # Modo de observação: o mesmo MediaProcessor (caches e sessão HTTP) atende as próximas conversões
+    if args.watch:
+        run_watch(args, media_processor)
+
+def convert(args, media_processor):
+    """
+    Converte o arquivo de entrada com o MediaProcessor informado e exibe o resumo
+    """
+    m3u_parser = M3UParser() if args.parse_workers == 1 else ParallelM3UParser(args.parse_workers)
+    metrics = media_processor.metrics
+    
+    # Lista remota: lida direto da conexão; se não mudou desde a última conversão, nada é feito
+    remote = None
+    if RemotePlaylist.is_url(args.input):
+        remote = RemotePlaylist(args.input, f"{args.output}.source.json")
+        try:
+            changed = remote.open(conditional=not args.force and os.path.exists(args.output))
+        except requests.RequestException as error:
+            print(f"Erro ao baixar a lista '{args.input}': {error}")
+            sys.exit(1)
+        if not changed:
+            print(f"A lista '{args.input}' não mudou desde a última conversão de '{args.output}'. Nada a fazer.")
+            return
+    
+    # Grava cada entrada no disco assim que é resolvida
+    exporter = StreamingJSONExporter(
+        args.output,
+        format=args.format,
+        indent=None if args.compact else 4
+    )
     
-    # Processa o arquivo M3U
+    # Saídas adicionais, gravadas na mesma passagem pelas entradas resolvidas
+    sinks = []
+    if args.ndjson:
+        sinks.append(StreamingJSONExporter(args.ndjson, format="ndjson"))
+    if args.m3u:
+        sinks.append(StreamingJSONExporter(args.m3u, format="m3u"))
+    shard_dir = args.shard_dir or f"{os.path.splitext(strip_compression(args.output))[0]}_partes"
+    for by in dict.fromkeys(args.shard_by or []):
+        sinks.append(ShardedExporter(shard_dir, by, format=args.shard_format, indent=None if args.compact else 4))
+    if sinks:
+        exporter = MultiExporter([exporter] + sinks)
+    
+    # No modo de tarefa, a leitura começa na posição do último checkpoint (ou no início)
+    checkpoint = None
+    if args.job:
+        checkpoint = JobCheckpoint(f"{args.output}.checkpoint.json", args.input, exporter,
+                                   media_processor.save_caches, args.checkpoint_every)
+        state = checkpoint.load() if args.resume else None
+        if state:
+            error = checkpoint.validate(state, exporter.format, exporter.indent)
+            if error:
+                print(f"Erro: {error} Execute sem --resume para recomeçar.")
+                sys.exit(1)
+            checkpoint.restore(state)
+            print(f"Retomando do checkpoint: {state['entries']} entradas concluídas, "
+                  f"{state['written']} já gravadas em '{exporter.partial_path}'.")
+    
+    # Analisa o arquivo M3U sob demanda, sem carregá-lo inteiro na memória
     print(f"Analisando o arquivo M3U: {args.input}")
-    entries = m3u_parser.parse_file(args.input)
-    print(f"Encontradas {len(entries)} entradas para processar.")
+    batches = entries = None
+    if checkpoint:
+        entries = checkpoint.track(m3u_parser.iter_positioned(args.input, checkpoint.offset))
+    elif remote:
+        # O parser consome a lista enquanto ela é baixada: as buscas começam antes do fim do download
+        entries = m3u_parser.iter_entries(remote.stream(), fingerprint=args.incremental)
+    elif args.incremental or args.use_async:
+        entries = m3u_parser.iter_entries(args.input, fingerprint=args.incremental)
+    else:
+        # Lotes colunares: as entradas respondidas pelo cache são gravadas sem criar um objeto por entrada
+        batches = metrics.timed_iter("parse", m3u_parser.iter_batches(args.input))
+    if entries is not None:
+        entries = metrics.timed_iter("parse", entries)
     
-    # Processa as entradas para buscar os IMDb IDs
-    processed_entries = media_processor.process_entries(entries)
+    # No modo incremental, as entradas inalteradas reaproveitam o resultado da execução anterior
+    manifest = None
+    if args.incremental:
+        manifest_path = args.manifest or f"{args.output}.manifest.sqlite3"
+        # O manifesto JSON das versões anteriores é lido uma vez e convertido
+        legacy_path = f"{args.output}.manifest.json"
+        previous_path = legacy_path if (not args.manifest and not os.path.exists(manifest_path)
+                                        and os.path.exists(legacy_path)) else None
+        manifest = IncrementalManifest(manifest_path, previous_path)
+        entries = manifest.prepare(entries)
+        exporter.on_write = manifest.record
     
-    # Exporta para JSON
-    count = JSONExporter.export_to_file(processed_entries, args.output)
+    # Processa as entradas para buscar os IMDb IDs conforme são lidas
+    on_collect = checkpoint.collected if checkpoint else None
+    try:
+        with exporter:
+            if batches is not None:
+                count = media_processor.process_batches(batches, exporter)
+            elif args.use_async:
+                count = asyncio.run(media_processor.process_entries_async(
+                    entries, args.concurrency, exporter=exporter, on_collect=on_collect
+                ))
+            else:
+                count = media_processor.process_entries(entries, exporter=exporter, on_collect=on_collect)
+    except (requests.RequestException, zlib.error, ValueError) as error:
+        if not remote:
+            raise
+        # A saída anterior é mantida; o que foi convertido fica no arquivo parcial
+        print(f"\nErro ao baixar a lista '{args.input}': {error}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        if checkpoint:
+            print(f"\nInterrompido. Use --resume para continuar do último checkpoint "
+                  f"({checkpoint.entries - checkpoint.since_save} entradas concluídas).")
+            sys.exit(130)
+        raise
+    
+    if checkpoint:
+        checkpoint.finish()
+    if remote:
+        remote.save_state()
     
     print(f"\nProcessamento concluído! {count} entradas foram salvas em '{args.output}'.")
+    if sinks:
+        for path, count, label in exporter.outputs()[1:]:
+            print(f"  {path}: {count} {label}")
+    if remote:
+        print(f"Lista remota: {remote.bytes_read / (1024 * 1024):.1f} MiB lidos de '{args.input}'.")
+    
+    if manifest:
+        manifest.save()
+        summary = manifest.summary()
+        print(f"Modo incremental: {summary['added']} adicionadas, {summary['changed']} alteradas, "
+              f"{summary['removed']} removidas, {summary['unchanged']} inalteradas.")
+    
+    if args.verbose:
+        stats = media_processor.throttle.stats()
+        print(f"Requisições ao TMDb: {stats['requests']} "
+              f"({stats['effective_requests_per_second']} req/s efetivas), "
+              f"respostas 429: {stats['throttled_responses']}, "
+              f"tempo pausado: {stats['throttled_seconds']}s")
+        lookup_stats = media_processor.lookup_stats()
+        print(f"Títulos resolvidos pela API: {lookup_stats['resolved_titles']} de {lookup_stats['api_lookups']} "
+              f"({lookup_stats['requests_per_resolved_title']} requisições por título), "
+              f"resolvidos pelo tvg-id: {lookup_stats['tvg_id_shortcuts']}, "
+              f"por títulos parecidos já resolvidos: {lookup_stats['near_duplicates']}")
+        if lookup_stats['episode_lookups']:
+            print(f"Episódios: {lookup_stats['episode_ids']} IMDb IDs encontrados "
+                  f"em {lookup_stats['episode_lookups']} buscas de episódios distintos")
+        if media_processor.offline_resolver:
+            offline_stats = media_processor.offline_resolver.stats()
+            print(f"Índice offline: {offline_stats['hits']} IMDb IDs, {offline_stats['partial_hits']} somente TMDb ID, "
+                  f"{offline_stats['ambiguous']} ambíguos, {offline_stats['misses']} não encontrados")
+        for label, cache in (("buscas", media_processor.search_cache),
+                             ("IDs externos", media_processor.external_ids_cache),
+                             ("temporadas", media_processor.season_cache)):
+            cache_stats = cache.stats()
+            print(f"Cache de {label}: {cache_stats['hits']} acertos, {cache_stats['misses']} falhas "
+                  f"(taxa de acerto {cache_stats['hit_rate']:.1%})")
+        for name, stage in metrics.report()["stages"].items():
+            print(f"Etapa {name}: {stage['wall_seconds']:.2f}s (CPU {stage['cpu_seconds']:.2f}s)")
+    
+    # Relatórios de métricas da execução
+    if args.metrics:
+        metrics.write_json(args.metrics, extra=media_processor.report_sections())
+        print(f"Relatório de métricas salvo em '{args.metrics}'.")
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus, extra=media_processor.report_sections())
+        print(f"Métricas no formato do Prometheus salvas em '{args.prometheus}'.")
+
+def run_server(args):
+    """
+    Executa o servidor HTTP de conversão até Ctrl+C
+    """
+    # Importado aqui para que os demais modos não carreguem o servidor
+    from src.server.http_server import ConversionServer
+    
+    media_processor = MediaProcessor(verbose=args.verbose, offline_index=args.offline_index, progress=False)
+    server = ConversionServer(media_processor, host=args.host, port=args.port, max_jobs=args.max_jobs)
+    print(f"Servidor de conversão em {server.base_url} (Ctrl+C para encerrar)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        stats = server.stats()
+        print(f"\nServidor encerrado. {stats['completed_jobs']} conversões concluídas, "
+              f"{stats['failed_jobs']} com erro, {stats['converted_entries']} entradas convertidas.")
+
+def run_watch(args, media_processor):
+    """
+    Converte o arquivo de entrada novamente sempre que ele mudar, até Ctrl+C
+    """
+    def on_change():
+        print(f"\nO arquivo '{args.input}' mudou. Convertendo novamente...")
+        convert(args, media_processor)
+    
+    watcher = PlaylistWatcher(args.input, on_change, args.watch_interval)
+    print(f"\nObservando '{args.input}' (verificação a cada {watcher.interval:g}s, Ctrl+C para encerrar)")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print(f"\nObservação encerrada. {watcher.changes} conversões feitas depois da primeira.")
+
+def run_profiled(args):
+    """
+    Executa com o cProfile, salvando as estatísticas e exibindo as funções mais custosas.
+    No modo síncrono só a thread principal é medida (as buscas aparecem como espera);
+    no modo assíncrono todo o processamento acontece nela
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(run, args)
+    finally:
+        profiler.dump_stats(args.profile)
+        print(f"\nPerfil salvo em '{args.profile}'. Funções com maior tempo acumulado:")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
 
 def run_test_mode(verbose):
     """
@@ -75,6 +387,7 @@ def run_test_mode(verbose):
         else:
             print(f"❌ Falha! IMDb ID não encontrado para: {name}")
     
+    client.close()
     print("\nTeste concluído.")
 
 if __name__ == "__main__":
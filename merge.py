@@ -1,66 +1,63 @@
-import json
-import sys
+import argparse
 import os
+import sys
+from src.utils.json_exporter import StreamingJSONExporter
+from src.utils.merger import StreamingMerger
+from src.utils.serialization import compression_for, require_compression
+
+# Entradas e saída usadas quando nenhum arquivo é informado
+DEFAULT_INPUT_FILES = ['output_first.json', 'output.json']
+DEFAULT_OUTPUT_FILE = 'all.json'
 
-def load_json_array(file_path):
+def parse_arguments():
     """
-    Carrega um arquivo JSON e retorna seu conteúdo como uma lista.
-    Verifica se o JSON é um array.
+    Analisa os argumentos da linha de comando
     """
-    if not os.path.exists(file_path):
-        print(f"Erro: O arquivo '{file_path}' não existe.")
-        sys.exit(1)
-    
+    parser = argparse.ArgumentParser(description='Mescla arquivos JSON/NDJSON gerados pelo conversor, removendo duplicatas')
+    parser.add_argument('inputs', nargs='*', default=DEFAULT_INPUT_FILES,
+                        help='Arquivos de entrada (array JSON ou NDJSON, compactados ou não)')
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT_FILE,
+                        help='Arquivo de saída (.gz ou .zst para gravá-lo compactado)')
+    parser.add_argument('-d', '--dedupe', choices=StreamingMerger.DEDUPE_KEYS, default='url',
+                        help='Chave de deduplicação: URL, (imdb_id, temporada, episódio) ou nenhuma')
+    parser.add_argument('-k', '--keep', choices=StreamingMerger.POLICIES, default='first',
+                        help='Qual ocorrência manter quando houver duplicatas')
+    parser.add_argument('-f', '--format', choices=StreamingJSONExporter.FORMATS,
+                        help='Formato do arquivo de saída (padrão: pela extensão, ou json)')
+    parser.add_argument('--compact', action='store_true', help='Gera JSON sem indentação')
+    parser.add_argument('--temp-dir', help='Diretório para o índice temporário de deduplicação')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+
+    for file_path in args.inputs:
+        if not os.path.exists(file_path):
+            print(f"Erro: O arquivo '{file_path}' não existe.")
+            sys.exit(1)
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-            if not isinstance(data, list):
-                print(f"Erro: O arquivo '{file_path}' não contém um array JSON.")
-                sys.exit(1)
-            print(f"Arquivo '{file_path}' carregado com sucesso. Contém {len(data)} elementos.")
-            return data
-    except json.JSONDecodeError as e:
-        print(f"Erro ao decodificar o JSON no arquivo '{file_path}': {e}")
-        sys.exit(1)
-    except Exception as e:
-        print(f"Erro ao ler o arquivo '{file_path}': {e}")
+        require_compression(compression_for(args.output))
+    except ValueError as e:
+        print(f"Erro: {e}")
         sys.exit(1)
+    args.format = args.format or StreamingJSONExporter.detect_format(args.output)
 
-def merge_json_arrays(json_array1, json_array2):
-    """
-    Mescla duas listas JSON.
-    """
-    merged = json_array1 + json_array2
-    print(f"Arrays mesclados com sucesso. Total de elementos: {len(merged)}.")
-    return merged
+    merger = StreamingMerger(dedupe=args.dedupe, keep=args.keep, temp_dir=args.temp_dir)
+    indent = None if args.compact else 4
 
-def save_json_array(data, output_path):
-    """
-    Salva uma lista como um arquivo JSON.
-    """
     try:
-        with open(output_path, 'w', encoding='utf-8') as file:
-            json.dump(data, file, ensure_ascii=False, indent=4)
-            print(f"Arquivo mesclado salvo como '{output_path}'.")
+        with StreamingJSONExporter(args.output, format=args.format, indent=indent) as exporter:
+            merger.merge(args.inputs, exporter)
+    except ValueError as e:
+        print(f"Erro ao decodificar o JSON: {e}")
+        sys.exit(1)
     except Exception as e:
-        print(f"Erro ao escrever no arquivo '{output_path}': {e}")
+        print(f"Erro ao mesclar os arquivos: {e}")
         sys.exit(1)
 
-def main():
-    # Caminhos dos arquivos
-    file1 = 'output_first.json'
-    file2 = 'output.json'
-    output_file = 'all.json'
-
-    # Carregar os arquivos JSON
-    json_array1 = load_json_array(file1)
-    json_array2 = load_json_array(file2)
-
-    # Mesclar os arrays JSON
-    merged_json_array = merge_json_arrays(json_array1, json_array2)
-
-    # Salvar o array JSON mesclado
-    save_json_array(merged_json_array, output_file)
+    print(f"{len(args.inputs)} arquivos mesclados. Lidos {merger.read} elementos, "
+          f"removidas {merger.read - merger.written} duplicatas.")
+    print(f"Arquivo mesclado salvo como '{args.output}'.")
 
 if __name__ == "__main__":
     main()
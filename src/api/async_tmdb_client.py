@@ -0,0 +1,380 @@
+import asyncio
+import time
+import aiohttp
+from src.api.tmdb_base import TMDbClientBase
+from src.utils.blocking import run_blocking
+from src.utils.title_matcher import TitleMatcher
+from config.settings import (
+    MAX_RETRIES, REQUEST_TIMEOUT, ASYNC_CONCURRENCY, PARALLEL_YEAR_SEARCH,
+    TITLE_MATCHING, MATCH_MIN_SIMILARITY,
+    TMDB_SEARCH_MOVIE, TMDB_SEARCH_TV,
+    TMDB_MOVIE_EXTERNAL_IDS, TMDB_TV_EXTERNAL_IDS,
+    TMDB_TV_SEASON, TMDB_TV_EPISODE_EXTERNAL_IDS,
+    DEFAULT_LANGUAGE
+)
+
+class AsyncTMDbClient(TMDbClientBase):
+    """
+    Cliente assíncrono para a API do TMDb.
+    
+    Mantém uma única sessão HTTP com pool de conexões (keep-alive), limita o número
+    de requisições simultâneas e passa todas as requisições pelo ThrottleController
+    (token bucket com pausa global e ajuste AIMD da taxa).
+    Os métodos de busca têm os mesmos nomes do TMDbClient, mas são corrotinas; as
+    consultas e gravações nos caches em SQLite são feitas fora do laço de eventos.
+    
+    Uso:
+        async with AsyncTMDbClient() as client:
+            imdb_id = await client.get_imdb_id("Shrek")
+    """
+    def __init__(self, api_key=None, bearer_token=None, verbose=False,
+                 concurrency=ASYNC_CONCURRENCY, throttle=None,
+                 search_cache=None, external_ids_cache=None, metrics=None, season_cache=None):
+        super().__init__(api_key, bearer_token, verbose, throttle, search_cache, external_ids_cache, metrics,
+                         season_cache)
+        self.concurrency = concurrency
+        self.session = None
+        self.semaphore = None
+        # Travas das temporadas no laço de eventos (as do TMDbClient são de threads)
+        self.season_async_locks = {}
+    
+    async def __aenter__(self):
+        await self.open()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close()
+    
+    async def open(self):
+        """
+        Cria a sessão HTTP com o pool de conexões
+        """
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+    
+    async def close(self):
+        """
+        Fecha a sessão HTTP e libera as conexões
+        """
+        if self.session:
+            await self.session.close()
+            self.session = None
+    
+    @staticmethod
+    async def _cache_call(cache, function, *args):
+        """
+        Chama um método do cache, fora do laço de eventos se o backend faz E/S
+        """
+        return await run_blocking(cache.backend.blocking, function, *args)
+    
+    async def make_request_with_retry(self, url, params=None, headers=None, max_retries=MAX_RETRIES):
+        """
+        Faz uma requisição com retry em caso de erro 429 (Too Many Requests),
+        erros de conexão e respostas 5xx, com as mesmas regras do TMDbClient
+        
+        Returns:
+            tuple: (Código de status, Corpo JSON) ou None se as tentativas se esgotarem
+        """
+        # O aiohttp não aceita parâmetros None (o requests simplesmente os omite)
+        if params:
+            params = {key: value for key, value in params.items() if value is not None}
+        
+        attempt = 0
+        while attempt < max_retries:
+            await self.throttle.before_request_async()
+            try:
+                async with self.semaphore:
+                    # A latência não inclui a espera pelo semáforo
+                    started = time.perf_counter()
+                    async with self.session.get(url, params=params, headers=headers) as response:
+                        status = response.status
+                        data = await response.json() if status == 200 else None
+                        retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._observe(url, started, "error")
+                self.throttle.on_error()
+                delay = self.throttle.backoff_delay(attempt)
+                if self.verbose:
+                    print(f"\nErro de conexão ({e}). Tentando novamente em {delay:.1f} segundos...")
+                self._retry(delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self._observe(url, started, status)
+            
+            if status == 429:
+                retry_after = self.throttle.parse_retry_after(retry_after)
+                if self.throttle.on_throttled(retry_after):
+                    print(f"\nRecebeu erro 429. Pausando as requisições por {retry_after} segundos...")
+                self._retry()
+                attempt += 1
+            elif status >= 500:
+                self.throttle.on_error()
+                delay = self.throttle.backoff_delay(attempt)
+                if self.verbose:
+                    print(f"\nErro {status} do servidor. Tentando novamente em {delay:.1f} segundos...")
+                self._retry(delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+            else:
+                self.throttle.on_success()
+                return status, data
+        print(f"\nMáximo de tentativas alcançado para a URL: {url}")
+        return None
+    
+    async def search_media(self, name, is_series=False, language=DEFAULT_LANGUAGE, year=None, results=None):
+        """
+        Procura por um filme ou série pelo nome
+        
+        Returns:
+            int: ID do TMDb se encontrado, None caso contrário
+        """
+        cache_key = self._search_cache_key(name, is_series, language, year)
+        if self.search_cache is not None:
+            tmdb_id = await self._cache_call(self.search_cache, self.search_cache.get, cache_key)
+            if tmdb_id is not None:
+                return tmdb_id
+        
+        if results is None:
+            results = await self._search_results(name, is_series, language, year)
+        if results:
+            tmdb_id = TitleMatcher.best_match([name], results, year)["id"]
+            if self.search_cache is not None:
+                await self._cache_call(self.search_cache, self.search_cache.set, cache_key, tmdb_id)
+            return tmdb_id
+        return None
+    
+    async def _search_results(self, name, is_series=False, language=DEFAULT_LANGUAGE, year=None):
+        """
+        Faz a requisição de busca e retorna a lista de resultados
+        
+        Returns:
+            list: Resultados da busca (vazia se nada for encontrado ou a requisição falhar)
+        """
+        search_url = TMDB_SEARCH_TV if is_series else TMDB_SEARCH_MOVIE
+        search_params = {"api_key": self.api_key, "query": name, "language": language}
+        
+        # Se tiver o ano, adiciona ao parâmetro de busca
+        if year:
+            search_params["year"] = year
+            
+        if self.verbose:
+            print(f"Buscando {'série' if is_series else 'filme'}: '{name}'{f' ({year})' if year else ''}")
+        
+        response = await self.make_request_with_retry(search_url, params=search_params)
+        
+        if response and response[0] == 200:
+            return response[1].get("results", [])
+        return []
+    
+    async def search_ranked(self, names, is_series=False, year=None, language=DEFAULT_LANGUAGE, searched=None):
+        """
+        Versão assíncrona de TMDbClient.search_ranked: uma única busca, com o
+        resultado escolhido pela similaridade do título, ano e popularidade
+        
+        Returns:
+            int: ID do TMDb se algum resultado for parecido o bastante, None caso contrário
+        """
+        cache_key = self._ranked_cache_key(names, is_series, language, year)
+        if self.search_cache is not None:
+            tmdb_id = await self._cache_call(self.search_cache, self.search_cache.get, cache_key)
+            if tmdb_id is not None:
+                return tmdb_id
+        
+        results = await self._search_results(names[-1], is_series, language)
+        if searched is not None:
+            searched[names[-1]] = results
+        best = TitleMatcher.best_match(names, results, year, MATCH_MIN_SIMILARITY)
+        if best is None:
+            if self.verbose and results:
+                print(f"Nenhum resultado parecido o bastante para: '{names[0]}'")
+            return None
+        
+        if self.search_cache is not None:
+            await self._cache_call(self.search_cache, self.search_cache.set, cache_key, best["id"])
+        return best["id"]
+    
+    async def get_external_ids(self, tmdb_id, is_series=False):
+        """
+        Obtém os IDs externos (como IMDb) para um filme ou série
+        """
+        if not tmdb_id:
+            return None
+        
+        cache_key = self._external_ids_cache_key(tmdb_id, is_series)
+        if self.external_ids_cache is not None:
+            imdb_id = await self._cache_call(self.external_ids_cache, self.external_ids_cache.get, cache_key)
+            if imdb_id is not None:
+                return imdb_id
+            
+        external_ids_url = TMDB_TV_EXTERNAL_IDS.format(tmdb_id=tmdb_id) if is_series else TMDB_MOVIE_EXTERNAL_IDS.format(tmdb_id=tmdb_id)
+        
+        headers = {
+            "Authorization": f"Bearer {self.bearer_token}",
+            "accept": "application/json"
+        }
+        
+        response = await self.make_request_with_retry(external_ids_url, headers=headers)
+        
+        if response and response[0] == 200:
+            imdb_id = response[1].get("imdb_id")
+            if imdb_id and self.external_ids_cache is not None:
+                await self._cache_call(self.external_ids_cache, self.external_ids_cache.set, cache_key, imdb_id)
+            return imdb_id
+        return None
+    
+    async def get_season_episodes(self, tmdb_id, season):
+        """
+        Versão assíncrona de TMDbClient.get_season_episodes
+        """
+        url = TMDB_TV_SEASON.format(tmdb_id=tmdb_id, season=season)
+        response = await self.make_request_with_retry(url, params={"api_key": self.api_key, "language": DEFAULT_LANGUAGE})
+        
+        if response is None:
+            return None
+        if response[0] == 404:
+            return []
+        if response[0] == 200:
+            return self._episode_numbers(response[1])
+        return None
+    
+    async def get_episode_external_ids(self, tmdb_id, season, episode):
+        """
+        Versão assíncrona de TMDbClient.get_episode_external_ids
+        """
+        url = TMDB_TV_EPISODE_EXTERNAL_IDS.format(tmdb_id=tmdb_id, season=season, episode=episode)
+        headers = {
+            "Authorization": f"Bearer {self.bearer_token}",
+            "accept": "application/json"
+        }
+        
+        response = await self.make_request_with_retry(url, headers=headers)
+        
+        if response and response[0] == 200:
+            return response[1].get("imdb_id") or ""
+        return None
+    
+    async def resolve_episode_id(self, tmdb_id, season, episode):
+        """
+        Versão assíncrona de TMDbClient.resolve_episode_id, com o mesmo cache de temporadas
+        """
+        if self.season_cache is None:
+            return await self.get_episode_external_ids(tmdb_id, season, episode) or None
+        
+        key = self._season_cache_key(tmdb_id, season)
+        lock = self.season_async_locks.get(key)
+        if lock is None:
+            lock = self.season_async_locks[key] = asyncio.Lock()
+        async with lock:
+            episodes = await self._cache_call(self.season_cache, self.season_cache.get, key)
+            if episodes is None:
+                numbers = await self.get_season_episodes(tmdb_id, season)
+                if numbers is None:
+                    return None
+                episodes = await self._cache_call(self.season_cache, self._store_season, key, numbers)
+        
+        known, imdb_id = self._cached_episode(key, episodes, episode)
+        if known:
+            return imdb_id
+        
+        imdb_id = await self.get_episode_external_ids(tmdb_id, season, episode)
+        if imdb_id is not None:
+            await self._cache_call(self.season_cache, self._store_episode, key, episode, imdb_id)
+        return imdb_id or None
+    
+    async def get_imdb_id(self, name, is_series=False):
+        """
+        Obtém o IMDb ID para um filme ou série, com as mesmas regras
+        especiais do TMDbClient (4K, ano no título e filmes com "1" no final)
+        """
+        return (await self.resolve_ids(name, is_series))[1]
+    
+    async def resolve_ids(self, name, is_series=False):
+        """
+        Obtém o TMDb ID e o IMDb ID para um filme ou série
+        
+        Returns:
+            tuple: (TMDb ID, IMDb ID), ou (None, None) se não encontrado
+        """
+        name_without_4k, has_4k = self._remove_4k(name)
+        clean_name, year = self._extract_year(name_without_4k)
+        
+        # Resultados das buscas sem ano já feitas, por nome buscado
+        searched = {}
+        if TITLE_MATCHING:
+            variants = [clean_name] if is_series else self._handle_part_one(clean_name)
+            tmdb_id = await self.search_ranked(variants, is_series, year, searched=searched)
+            imdb_id = await self.get_external_ids(tmdb_id, is_series) if tmdb_id else None
+            if imdb_id:
+                return tmdb_id, imdb_id
+        
+        if is_series:
+            return await self._search_with_alternatives(clean_name, is_series, year, searched)
+        
+        for variant in self._handle_part_one(clean_name):
+            tmdb_id, imdb_id = await self._search_with_alternatives(variant, is_series, year, searched)
+            if imdb_id:
+                if self.verbose and (variant != name or has_4k):
+                    print(f"Encontrado IMDb ID para '{variant}' em vez de '{name}'")
+                return tmdb_id, imdb_id
+                
+        if self.verbose:
+            print(f"IMDb ID não encontrado após tentar todas as alternativas para: {name}")
+        else:
+            print(f"IMDb ID não encontrado para: {name}")
+        return None, None
+    
+    async def resolve_tvg_id(self, tvg_id, is_series=False):
+        """
+        Resolve os IDs a partir do tvg-id, sem fazer nenhuma busca por nome
+        
+        Returns:
+            tuple: (TMDb ID, IMDb ID), ou None se o tvg-id não identifica o título
+        """
+        ids = self.parse_tvg_id(tvg_id)
+        if ids is None:
+            return None
+        tmdb_id, imdb_id = ids
+        if imdb_id is None:
+            imdb_id = await self.get_external_ids(tmdb_id, is_series)
+        return tmdb_id, imdb_id
+    
+    async def _search_with_alternatives(self, name, is_series=False, year=None, searched=None):
+        """
+        Busca usando diferentes alternativas (com ano, sem ano, etc)
+        
+        Returns:
+            tuple: (TMDb ID, IMDb ID) se encontrado, (None, None) caso contrário
+        """
+        # A busca ranqueada já fez a busca sem ano deste nome: os resultados são reaproveitados
+        previous = searched.get(name) if searched else None
+        # Com PARALLEL_YEAR_SEARCH, a busca sem ano é feita em paralelo; o resultado com ano tem prioridade
+        without_year = None
+        if year and PARALLEL_YEAR_SEARCH:
+            without_year = asyncio.ensure_future(self.search_media(name, is_series, results=previous))
+        
+        # Primeira tentativa: com nome e ano (se disponível)
+        if year:
+            tmdb_id = await self.search_media(name, is_series, year=year)
+            if tmdb_id:
+                imdb_id = await self.get_external_ids(tmdb_id, is_series)
+                if imdb_id:
+                    if self.verbose:
+                        print(f"Encontrado IMDb ID usando o ano {year} para: '{name}'")
+                    if without_year:
+                        # A busca sem ano não é mais necessária
+                        without_year.cancel()
+                    return tmdb_id, imdb_id
+        
+        # Segunda tentativa: só com o nome
+        tmdb_id = await without_year if without_year else await self.search_media(name, is_series, results=previous)
+        if tmdb_id:
+            imdb_id = await self.get_external_ids(tmdb_id, is_series)
+            if imdb_id:
+                return tmdb_id, imdb_id
+        elif self.verbose:
+            print(f"Não encontrado TMDb ID para: '{name}'")
+            
+        return None, None
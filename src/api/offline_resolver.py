@@ -0,0 +1,340 @@
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import threading
+from src.utils.text_cleaner import TextCleaner
+from config.settings import CACHE_DIR, OFFLINE_INDEX_FILE, OFFLINE_POPULARITY_RATIO
+
+# Tipos do title.basics do IMDb considerados filmes ou séries; os demais (episódios, curtas, jogos...) são ignorados
+_IMDB_TITLE_TYPES = {
+    "movie": "movie",
+    "tvMovie": "movie",
+    "tvSeries": "tv",
+    "tvMiniSeries": "tv",
+}
+
+# Valor nulo usado nos arquivos TSV do IMDb
+_IMDB_NULL = "\\N"
+
+def _open_dump(file_path):
+    """
+    Abre um dump em modo texto, descompactando se o arquivo terminar em .gz
+    """
+    if file_path.endswith(".gz"):
+        return gzip.open(file_path, 'rt', encoding='utf-8', newline='')
+    return open(file_path, 'r', encoding='utf-8', newline='')
+
+class OfflineIndexBuilder:
+    """
+    Constrói o índice offline de títulos a partir dos dumps públicos:
+
+    - IMDb title.basics.tsv.gz: IMDb ID, tipo, título principal/original e ano
+    - IMDb title.akas.tsv.gz (opcional): títulos regionais (ex: os nomes em português)
+    - TMDb movie_ids/tv_series_ids (NDJSON gzip): TMDb ID, título original e popularidade
+
+    Cada título é guardado normalizado com TextCleaner.normalize_title, que é a
+    mesma normalização usada nas chaves de busca do MediaProcessor.
+
+    Uso:
+        builder = OfflineIndexBuilder("cache/offline_index.sqlite3")
+        builder.import_imdb_basics("title.basics.tsv.gz")
+        builder.import_tmdb_ids("movie_ids_05_15_2024.json.gz", "movie")
+        builder.finish()
+    """
+    def __init__(self, file_path, batch_size=50000):
+        self.file_path = file_path
+        # O índice é montado em um arquivo temporário e só substitui o atual em finish()
+        self.temp_path = f"{file_path}.building"
+        self.batch_size = batch_size
+        self.counts = {}
+
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        self.connection = sqlite3.connect(self.temp_path)
+        self.connection.execute("PRAGMA journal_mode=OFF")
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.execute("""
+            CREATE TABLE titles (
+                title TEXT NOT NULL,
+                media_type TEXT NOT NULL,
+                year INTEGER,
+                imdb_id TEXT,
+                tmdb_id INTEGER,
+                popularity REAL
+            )
+        """)
+        # Títulos alternativos do IMDb, associados ao tipo e ano do title.basics em finish()
+        self.connection.execute("CREATE TABLE akas (imdb_id TEXT NOT NULL, title TEXT NOT NULL)")
+
+    def _insert_rows(self, table, columns, rows, source):
+        """
+        Insere as linhas em lotes e contabiliza quantas vieram de cada fonte
+        """
+        placeholders = ", ".join("?" for _ in columns)
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        batch = []
+        total = 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.connection.executemany(sql, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.connection.executemany(sql, batch)
+            total += len(batch)
+        self.connection.commit()
+        self.counts[source] = self.counts.get(source, 0) + total
+        return total
+
+    def import_imdb_basics(self, file_path, include_adult=False):
+        """
+        Importa o title.basics do IMDb (TSV, com ou sem gzip)
+
+        Returns:
+            int: Número de títulos inseridos
+        """
+        def rows():
+            with _open_dump(file_path) as file:
+                reader = csv.reader(file, delimiter='\t', quoting=csv.QUOTE_NONE)
+                header = next(reader, None)
+                if header is None:
+                    return
+                columns = {name: index for index, name in enumerate(header)}
+                for record in reader:
+                    media_type = _IMDB_TITLE_TYPES.get(record[columns["titleType"]])
+                    if media_type is None:
+                        continue
+                    if not include_adult and record[columns["isAdult"]] == "1":
+                        continue
+                    start_year = record[columns["startYear"]]
+                    year = int(start_year) if start_year != _IMDB_NULL else None
+                    imdb_id = record[columns["tconst"]]
+
+                    primary = TextCleaner.normalize_title(record[columns["primaryTitle"]])
+                    original = TextCleaner.normalize_title(record[columns["originalTitle"]])
+                    yield primary, media_type, year, imdb_id, None, None
+                    if original and original != primary:
+                        yield original, media_type, year, imdb_id, None, None
+
+        return self._insert_rows(
+            "titles", ("title", "media_type", "year", "imdb_id", "tmdb_id", "popularity"),
+            rows(), "imdb_basics"
+        )
+
+    def import_imdb_akas(self, file_path, regions=("BR",), languages=("pt",)):
+        """
+        Importa os títulos alternativos do IMDb das regiões ou idiomas informados
+
+        Returns:
+            int: Número de títulos alternativos inseridos
+        """
+        regions = set(regions or ())
+        languages = set(languages or ())
+
+        def rows():
+            with _open_dump(file_path) as file:
+                reader = csv.reader(file, delimiter='\t', quoting=csv.QUOTE_NONE)
+                header = next(reader, None)
+                if header is None:
+                    return
+                columns = {name: index for index, name in enumerate(header)}
+                for record in reader:
+                    if record[columns["region"]] not in regions and record[columns["language"]] not in languages:
+                        continue
+                    title = TextCleaner.normalize_title(record[columns["title"]])
+                    if title:
+                        yield record[columns["titleId"]], title
+
+        return self._insert_rows("akas", ("imdb_id", "title"), rows(), "imdb_akas")
+
+    def import_tmdb_ids(self, file_path, media_type, include_adult=False):
+        """
+        Importa um export diário de IDs do TMDb (NDJSON, com ou sem gzip)
+
+        Args:
+            file_path (str): Caminho do dump (movie_ids_*.json.gz ou tv_series_ids_*.json.gz)
+            media_type (str): "movie" ou "tv"
+
+        Returns:
+            int: Número de títulos inseridos
+        """
+        if media_type not in ("movie", "tv"):
+            raise ValueError(f"Tipo de mídia desconhecido: {media_type}")
+
+        def rows():
+            with _open_dump(file_path) as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if not include_adult and record.get("adult"):
+                        continue
+                    title = TextCleaner.normalize_title(record.get("original_title") or record.get("original_name") or "")
+                    if title:
+                        yield title, media_type, None, None, record["id"], record.get("popularity") or 0.0
+
+        return self._insert_rows(
+            "titles", ("title", "media_type", "year", "imdb_id", "tmdb_id", "popularity"),
+            rows(), f"tmdb_{media_type}"
+        )
+
+    def finish(self):
+        """
+        Associa os títulos alternativos, cria o índice de busca e substitui o
+        arquivo do índice de forma atômica
+
+        Returns:
+            dict: Número de registros importados por fonte
+        """
+        self.connection.execute("""
+            INSERT INTO titles (title, media_type, year, imdb_id, tmdb_id, popularity)
+            SELECT DISTINCT akas.title, basics.media_type, basics.year, akas.imdb_id, NULL, NULL
+            FROM akas
+            JOIN (SELECT DISTINCT imdb_id, media_type, year FROM titles WHERE imdb_id IS NOT NULL) AS basics
+                ON basics.imdb_id = akas.imdb_id
+        """)
+        self.connection.execute("DROP TABLE akas")
+        self.connection.execute("CREATE INDEX titles_lookup ON titles (title, media_type)")
+        self.connection.commit()
+        self.connection.execute("VACUUM")
+        self.connection.close()
+
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        os.replace(self.temp_path, self.file_path)
+        return dict(self.counts)
+
+class OfflineResolver:
+    """
+    Resolve títulos consultando o índice offline, sem nenhuma requisição.
+
+    Só responde quando a resposta não é ambígua: um único IMDb ID para o título
+    (desempatado pelo ano, quando houver) ou, sem IMDb ID, um único TMDb ID ou
+    um TMDb ID muito mais popular que os demais. Nos outros casos retorna None
+    e a entrada segue para a busca na API.
+    """
+    def __init__(self, file_path, popularity_ratio=OFFLINE_POPULARITY_RATIO):
+        self.file_path = file_path
+        self.popularity_ratio = popularity_ratio
+        # Somente leitura: uma conexão compartilhada entre as threads, protegida por um mutex
+        self.connection = sqlite3.connect(f"file:{file_path}?mode=ro", uri=True, check_same_thread=False)
+        self.mutex = threading.Lock()
+
+        self.hits = 0
+        self.partial_hits = 0
+        self.ambiguous = 0
+        self.misses = 0
+
+    @classmethod
+    def open_default(cls, file_path=None):
+        """
+        Abre o índice configurado, se ele existir
+
+        Returns:
+            OfflineResolver: O resolvedor, ou None se o índice não foi gerado
+        """
+        file_path = file_path or os.path.join(CACHE_DIR, OFFLINE_INDEX_FILE)
+        if not os.path.exists(file_path):
+            return None
+        return cls(file_path)
+
+    def _candidates(self, title, media_type):
+        with self.mutex:
+            return self.connection.execute(
+                "SELECT year, imdb_id, tmdb_id, popularity FROM titles WHERE title = ? AND media_type = ?",
+                (title, media_type)
+            ).fetchall()
+
+    @staticmethod
+    def _match_year(rows, year):
+        """
+        Filtra as linhas pelo ano exato e, se nenhuma bater, pelo ano vizinho
+        (lançamentos no fim do ano costumam aparecer com um ano de diferença)
+        """
+        exact = [row for row in rows if row[0] == year]
+        if exact:
+            return exact
+        return [row for row in rows if row[0] is not None and abs(row[0] - year) == 1]
+
+    def _pick(self, rows, year):
+        """
+        Escolhe a resposta entre os candidatos de um título
+
+        Returns:
+            tuple: (TMDb ID, IMDb ID), None se não houver candidatos,
+                ou False se os candidatos forem ambíguos
+        """
+        imdb_rows = [row for row in rows if row[1]]
+        if imdb_rows:
+            if year:
+                imdb_rows = self._match_year(imdb_rows, year)
+            imdb_ids = {row[1] for row in imdb_rows}
+            if len(imdb_ids) == 1:
+                return None, imdb_ids.pop()
+            if len(imdb_ids) > 1:
+                return False
+
+        # Os exports do TMDb não têm ano: decide pela unicidade ou pela popularidade
+        tmdb_rows = sorted({(row[3] or 0.0, row[2]) for row in rows if row[2]}, reverse=True)
+        if not tmdb_rows:
+            return None
+        if len(tmdb_rows) == 1 or tmdb_rows[0][0] >= tmdb_rows[1][0] * self.popularity_ratio > 0:
+            return tmdb_rows[0][1], None
+        return False
+
+    def lookup(self, lookup_key):
+        """
+        Procura um título no índice
+
+        Args:
+            lookup_key (tuple): Chave gerada por TextCleaner.lookup_key
+
+        Returns:
+            tuple: (TMDb ID, IMDb ID) com None no que o índice não informa,
+                ou None se o título não foi encontrado ou é ambíguo
+        """
+        title, is_series, year = lookup_key
+        media_type = "tv" if is_series else "movie"
+
+        # Mesma regra do TMDbClient para filmes terminados em " 1": tenta também sem o número
+        variants = [title]
+        if not is_series and title.endswith(" 1"):
+            variants.append(title[:-2].rstrip())
+
+        ambiguous = False
+        for variant in variants:
+            result = self._pick(self._candidates(variant, media_type), year)
+            if result:
+                with self.mutex:
+                    if result[1]:
+                        self.hits += 1
+                    else:
+                        self.partial_hits += 1
+                return result
+            ambiguous = ambiguous or result is False
+
+        with self.mutex:
+            if ambiguous:
+                self.ambiguous += 1
+            else:
+                self.misses += 1
+        return None
+
+    def stats(self):
+        """
+        Retorna os contadores de consultas ao índice
+        """
+        with self.mutex:
+            return {
+                "hits": self.hits,
+                "partial_hits": self.partial_hits,
+                "ambiguous": self.ambiguous,
+                "misses": self.misses,
+            }
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+
+class TokenBucket:
+    """
+    Limitador de taxa do tipo token bucket, compartilhado entre threads e corrotinas.
+    
+    Cada requisição consome um token; os tokens são repostos continuamente na taxa
+    configurada, até o limite da capacidade (rajada máxima).
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.mutex = threading.Lock()
+    
+    def _refill(self, now):
+        """
+        Repõe os tokens acumulados desde a última atualização
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def reserve(self):
+        """
+        Reserva um token e retorna quanto tempo (em segundos) é preciso esperar
+        antes de usá-lo. O saldo pode ficar negativo, formando uma fila justa.
+        """
+        with self.mutex:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.rate
+    
+    def set_rate(self, rate):
+        """
+        Altera a taxa de reposição, preservando os tokens já acumulados
+        """
+        with self.mutex:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+    
+    def acquire(self):
+        """
+        Aguarda (bloqueando a thread) até que um token esteja disponível
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+    
+    async def acquire_async(self):
+        """
+        Aguarda (sem bloquear o loop de eventos) até que um token esteja disponível
+        """
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
@@ -0,0 +1,142 @@
+import asyncio
+import random
+import threading
+import time
+from src.api.rate_limiter import TokenBucket
+from config.settings import (
+    RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST,
+    THROTTLE_MIN_RATE, THROTTLE_DECREASE_FACTOR, THROTTLE_INCREASE_STEP,
+    BACKOFF_BASE, BACKOFF_MAX, DEFAULT_RETRY_AFTER
+)
+
+class ThrottleController:
+    """
+    Controla a taxa de requisições de todos os clientes que o compartilham.
+    
+    - Ao receber um 429, pausa todas as requisições uma única vez pelo tempo do Retry-After
+      e reduz a taxa multiplicativamente (AIMD).
+    - A cada resposta bem-sucedida, aumenta a taxa aditivamente até o limite configurado.
+    - Calcula atrasos com jitter para novas tentativas após erros de conexão e 5xx.
+    """
+    def __init__(self, rate=RATE_LIMIT_PER_SECOND, burst=RATE_LIMIT_BURST,
+                 min_rate=THROTTLE_MIN_RATE, max_rate=None):
+        self.rate = float(rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate or rate)
+        self.bucket = TokenBucket(rate, burst)
+        self.mutex = threading.Lock()
+        # Momento (time.monotonic) até o qual todas as requisições ficam pausadas
+        self.paused_until = 0.0
+        
+        # Contadores exportados por stats()
+        self.started = time.monotonic()
+        self.requests = 0
+        self.successes = 0
+        self.throttled_responses = 0
+        self.throttled_time = 0.0
+        self.errors = 0
+    
+    def _pause_remaining(self):
+        """
+        Retorna quantos segundos faltam para o fim da pausa global
+        """
+        with self.mutex:
+            return self.paused_until - time.monotonic()
+    
+    def before_request(self):
+        """
+        Aguarda a pausa global (se houver) e um token do limitador de taxa
+        """
+        remaining = self._pause_remaining()
+        while remaining > 0:
+            time.sleep(remaining)
+            remaining = self._pause_remaining()
+        self.bucket.acquire()
+        with self.mutex:
+            self.requests += 1
+    
+    async def before_request_async(self):
+        """
+        Versão assíncrona de before_request
+        """
+        remaining = self._pause_remaining()
+        while remaining > 0:
+            await asyncio.sleep(remaining)
+            remaining = self._pause_remaining()
+        await self.bucket.acquire_async()
+        with self.mutex:
+            self.requests += 1
+    
+    def on_success(self):
+        """
+        Registra uma resposta bem-sucedida e aumenta a taxa aditivamente
+        """
+        with self.mutex:
+            self.successes += 1
+            if self.rate < self.max_rate:
+                # Incremento proporcional a 1/taxa: cerca de THROTTLE_INCREASE_STEP req/s a cada segundo
+                self.rate = min(self.max_rate, self.rate + THROTTLE_INCREASE_STEP / self.rate)
+                self.bucket.set_rate(self.rate)
+    
+    def on_throttled(self, retry_after):
+        """
+        Registra um 429: pausa todas as requisições pelo tempo do Retry-After e reduz a taxa.
+        Respostas 429 recebidas durante uma pausa já em andamento não a reiniciam.
+        
+        Returns:
+            bool: True se uma nova pausa foi iniciada
+        """
+        with self.mutex:
+            self.throttled_responses += 1
+            now = time.monotonic()
+            if now < self.paused_until:
+                return False
+            
+            self.paused_until = now + retry_after
+            self.throttled_time += retry_after
+            self.rate = max(self.min_rate, self.rate * THROTTLE_DECREASE_FACTOR)
+            self.bucket.set_rate(self.rate)
+            return True
+    
+    def on_error(self):
+        """
+        Registra um erro de conexão ou resposta 5xx
+        """
+        with self.mutex:
+            self.errors += 1
+    
+    @staticmethod
+    def parse_retry_after(value):
+        """
+        Converte o cabeçalho Retry-After em segundos, usando o padrão se ausente ou inválido
+        """
+        try:
+            return max(0, int(value))
+        except (TypeError, ValueError):
+            return DEFAULT_RETRY_AFTER
+    
+    @staticmethod
+    def backoff_delay(attempt):
+        """
+        Atraso exponencial com jitter completo para a tentativa informada (começando em 0)
+        """
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+    
+    def stats(self):
+        """
+        Retorna os contadores do controlador
+        
+        Returns:
+            dict: Requisições, respostas 429, tempo pausado e requisições por segundo efetivas
+        """
+        with self.mutex:
+            elapsed = time.monotonic() - self.started
+            return {
+                "requests": self.requests,
+                "successes": self.successes,
+                "throttled_responses": self.throttled_responses,
+                "throttled_seconds": round(self.throttled_time, 3),
+                "errors": self.errors,
+                "current_rate": round(self.rate, 3),
+                "effective_requests_per_second": round(self.requests / elapsed, 3) if elapsed > 0 else 0.0,
+            }
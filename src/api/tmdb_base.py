@@ -0,0 +1,235 @@
+import re
+import threading
+import time
+from src.api.throttle import ThrottleController
+from config.settings import (
+    API_KEY, BEARER_TOKEN, TMDB_SEARCH_MOVIE, TMDB_SEARCH_TV, SEASON_FRESH_SECONDS
+)
+
+# Formatos de tvg-id que já identificam o título: IMDb ("tt0126029") ou TMDb ("tmdb:808")
+_IMDB_ID_PATTERN = re.compile(r'^tt\d{7,}$')
+_TMDB_TVG_ID_PATTERN = re.compile(r'^tmdb[:-](\d+)$', re.IGNORECASE)
+
+class TMDbClientBase:
+    """
+    Estado e regras comuns aos clientes síncrono (TMDbClient) e assíncrono
+    (AsyncTMDbClient) do TMDb: credenciais, caches de segundo nível, controlador
+    de taxa, métricas, chaves de cache, tratamento do nome (4K, ano, "1" no final),
+    tvg-id e o cache de temporadas.
+
+    Não faz nenhuma requisição: cada cliente tem a sua própria camada HTTP.
+    """
+    def __init__(self, api_key=None, bearer_token=None, verbose=False, throttle=None,
+                 search_cache=None, external_ids_cache=None, metrics=None, season_cache=None):
+        self.api_key = api_key or API_KEY
+        self.bearer_token = bearer_token or BEARER_TOKEN
+        self.verbose = verbose
+        # Caches opcionais de segundo nível (PersistentLRUCache):
+        # busca -> TMDb ID e TMDb ID -> IMDb ID
+        self.search_cache = search_cache
+        self.external_ids_cache = external_ids_cache
+        # Cache opcional das temporadas: (série, temporada) -> episódios e seus IMDb IDs
+        self.season_cache = season_cache
+        # Protege as gravações no cache de temporadas
+        self.season_mutex = threading.Lock()
+        # Temporadas buscadas recentemente (chave -> momento da busca): um episódio
+        # fora delas não existe no TMDb
+        self.fresh_seasons = {}
+        # Controlador de taxa compartilhado entre todas as threads (e outros clientes, se informado)
+        self.throttle = throttle or ThrottleController()
+        # Coletor opcional de métricas (RunMetrics): latência por endpoint e retentativas
+        self.metrics = metrics
+    
+    @staticmethod
+    def _endpoint_label(url):
+        """
+        Nome do endpoint usado nas métricas (search_movie, search_tv, external_ids_movie,
+        external_ids_tv, season, external_ids_episode)
+        """
+        if url == TMDB_SEARCH_MOVIE:
+            return "search_movie"
+        if url == TMDB_SEARCH_TV:
+            return "search_tv"
+        if "/season/" in url:
+            return "external_ids_episode" if url.endswith("/external_ids") else "season"
+        return "external_ids_tv" if "/tv/" in url else "external_ids_movie"
+    
+    def _observe(self, url, started, status):
+        """
+        Registra a latência de uma requisição nas métricas, se houver
+        """
+        if self.metrics is not None:
+            self.metrics.observe_request(self._endpoint_label(url), time.perf_counter() - started, status)
+    
+    def _retry(self, delay=0.0):
+        """
+        Registra uma retentativa (e o tempo de backoff, se houver) nas métricas
+        """
+        if self.metrics is not None:
+            self.metrics.increment("retries_total")
+            self.metrics.increment("backoff_seconds_total", delay)
+    
+    @staticmethod
+    def _episode_numbers(season_details):
+        """
+        Números dos episódios na resposta dos detalhes de uma temporada
+        """
+        return [episode["episode_number"] for episode in season_details.get("episodes", [])
+                if episode.get("episode_number") is not None]
+    
+    def _cached_episode(self, key, episodes, episode):
+        """
+        Consulta o episódio na temporada em cache
+        
+        Returns:
+            tuple: (Booleano indicando se a resposta já é conhecida, IMDb ID ou None)
+        """
+        imdb_id = episodes.get(str(episode))
+        if imdb_id is not None:
+            return True, imdb_id or None
+        # Fora de uma temporada em cache há mais tempo, pode ser um episódio novo
+        fetched_at = self.fresh_seasons.get(key)
+        if str(episode) not in episodes and fetched_at and time.monotonic() - fetched_at < SEASON_FRESH_SECONDS:
+            return True, None
+        return False, None
+    
+    def cached_episode_id(self, tmdb_id, season, episode):
+        """
+        Responde o IMDb ID de um episódio só com o cache de temporadas, sem requisições
+        
+        Returns:
+            tuple: (Booleano indicando se a resposta já é conhecida, IMDb ID ou None)
+        """
+        if self.season_cache is None:
+            return False, None
+        key = self._season_cache_key(tmdb_id, season)
+        episodes = self.season_cache.get(key)
+        if episodes is None:
+            return False, None
+        return self._cached_episode(key, episodes, episode)
+    
+    def _store_season(self, key, numbers):
+        """
+        Grava no cache os episódios de uma temporada, mantendo os IMDb IDs já conhecidos
+        
+        No cache, cada episódio aponta para o seu IMDb ID, "" se o TMDb não tem o
+        IMDb ID ou None se os IDs externos do episódio ainda não foram buscados
+        """
+        with self.season_mutex:
+            known = self.season_cache.get(key) or {}
+            episodes = {str(number): known.get(str(number)) for number in numbers}
+            self.season_cache.set(key, episodes)
+            self.fresh_seasons[key] = time.monotonic()
+        return episodes
+    
+    def _store_episode(self, key, episode, imdb_id):
+        """
+        Grava o IMDb ID de um episódio na temporada em cache (copiando o dicionário,
+        que pode estar sendo lido por outras threads)
+        """
+        with self.season_mutex:
+            episodes = dict(self.season_cache.get(key) or {})
+            episodes[str(episode)] = imdb_id
+            self.season_cache.set(key, episodes)
+    
+    @staticmethod
+    def _season_cache_key(tmdb_id, season):
+        """
+        Chave do cache de temporadas (TMDb ID da série e número da temporada)
+        """
+        return f"tv|{tmdb_id}|{season}"
+    
+    @staticmethod
+    def _search_cache_key(name, is_series, language, year):
+        """
+        Chave do cache de buscas (consulta -> TMDb ID)
+        """
+        return f"{'tv' if is_series else 'movie'}|{language}|{year or ''}|{name}"
+    
+    @staticmethod
+    def _ranked_cache_key(names, is_series, language, year):
+        """
+        Chave do cache de buscas ranqueadas (variantes e ano esperado -> TMDb ID)
+        """
+        return f"ranked|{'tv' if is_series else 'movie'}|{language}|{year or ''}|{'|'.join(names)}"
+    
+    @staticmethod
+    def _external_ids_cache_key(tmdb_id, is_series):
+        """
+        Chave do cache de IDs externos (TMDb ID -> IMDb ID)
+        """
+        return f"{'tv' if is_series else 'movie'}|{tmdb_id}"
+    
+    def _extract_year(self, name):
+        """
+        Extrai o ano do nome usando regex
+        
+        Args:
+            name (str): Nome do filme ou série
+            
+        Returns:
+            tuple: (Nome sem o ano, Ano extraído ou None)
+        """
+        # Procura por padrão de ano (1900-2099)
+        year_match = re.search(r'(19\d{2}|20\d{2})', name)
+        if year_match:
+            year = int(year_match.group(1))
+            # Remove o ano do nome
+            clean_name = re.sub(r'\s*(19\d{2}|20\d{2})\s*', '', name).strip()
+            if self.verbose:
+                print(f"Detectado ano {year} no título: '{name}' -> '{clean_name}'")
+            return clean_name, year
+        return name, None
+    
+    def _handle_part_one(self, name):
+        """
+        Trata nomes que terminam com número 1
+        
+        Args:
+            name (str): Nome do filme
+            
+        Returns:
+            list: Lista de nomes alternativos para tentar
+        """
+        # Verifica se termina com " 1" ou similar
+        if re.search(r'\s+1$', name):
+            base_name = re.sub(r'\s+1$', '', name).strip()
+            if self.verbose:
+                print(f"Detectado filme parte 1: '{name}' -> Tentando também '{base_name}'")
+            return [name, base_name]  # Tenta primeiro com o 1, depois sem
+        return [name]  # Se não se aplica a regra, retorna só o nome original
+    
+    def _remove_4k(self, name):
+        """
+        Remove o sufixo 4K do nome do filme
+        
+        Args:
+            name (str): Nome do filme
+            
+        Returns:
+            tuple: (Nome sem 4K, Booleano indicando se a remoção ocorreu)
+        """
+        # Verifica se termina com " 4K" ou similar
+        if re.search(r'\s+4K$', name, re.IGNORECASE):
+            clean_name = re.sub(r'\s+4K$', '', name, flags=re.IGNORECASE).strip()
+            if self.verbose:
+                print(f"Detectado filme em 4K: '{name}' -> '{clean_name}'")
+            return clean_name, True
+        return name, False
+    
+    @staticmethod
+    def parse_tvg_id(tvg_id):
+        """
+        Interpreta o tvg-id da lista quando ele já identifica o título
+        
+        Returns:
+            tuple: (TMDb ID, IMDb ID), com None no que não foi informado,
+                ou None se o tvg-id não estiver em um formato reconhecido
+        """
+        tvg_id = (tvg_id or "").strip()
+        if _IMDB_ID_PATTERN.match(tvg_id):
+            return None, tvg_id
+        match = _TMDB_TVG_ID_PATTERN.match(tvg_id)
+        if match:
+            return int(match.group(1)), None
+        return None
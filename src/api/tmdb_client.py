@@ -1,40 +1,90 @@
 import requests
+import threading
 import time
-import re
+from concurrent.futures import ThreadPoolExecutor
+from src.api.tmdb_base import TMDbClientBase
+from src.utils.title_matcher import TitleMatcher
 from config.settings import (
-    API_KEY, BEARER_TOKEN, MAX_RETRIES, 
+    MAX_RETRIES, REQUEST_TIMEOUT, MAX_WORKERS, PARALLEL_YEAR_SEARCH,
+    TITLE_MATCHING, MATCH_MIN_SIMILARITY,
     TMDB_SEARCH_MOVIE, TMDB_SEARCH_TV,
     TMDB_MOVIE_EXTERNAL_IDS, TMDB_TV_EXTERNAL_IDS,
+    TMDB_TV_SEASON, TMDB_TV_EPISODE_EXTERNAL_IDS,
     DEFAULT_LANGUAGE
 )
 
-class TMDbClient:
+class TMDbClient(TMDbClientBase):
     """
     Cliente para a API do TMDb (The Movie Database)
     """
-    def __init__(self, api_key=None, bearer_token=None, verbose=False):
-        self.api_key = api_key or API_KEY
-        self.bearer_token = bearer_token or BEARER_TOKEN
-        self.verbose = verbose
+    def __init__(self, api_key=None, bearer_token=None, verbose=False, throttle=None,
+                 search_cache=None, external_ids_cache=None, metrics=None, season_cache=None):
+        super().__init__(api_key, bearer_token, verbose, throttle, search_cache, external_ids_cache, metrics,
+                         season_cache)
+        # Uma trava por temporada, para que os episódios da mesma temporada a busquem uma única vez
+        self.season_locks = {}
+        # Sessão reutiliza as conexões (keep-alive) entre as requisições
+        self.session = requests.Session()
+        # Executor para as buscas com e sem ano feitas em paralelo (PARALLEL_YEAR_SEARCH)
+        self.search_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS) if PARALLEL_YEAR_SEARCH else None
+    
+    def close(self):
+        """
+        Encerra o executor das buscas em paralelo e fecha a sessão HTTP
+        """
+        if self.search_executor:
+            # As buscas especulativas ainda na fila são descartadas
+            self.search_executor.shutdown(wait=True, cancel_futures=True)
+            self.search_executor = None
+        self.session.close()
         
     def make_request_with_retry(self, url, params=None, headers=None, max_retries=MAX_RETRIES):
         """
-        Faz uma requisição com retry em caso de erro 429 (Too Many Requests)
+        Faz uma requisição com retry em caso de erro 429 (Too Many Requests),
+        erros de conexão e respostas 5xx.
+        
+        Um 429 pausa todas as requisições que compartilham o ThrottleController,
+        enquanto erros de conexão e 5xx são repetidos com backoff exponencial e jitter.
         """
         attempt = 0
         while attempt < max_retries:
-            response = requests.get(url, params=params, headers=headers)
+            self.throttle.before_request()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+            except requests.RequestException as e:
+                self._observe(url, started, "error")
+                self.throttle.on_error()
+                delay = self.throttle.backoff_delay(attempt)
+                if self.verbose:
+                    print(f"\nErro de conexão ({e}). Tentando novamente em {delay:.1f} segundos...")
+                self._retry(delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._observe(url, started, response.status_code)
+                
             if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", 30))
-                print(f"\nRecebeu erro 429. Esperando {retry_after} segundos antes de tentar novamente...")
-                time.sleep(retry_after)
+                retry_after = self.throttle.parse_retry_after(response.headers.get("Retry-After"))
+                if self.throttle.on_throttled(retry_after):
+                    print(f"\nRecebeu erro 429. Pausando as requisições por {retry_after} segundos...")
+                self._retry()
+                attempt += 1
+            elif response.status_code >= 500:
+                self.throttle.on_error()
+                delay = self.throttle.backoff_delay(attempt)
+                if self.verbose:
+                    print(f"\nErro {response.status_code} do servidor. Tentando novamente em {delay:.1f} segundos...")
+                self._retry(delay)
+                time.sleep(delay)
                 attempt += 1
             else:
+                self.throttle.on_success()
                 return response
         print(f"\nMáximo de tentativas alcançado para a URL: {url}")
         return None
     
-    def search_media(self, name, is_series=False, language=DEFAULT_LANGUAGE, year=None):
+    def search_media(self, name, is_series=False, language=DEFAULT_LANGUAGE, year=None, results=None):
         """
         Procura por um filme ou série pelo nome
         
@@ -43,10 +93,36 @@ class TMDbClient:
             is_series (bool): Se é uma série ou não
             language (str): Idioma da busca
             year (int, optional): Ano de lançamento, se disponível
+            results (list, optional): Resultados já obtidos para a mesma consulta; evitam
+                repetir a requisição
             
         Returns:
             int: ID do TMDb se encontrado, None caso contrário
         """
+        cache_key = self._search_cache_key(name, is_series, language, year)
+        if self.search_cache is not None:
+            tmdb_id = self.search_cache.get(cache_key)
+            if tmdb_id is not None:
+                return tmdb_id
+        
+        if results is None:
+            results = self._search_results(name, is_series, language, year)
+        if results:
+            # Em vez de aceitar o primeiro resultado às cegas, escolhe o mais parecido com o nome
+            tmdb_id = TitleMatcher.best_match([name], results, year)["id"]
+            # Só os resultados encontrados são guardados; as falhas expiram no cache principal
+            if self.search_cache is not None:
+                self.search_cache.set(cache_key, tmdb_id)
+            return tmdb_id
+        return None
+    
+    def _search_results(self, name, is_series=False, language=DEFAULT_LANGUAGE, year=None):
+        """
+        Faz a requisição de busca e retorna a lista de resultados
+        
+        Returns:
+            list: Resultados da busca (vazia se nada for encontrado ou a requisição falhar)
+        """
         search_url = TMDB_SEARCH_TV if is_series else TMDB_SEARCH_MOVIE
         search_params = {"api_key": self.api_key, "query": name, "language": language}
         
@@ -60,10 +136,42 @@ class TMDbClient:
         response = self.make_request_with_retry(search_url, params=search_params)
         
         if response and response.status_code == 200:
-            results = response.json().get("results", [])
-            if results:
-                return results[0]["id"]
-        return None
+            return response.json().get("results", [])
+        return []
+    
+    def search_ranked(self, names, is_series=False, year=None, language=DEFAULT_LANGUAGE, searched=None):
+        """
+        Faz uma única busca (sem filtro de ano) e escolhe o resultado pela similaridade
+        com qualquer uma das variantes do nome, pela proximidade do ano e pela popularidade
+        
+        Args:
+            names (list): Variantes do nome; a última (a mais curta) é usada na busca
+            is_series (bool): Se é uma série ou não
+            year (int, optional): Ano esperado, usado apenas na pontuação
+            searched (dict, optional): Recebe os resultados da busca, pelo nome buscado,
+                para que a busca sem ano de _search_with_alternatives não seja repetida
+            
+        Returns:
+            int: ID do TMDb se algum resultado for parecido o bastante, None caso contrário
+        """
+        cache_key = self._ranked_cache_key(names, is_series, language, year)
+        if self.search_cache is not None:
+            tmdb_id = self.search_cache.get(cache_key)
+            if tmdb_id is not None:
+                return tmdb_id
+        
+        results = self._search_results(names[-1], is_series, language)
+        if searched is not None:
+            searched[names[-1]] = results
+        best = TitleMatcher.best_match(names, results, year, MATCH_MIN_SIMILARITY)
+        if best is None:
+            if self.verbose and results:
+                print(f"Nenhum resultado parecido o bastante para: '{names[0]}'")
+            return None
+        
+        if self.search_cache is not None:
+            self.search_cache.set(cache_key, best["id"])
+        return best["id"]
     
     def get_external_ids(self, tmdb_id, is_series=False):
         """
@@ -71,6 +179,13 @@ class TMDbClient:
         """
         if not tmdb_id:
             return None
+        
+        # Variações do mesmo título costumam levar ao mesmo TMDb ID
+        cache_key = self._external_ids_cache_key(tmdb_id, is_series)
+        if self.external_ids_cache is not None:
+            imdb_id = self.external_ids_cache.get(cache_key)
+            if imdb_id is not None:
+                return imdb_id
             
         external_ids_url = TMDB_TV_EXTERNAL_IDS.format(tmdb_id=tmdb_id) if is_series else TMDB_MOVIE_EXTERNAL_IDS.format(tmdb_id=tmdb_id)
         
@@ -82,65 +197,93 @@ class TMDbClient:
         response = self.make_request_with_retry(external_ids_url, headers=headers)
         
         if response and response.status_code == 200:
-            return response.json().get("imdb_id")
+            imdb_id = response.json().get("imdb_id")
+            if imdb_id and self.external_ids_cache is not None:
+                self.external_ids_cache.set(cache_key, imdb_id)
+            return imdb_id
         return None
     
-    def _extract_year(self, name):
+    def get_season_episodes(self, tmdb_id, season):
         """
-        Extrai o ano do nome usando regex
+        Obtém os números dos episódios de uma temporada (detalhes da temporada)
         
-        Args:
-            name (str): Nome do filme ou série
-            
         Returns:
-            tuple: (Nome sem o ano, Ano extraído ou None)
-        """
-        # Procura por padrão de ano (1900-2099)
-        year_match = re.search(r'(19\d{2}|20\d{2})', name)
-        if year_match:
-            year = int(year_match.group(1))
-            # Remove o ano do nome
-            clean_name = re.sub(r'\s*(19\d{2}|20\d{2})\s*', '', name).strip()
-            if self.verbose:
-                print(f"Detectado ano {year} no título: '{name}' -> '{clean_name}'")
-            return clean_name, year
-        return name, None
+            list: Números dos episódios (vazia se a temporada não existe no TMDb),
+                ou None se a requisição falhar
+        """
+        url = TMDB_TV_SEASON.format(tmdb_id=tmdb_id, season=season)
+        response = self.make_request_with_retry(url, params={"api_key": self.api_key, "language": DEFAULT_LANGUAGE})
+        
+        if response is None:
+            return None
+        if response.status_code == 404:
+            return []
+        if response.status_code == 200:
+            return self._episode_numbers(response.json())
+        return None
     
-    def _handle_part_one(self, name):
+    def get_episode_external_ids(self, tmdb_id, season, episode):
         """
-        Trata nomes que terminam com número 1
+        Obtém o IMDb ID de um episódio
         
-        Args:
-            name (str): Nome do filme
-            
         Returns:
-            list: Lista de nomes alternativos para tentar
-        """
-        # Verifica se termina com " 1" ou similar
-        if re.search(r'\s+1$', name):
-            base_name = re.sub(r'\s+1$', '', name).strip()
-            if self.verbose:
-                print(f"Detectado filme parte 1: '{name}' -> Tentando também '{base_name}'")
-            return [name, base_name]  # Tenta primeiro com o 1, depois sem
-        return [name]  # Se não se aplica a regra, retorna só o nome original
+            str: IMDb ID, "" se o episódio existe mas não tem IMDb ID,
+                ou None se o episódio não existe ou a requisição falhar
+        """
+        url = TMDB_TV_EPISODE_EXTERNAL_IDS.format(tmdb_id=tmdb_id, season=season, episode=episode)
+        headers = {
+            "Authorization": f"Bearer {self.bearer_token}",
+            "accept": "application/json"
+        }
+        
+        response = self.make_request_with_retry(url, headers=headers)
+        
+        if response and response.status_code == 200:
+            return response.json().get("imdb_id") or ""
+        return None
     
-    def _remove_4k(self, name):
+    def resolve_episode_id(self, tmdb_id, season, episode):
         """
-        Remove o sufixo 4K do nome do filme
+        Obtém o IMDb ID de um episódio a partir do TMDb ID da série
+        
+        A primeira consulta de uma temporada busca os seus detalhes (uma requisição)
+        e guarda a lista de episódios no cache de temporadas; cada episódio custa uma
+        requisição de IDs externos apenas na primeira vez. Um episódio novo, que ainda
+        não estava na temporada em cache, custa só a sua própria requisição.
         
-        Args:
-            name (str): Nome do filme
-            
         Returns:
-            tuple: (Nome sem 4K, Booleano indicando se a remoção ocorreu)
-        """
-        # Verifica se termina com " 4K" ou similar
-        if re.search(r'\s+4K$', name, re.IGNORECASE):
-            clean_name = re.sub(r'\s+4K$', '', name, flags=re.IGNORECASE).strip()
-            if self.verbose:
-                print(f"Detectado filme em 4K: '{name}' -> '{clean_name}'")
-            return clean_name, True
-        return name, False
+            str: IMDb ID do episódio, ou None se não encontrado
+        """
+        if self.season_cache is None:
+            return self.get_episode_external_ids(tmdb_id, season, episode) or None
+        
+        key = self._season_cache_key(tmdb_id, season)
+        with self._season_lock(key):
+            episodes = self.season_cache.get(key)
+            if episodes is None:
+                numbers = self.get_season_episodes(tmdb_id, season)
+                if numbers is None:
+                    return None
+                episodes = self._store_season(key, numbers)
+        
+        known, imdb_id = self._cached_episode(key, episodes, episode)
+        if known:
+            return imdb_id
+        
+        imdb_id = self.get_episode_external_ids(tmdb_id, season, episode)
+        if imdb_id is not None:
+            self._store_episode(key, episode, imdb_id)
+        return imdb_id or None
+    
+    def _season_lock(self, key):
+        """
+        Trava da temporada, criada na primeira vez que é pedida
+        """
+        with self.season_mutex:
+            lock = self.season_locks.get(key)
+            if lock is None:
+                lock = self.season_locks[key] = threading.Lock()
+            return lock
     
     def get_imdb_id(self, name, is_series=False):
         """
@@ -148,34 +291,71 @@ class TMDbClient:
         tratando casos especiais como filmes com "1" no final,
         filmes com anos no título e filmes com "4K" no final.
         """
+        return self.resolve_ids(name, is_series)[1]
+    
+    def resolve_tvg_id(self, tvg_id, is_series=False):
+        """
+        Resolve os IDs a partir do tvg-id, sem fazer nenhuma busca por nome:
+        um IMDb ID não custa nenhuma requisição e um TMDb ID custa no máximo
+        uma (IDs externos, que também passam pelo cache)
+        
+        Returns:
+            tuple: (TMDb ID, IMDb ID), ou None se o tvg-id não identifica o título
+        """
+        ids = self.parse_tvg_id(tvg_id)
+        if ids is None:
+            return None
+        tmdb_id, imdb_id = ids
+        if imdb_id is None:
+            imdb_id = self.get_external_ids(tmdb_id, is_series)
+        return tmdb_id, imdb_id
+    
+    def resolve_ids(self, name, is_series=False):
+        """
+        Obtém o TMDb ID e o IMDb ID para um filme ou série, com as mesmas
+        regras especiais de get_imdb_id
+        
+        Returns:
+            tuple: (TMDb ID, IMDb ID), ou (None, None) se não encontrado
+        """
         # Primeiro remove o 4K, se presente
         name_without_4k, has_4k = self._remove_4k(name)
         
         # Extrai o ano se presente
         clean_name, year = self._extract_year(name_without_4k)
         
+        # Uma busca ranqueada costuma resolver o título sem tentar cada variante
+        # Resultados das buscas sem ano já feitas, por nome buscado
+        searched = {}
+        if TITLE_MATCHING:
+            variants = [clean_name] if is_series else self._handle_part_one(clean_name)
+            tmdb_id = self.search_ranked(variants, is_series, year, searched=searched)
+            imdb_id = self.get_external_ids(tmdb_id, is_series) if tmdb_id else None
+            if imdb_id:
+                return tmdb_id, imdb_id
+        
         # Se for série, não aplica as regras especiais
         if is_series:
-            return self._search_with_alternatives(clean_name, is_series, year)
+            return self._search_with_alternatives(clean_name, is_series, year, searched)
         
         # Para filmes, trata casos especiais
         name_variants = self._handle_part_one(clean_name)
         
         # Tenta cada variante do nome
         for variant in name_variants:
-            imdb_id = self._search_with_alternatives(variant, is_series, year)
+            tmdb_id, imdb_id = self._search_with_alternatives(variant, is_series, year, searched)
             if imdb_id:
                 if self.verbose and (variant != name or has_4k):
                     print(f"Encontrado IMDb ID para '{variant}' em vez de '{name}'")
-                return imdb_id
+                return tmdb_id, imdb_id
                 
         if self.verbose:
             print(f"IMDb ID não encontrado após tentar todas as alternativas para: {name}")
         else:
             print(f"IMDb ID não encontrado para: {name}")
-        return None
+        return None, None
     
-    def _search_with_alternatives(self, name, is_series=False, year=None):
+    def _search_with_alternatives(self, name, is_series=False, year=None, searched=None):
         """
         Busca usando diferentes alternativas (com ano, sem ano, etc)
         
@@ -183,10 +363,20 @@ class TMDbClient:
             name (str): Nome a ser buscado
             is_series (bool): Se é série ou filme
             year (int, optional): Ano para filtrar, se disponível
+            searched (dict, optional): Resultados das buscas sem ano já feitas por search_ranked
             
         Returns:
-            str: IMDb ID se encontrado, None caso contrário
+            tuple: (TMDb ID, IMDb ID) se encontrado, (None, None) caso contrário
         """
+        # A busca ranqueada já fez a busca sem ano deste nome: os resultados são reaproveitados
+        previous = searched.get(name) if searched else None
+        # Com PARALLEL_YEAR_SEARCH, a busca sem ano é disparada em paralelo para não somar mais
+        # uma ida e volta caso a primeira falhe; o resultado com ano continua tendo prioridade.
+        # Sem ele, a busca sem ano só é feita depois que a busca com ano falhar
+        without_year = None
+        if year and self.search_executor:
+            without_year = self.search_executor.submit(self.search_media, name, is_series, results=previous)
+        
         # Primeira tentativa: com nome e ano (se disponível)
         if year:
             tmdb_id = self.search_media(name, is_series, year=year)
@@ -195,23 +385,26 @@ class TMDbClient:
                 if imdb_id:
                     if self.verbose:
                         print(f"Encontrado IMDb ID usando o ano {year} para: '{name}'")
-                    return imdb_id
+                    if without_year:
+                        # Descarta a busca sem ano se ela ainda não começou
+                        without_year.cancel()
+                    return tmdb_id, imdb_id
                 elif self.verbose:
                     print(f"Encontrado TMDb ID, mas sem IMDb ID correspondente para: '{name}' (ano {year})")
             elif self.verbose:
                 print(f"Não encontrado TMDb ID usando o ano {year} para: '{name}'")
         
         # Segunda tentativa: só com o nome
-        tmdb_id = self.search_media(name, is_series)
+        tmdb_id = without_year.result() if without_year else self.search_media(name, is_series, results=previous)
         if tmdb_id:
             imdb_id = self.get_external_ids(tmdb_id, is_series)
             if imdb_id:
                 if self.verbose and year:
                     print(f"Encontrado IMDb ID sem usar o ano para: '{name}'")
-                return imdb_id
+                return tmdb_id, imdb_id
             elif self.verbose:
                 print(f"Encontrado TMDb ID, mas sem IMDb ID correspondente para: '{name}'")
         elif self.verbose:
             print(f"Não encontrado TMDb ID para: '{name}'")
             
-        return None 
\ No newline at end of file
+        return None, None
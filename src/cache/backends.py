@@ -0,0 +1,399 @@
+import itertools
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import weakref
+from array import array
+from src.utils import serialization
+from src.utils.serialization import msgpack
+from config.settings import CACHE_FORMAT
+
+# Formatos do arquivo de cache: JSON indentado (original), JSON compacto, msgpack e
+# binário com prefixo de tamanho
+CACHE_FORMATS = ("json", "compact", "msgpack", "binary")
+
+# Formato binário: assinatura, número de chaves e tamanho do bloco de chaves, as chaves
+# (array JSON), o tamanho de cada valor (uint32) e os valores (JSON) concatenados
+_BINARY_MAGIC = b"M3UCACHE\x01"
+_BINARY_HEADER = struct.Struct("<QQ")
+
+def detect_cache_format(head):
+    """
+    Detecta o formato de um arquivo de cache pelos primeiros bytes
+
+    Returns:
+        str: "json" (indentado), "compact", "msgpack", "binary" ou None (arquivo vazio)
+    """
+    head = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if not head:
+        return None
+    if head.startswith(_BINARY_MAGIC):
+        return "binary"
+    # Um mapa msgpack começa com fixmap (0x80-0x8f), map16 (0xde) ou map32 (0xdf)
+    if 0x80 <= head[0] <= 0x8f or head[0] in (0xde, 0xdf):
+        return "msgpack"
+    # O JSON indentado tem uma quebra de linha logo depois da chave de abertura
+    return "json" if head[1:2] in (b"\n", b"\r") else "compact"
+
+def read_cache_file(file_path):
+    """
+    Carrega um arquivo de cache em qualquer um dos formatos, detectado pelo conteúdo.
+    No formato binário, os valores são devolvidos ainda codificados (bytes com o JSON)
+    e só são decodificados quando lidos
+
+    Returns:
+        tuple: (Formato detectado, Dicionário chave -> valor)
+
+    Raises:
+        FileNotFoundError: O arquivo não existe
+        ValueError: Conteúdo inválido para o formato detectado
+        RuntimeError: Arquivo msgpack sem o pacote msgpack instalado
+    """
+    with open(file_path, 'rb') as file:
+        content = file.read()
+
+    format = detect_cache_format(content[:64])
+    if format is None:
+        return None, {}
+    if format == "binary":
+        return format, _decode_binary(content)
+    if format == "msgpack":
+        if msgpack is None:
+            raise RuntimeError(f"O cache '{file_path}' está no formato msgpack; instale o pacote msgpack.")
+        data = msgpack.unpackb(content, raw=False, strict_map_key=False)
+    else:
+        data = serialization.loads(content)
+    if not isinstance(data, dict):
+        raise ValueError("O cache não é um objeto JSON")
+    return format, data
+
+def _decode_binary(content):
+    """
+    Separa as chaves e os valores (ainda codificados) de um cache no formato binário
+    """
+    try:
+        count, keys_size = _BINARY_HEADER.unpack_from(content, len(_BINARY_MAGIC))
+    except struct.error:
+        raise ValueError("Cabeçalho do cache binário incompleto")
+    position = len(_BINARY_MAGIC) + _BINARY_HEADER.size
+    keys = serialization.loads(content[position:position + keys_size])
+    position += keys_size
+
+    sizes = array("I")
+    sizes.frombytes(content[position:position + 4 * count])
+    if sys.byteorder == "big":
+        sizes.byteswap()
+    position += 4 * count
+    if len(keys) != count or len(sizes) != count or position + sum(sizes) != len(content):
+        raise ValueError("Cache binário truncado ou corrompido")
+
+    values = []
+    for size in sizes:
+        values.append(content[position:position + size])
+        position += size
+    return dict(zip(keys, values))
+
+def _encode_binary(data):
+    """
+    Serializa o cache no formato binário. Valores ainda codificados (carregados de um
+    arquivo binário e não alterados) são copiados sem passar pelo JSON
+    """
+    values = [value if isinstance(value, bytes) else serialization.dumps_bytes(value)
+              for value in data.values()]
+    keys = serialization.dumps_bytes(list(data))
+    sizes = array("I", map(len, values))
+    if sys.byteorder == "big":
+        sizes.byteswap()
+    return b"".join((_BINARY_MAGIC, _BINARY_HEADER.pack(len(values), len(keys)), keys, sizes.tobytes(), *values))
+
+def _decoded(value):
+    return serialization.loads(value) if isinstance(value, bytes) else value
+
+def check_cache_format(format):
+    """
+    Verifica se o formato de cache é conhecido e pode ser usado neste ambiente
+
+    Raises:
+        ValueError: Formato desconhecido ou msgpack não instalado
+    """
+    if format not in CACHE_FORMATS:
+        raise ValueError(f"Formato de cache desconhecido: {format}")
+    if format == "msgpack" and msgpack is None:
+        raise ValueError("O formato de cache msgpack requer o pacote msgpack (pip install msgpack).")
+
+class JSONCacheBackend:
+    """
+    Backend que mantém o cache inteiro em memória e regrava o arquivo completo a
+    cada flush.
+
+    O arquivo é gravado no formato configurado (JSON indentado, como o cache_ids.json
+    original, JSON compacto, msgpack ou binário) e lido em qualquer um deles: o formato
+    é detectado pelo conteúdo, então trocar CACHE_FORMAT converte o cache existente no
+    próximo salvamento. No formato binário, cada valor só é decodificado quando lido.
+
+    As leituras não usam trava: cada registro é substituído inteiro em set(), e o
+    flush grava uma cópia do dicionário feita de uma só vez. Um flush sem alterações
+    desde o anterior (e sem conversão de formato pendente) não regrava o arquivo.
+    """
+    # get() e set() só acessam a memória (o cliente assíncrono os chama direto no laço de eventos)
+    blocking = False
+    
+    def __init__(self, file_path, format=CACHE_FORMAT):
+        check_cache_format(format)
+        self.file_path = file_path
+        self.format = format
+        # Formato em que o arquivo estava ao ser carregado
+        self.loaded_format = None
+        self.data = self._load()
+        # Versão dos dados em memória (incrementada a cada set) e a última gravada no disco
+        self.versions = itertools.count(1)
+        self.version = 0
+        self.flushed_version = 0 if self.loaded_format in (self.format, None) else None
+        # Impede que dois flushes escrevam o arquivo temporário ao mesmo tempo
+        self.write_mutex = threading.Lock()
+    
+    def _load(self):
+        """
+        Carrega o cache do disco
+        """
+        try:
+            self.loaded_format, data = read_cache_file(self.file_path)
+            print(f"Carregando cache existente de: {self.file_path}")
+            return data
+        except FileNotFoundError:
+            print(f"Arquivo de cache não encontrado em: {self.file_path}. Criando novo cache.")
+            return {}
+        except ValueError:
+            print(f"Erro ao decodificar o arquivo de cache: {self.file_path}. Criando novo cache.")
+            # Faz backup do arquivo corrompido
+            if os.path.exists(self.file_path):
+                backup_file = f"{self.file_path}.bak.{int(time.time())}"
+                try:
+                    os.rename(self.file_path, backup_file)
+                    print(f"Backup do cache corrompido criado em: {backup_file}")
+                except Exception as e:
+                    print(f"Não foi possível criar backup do cache corrompido: {str(e)}")
+            return {}
+    
+    def contains(self, key):
+        return key in self.data
+    
+    def get(self, key, default=None):
+        # Valores do arquivo binário ficam codificados até serem lidos
+        return _decoded(self.data.get(key, default))
+    
+    def set(self, key, value):
+        self.data[key] = value
+        # next() em itertools.count é atômico: duas escritas simultâneas recebem versões distintas
+        self.version = next(self.versions)
+    
+    def items(self):
+        # Cópia para permitir escritas concorrentes durante a iteração
+        return [(key, _decoded(value)) for key, value in list(self.data.items())]
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def _encode(self, snapshot):
+        """
+        Serializa o cache no formato configurado
+        """
+        if self.format == "binary":
+            return _encode_binary(snapshot)
+        snapshot = {key: _decoded(value) for key, value in snapshot.items()}
+        if self.format == "msgpack":
+            return msgpack.packb(snapshot, use_bin_type=True)
+        return serialization.dumps_bytes(snapshot, indent=self.format == "json")
+    
+    def flush(self):
+        """
+        Salva o cache no disco de forma atômica (arquivo temporário + rename)
+        """
+        with self.write_mutex:
+            # A versão é lida antes da cópia: uma escrita feita durante a cópia
+            # deixa o cache marcado como alterado para o próximo flush
+            version = self.version
+            if version == self.flushed_version:
+                return
+            # A cópia é feita sem travar as escritas; a serialização acontece sobre ela
+            snapshot = dict(self.data)
+            temp_file = f"{self.file_path}.temp"
+            try:
+                with open(temp_file, 'wb') as file:
+                    file.write(self._encode(snapshot))
+                
+                # Em sistemas Unix, rename é atômico
+                os.replace(temp_file, self.file_path)
+                self.flushed_version = version
+            except Exception:
+                # Tenta remover o arquivo temporário em caso de falha
+                if os.path.exists(temp_file):
+                    try:
+                        os.remove(temp_file)
+                    except OSError:
+                        pass
+                raise
+    
+    def close(self):
+        self.flush()
+
+class SQLiteCacheBackend:
+    """
+    Backend em SQLite (modo WAL) com escritas incrementais.
+    
+    As leituras consultam o índice da chave primária sob demanda, sem carregar o
+    cache inteiro; as escritas ficam em um buffer e são gravadas em lote no flush.
+    Na primeira abertura, importa o conteúdo do cache JSON antigo (em qualquer um dos
+    formatos de arquivo), se existir.
+    
+    As leituras não usam trava: cada thread tem a sua conexão de leitura (o modo WAL
+    permite ler enquanto o lote é gravado), e o lote em gravação continua visível até
+    o commit, então uma chave nunca some entre o buffer e o banco.
+    """
+    _MISSING = object()
+    # get() consulta o banco (o cliente assíncrono o chama fora do laço de eventos)
+    blocking = True
+    
+    def __init__(self, file_path, json_file=None, table="cache"):
+        self.file_path = file_path
+        self.table = table
+        # Protege a troca do buffer de escritas; write_mutex serializa os flushes
+        self.mutex = threading.Lock()
+        self.write_mutex = threading.Lock()
+        # Escritas ainda não gravadas no banco (chave -> valor) e o lote sendo gravado
+        self.pending = {}
+        self.flushing = {}
+        # Conexões de leitura, uma por thread; a de uma thread encerrada é descartada com ela
+        self.local = threading.local()
+        self.readers = weakref.WeakKeyDictionary()
+        
+        self.connection = sqlite3.connect(file_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self.connection.commit()
+        
+        if json_file and len(self) == 0 and os.path.exists(json_file):
+            self._migrate_from_json(json_file)
+    
+    def _migrate_from_json(self, json_file):
+        """
+        Importa de uma só vez o conteúdo do cache JSON antigo
+        """
+        try:
+            data = read_cache_file(json_file)[1]
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"Não foi possível migrar o cache JSON '{json_file}': {str(e)}")
+            return
+        
+        with self.write_mutex, self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)",
+                ((key, serialization.dumps(_decoded(value))) for key, value in data.items())
+            )
+        print(f"Cache migrado de '{json_file}' para '{self.file_path}' ({len(data)} chaves).")
+    
+    def _reader(self):
+        """
+        Conexão de leitura da thread atual (criada no primeiro uso)
+        """
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.file_path, check_same_thread=False)
+            connection.execute("PRAGMA query_only=ON")
+            # Com mmap, as conexões novas leem as páginas já carregadas pelo sistema, sem aquecer um cache próprio
+            connection.execute("PRAGMA mmap_size=268435456")
+            self.local.connection = connection
+            with self.mutex:
+                self.readers[threading.current_thread()] = connection
+        return connection
+    
+    def _select(self, key):
+        """
+        Busca a linha da chave no banco, considerando as escritas pendentes e o lote em gravação
+        
+        Returns:
+            tuple: (Booleano indicando se a chave existe, Valor)
+        """
+        # O flush troca pending por um dicionário novo antes de esvaziar flushing,
+        # então consultar nesta ordem sempre encontra a escrita mais recente
+        value = self.pending.get(key, self._MISSING)
+        if value is self._MISSING:
+            value = self.flushing.get(key, self._MISSING)
+        if value is not self._MISSING:
+            return True, value
+        
+        row = self._reader().execute(
+            f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return False, None
+        return True, serialization.loads(row[0])
+    
+    def contains(self, key):
+        return self._select(key)[0]
+    
+    def get(self, key, default=None):
+        found, value = self._select(key)
+        return value if found else default
+    
+    def set(self, key, value):
+        with self.mutex:
+            self.pending[key] = value
+    
+    def items(self):
+        # Percorre o cursor sem carregar a tabela inteira (quem para antes não lê o resto)
+        self.flush()
+        for key, value in self._reader().execute(f"SELECT key, value FROM {self.table}"):
+            yield key, serialization.loads(value)
+    
+    def __len__(self):
+        with self.mutex:
+            unsaved = set(self.pending) | set(self.flushing)
+        reader = self._reader()
+        count = reader.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        return count + sum(1 for key in unsaved if not self._exists_in_db(reader, key))
+    
+    def _exists_in_db(self, reader, key):
+        return reader.execute(
+            f"SELECT 1 FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone() is not None
+    
+    def flush(self):
+        """
+        Grava as escritas pendentes em uma única transação
+        """
+        with self.write_mutex:
+            with self.mutex:
+                if not self.pending:
+                    return
+                # O lote continua visível para as leituras (em flushing) até o commit
+                self.flushing, self.pending = self.pending, {}
+            batch = self.flushing
+            try:
+                with self.connection:
+                    self.connection.executemany(
+                        f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)",
+                        ((key, serialization.dumps(value)) for key, value in batch.items())
+                    )
+            except Exception:
+                # Devolve o lote ao buffer para a próxima tentativa
+                with self.mutex:
+                    batch.update(self.pending)
+                    self.pending = batch
+                    self.flushing = {}
+                raise
+            self.flushing = {}
+    
+    def close(self):
+        self.flush()
+        with self.mutex:
+            for reader in list(self.readers.values()):
+                reader.close()
+            self.readers.clear()
+            self.connection.close()
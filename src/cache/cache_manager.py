@@ -1,15 +1,28 @@
-import json
 import os
-import threading
 import time
-from config.settings import CACHE_FILE, CACHE_DIR
+from src.cache.backends import JSONCacheBackend, SQLiteCacheBackend
+from src.cache.writer import CacheWriter
+from config.settings import (
+    CACHE_FILE, CACHE_DIR, CACHE_BACKEND, CACHE_FORMAT, CACHE_SQLITE_FILE,
+    CACHE_POSITIVE_TTL, CACHE_NEGATIVE_TTL, DEFAULT_LANGUAGE
+)
 
 class CacheManager:
     """
-    Classe para gerenciar o cache de IDs do TMDb para IMDb
+    Classe para gerenciar o cache de IDs do TMDb para IMDb.
+    
+    As leituras vão direto ao backend, sem trava: cada registro é gravado inteiro
+    e substituído de uma só vez, então uma leitura nunca vê um registro pela metade.
+    As escritas alteram apenas a memória e são gravadas no disco pela thread de
+    gravação (CacheWriter), em lotes de save_interval alterações ou no máximo
+    CACHE_FLUSH_INTERVAL segundos depois; close() grava o que estiver pendente.
     """
-    def __init__(self, cache_file=None, save_interval=10):
+    def __init__(self, cache_file=None, save_interval=10, backend=None,
+                 positive_ttl=CACHE_POSITIVE_TTL, negative_ttl=CACHE_NEGATIVE_TTL, cache_format=None,
+                 writer=None):
         self.cache_file = cache_file or CACHE_FILE
+        # Formato em que o backend "json" grava o arquivo (a leitura detecta o formato)
+        self.cache_format = cache_format or CACHE_FORMAT
         
         # Garante que o diretório de cache existe
         os.makedirs(CACHE_DIR, exist_ok=True)
@@ -18,108 +31,168 @@ class CacheManager:
         if not os.path.dirname(self.cache_file):
             self.cache_file = os.path.join(CACHE_DIR, self.cache_file)
             
-        # Carrega o cache existente (se houver)
-        self.ids = self._load_cache()
+        # Carrega o cache existente (se houver) no backend configurado
+        self.backend = self._create_backend(backend or CACHE_BACKEND)
             
-        # Mutex para garantir acesso exclusivo durante a escrita
-        self.mutex = threading.Lock()
-        # Contador de alterações não salvas
-        self.changes = 0
         # Intervalo de salvamento (número de alterações)
         self.save_interval = save_interval
-        # Timestamp da última salvagem
-        self.last_save = time.time()
-        # Tempo máximo entre salvamentos (em segundos)
-        self.max_time_between_saves = 30
+        # Thread de gravação, compartilhada com os outros caches (ex: MediaProcessor)
+        # ou própria deste cache, encerrada em close()
+        self.owns_writer = writer is None
+        self.writer = writer or CacheWriter()
+        self.writer.register(self.backend, save_interval, os.path.basename(self.cache_file))
+        # Validade (em segundos) dos registros encontrados e não encontrados; 0 = nunca expira
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
     
-    def _load_cache(self):
-        """
-        Carrega o cache do disco
-        """
-        try:
-            with open(self.cache_file, 'r', encoding='utf-8') as file:
-                print(f"Carregando cache existente de: {self.cache_file}")
-                return json.load(file)
-        except FileNotFoundError:
-            print(f"Arquivo de cache não encontrado em: {self.cache_file}. Criando novo cache.")
-            return {}
-        except json.JSONDecodeError:
-            print(f"Erro ao decodificar o arquivo de cache: {self.cache_file}. Criando novo cache.")
-            # Faz backup do arquivo corrompido
-            if os.path.exists(self.cache_file):
-                backup_file = f"{self.cache_file}.bak.{int(time.time())}"
-                try:
-                    os.rename(self.cache_file, backup_file)
-                    print(f"Backup do cache corrompido criado em: {backup_file}")
-                except Exception as e:
-                    print(f"Não foi possível criar backup do cache corrompido: {str(e)}")
-            return {}
+    def _create_backend(self, name):
+        """
+        Cria o backend de armazenamento do cache
+        
+        Args:
+            name (str): "json" (arquivo único, no formato cache_format) ou "sqlite" (banco SQLite em modo WAL)
+        """
+        if name == "json":
+            return JSONCacheBackend(self.cache_file, format=self.cache_format)
+        if name == "sqlite":
+            sqlite_file = CACHE_SQLITE_FILE
+            if not os.path.dirname(sqlite_file):
+                sqlite_file = os.path.join(CACHE_DIR, sqlite_file)
+            # Na primeira execução, o conteúdo do cache em arquivo é migrado para o SQLite
+            return SQLiteCacheBackend(sqlite_file, json_file=self.cache_file)
+        raise ValueError(f"Backend de cache desconhecido: {name}")
     
     def save_cache(self, force=False):
         """
-        Salva o cache no disco com proteção de mutex
-        Se force=False, só salva se atingir o limite de alterações ou tempo
-        """
-        current_time = time.time()
-        time_since_last_save = current_time - self.last_save
+        Salva o cache no disco pela thread de gravação
         
-        # Salva apenas se for forçado, ou se atingir o limite de alterações, 
-        # ou se passou tempo suficiente desde a última salvagem
-        if not force and self.changes < self.save_interval and time_since_last_save < self.max_time_between_saves:
-            return
-            
-        with self.mutex:
-            # Primeiro salvamos em um arquivo temporário, depois fazemos o rename
-            # para evitar corrupção em caso de falha durante a escrita
-            temp_file = f"{self.cache_file}.temp"
-            try:
-                with open(temp_file, 'w', encoding='utf-8') as file:
-                    json.dump(self.ids, file, indent=4, ensure_ascii=False)
-                
-                # Em sistemas Unix, rename é atômico
-                if os.path.exists(temp_file):
-                    os.replace(temp_file, self.cache_file)
-                
-                # Reseta o contador e atualiza o timestamp
-                self.changes = 0
-                self.last_save = current_time
-            except Exception as e:
-                print(f"Erro ao salvar cache: {str(e)}")
-                # Tenta remover o arquivo temporário em caso de falha
-                if os.path.exists(temp_file):
-                    try:
-                        os.remove(temp_file)
-                    except:
-                        pass
+        Args:
+            force (bool): Espera a gravação terminar (ex: antes de um checkpoint);
+                sem force, só antecipa a gravação, sem esperar
+        """
+        self.writer.flush(self.backend, wait=force)
+    
+    def close(self):
+        """
+        Grava as alterações pendentes e fecha o backend
+        """
+        if self.owns_writer:
+            self.writer.close()
+        else:
+            self.writer.flush(self.backend)
+        self.backend.close()
     
     def get_id(self, name):
         """
         Obtém o ID do cache
         """
-        return self.ids.get(name)
+        return self.backend.get(name)
     
     def set_id(self, name, imdb_id):
         """
-        Define o ID no cache e incrementa o contador de alterações
+        Define o ID no cache e avisa a thread de gravação
         """
-        with self.mutex:
-            self.ids[name] = imdb_id
-            self.changes += 1
-            
-        # Tenta salvar o cache (só salvará se atingir o limite ou o tempo)
-        self.save_cache()
+        self.backend.set(name, imdb_id)
+        self.writer.notify(self.backend)
     
     def has_id(self, name):
         """
         Verifica se o nome está no cache
         """
-        return name in self.ids
+        return self.backend.contains(name)
+        
+    @staticmethod
+    def make_key(normalized_name, is_series=False, year=None, language=DEFAULT_LANGUAGE):
+        """
+        Gera a chave de um registro do cache. Filmes e séries com o mesmo nome
+        (ou o mesmo título em anos diferentes) ficam em chaves distintas.
         
-    def __del__(self):
+        Ex: ("shrek", False, 2001, "pt-br") -> "movie|2001|pt-br|shrek"
+        """
+        media_type = "tv" if is_series else "movie"
+        return f"{media_type}|{year or ''}|{language}|{normalized_name}"
+    
+    def get_record(self, key, legacy_name=None):
+        """
+        Obtém o registro completo de uma chave, mesmo que esteja expirado
+        
+        Args:
+            key (str): Chave gerada por make_key
+            legacy_name (str, optional): Nome usado como chave no formato antigo
+                (nome -> IMDb ID), consultado quando o registro não existe
+            
+        Returns:
+            dict: Registro com name, is_series, year, language, tmdb_id, imdb_id,
+                created_at e checked_at, ou None se não existir
+        """
+        record = self.backend.get(key)
+        if record is not None:
+            return record
+        
+        # Entradas antigas não têm data de verificação: as encontradas continuam válidas
+        # e as não encontradas são consideradas expiradas para serem buscadas novamente
+        if legacy_name is not None and self.backend.contains(legacy_name):
+            return {
+                "name": legacy_name,
+                "tmdb_id": None,
+                "imdb_id": self.backend.get(legacy_name),
+                "created_at": None,
+                "checked_at": None,
+            }
+        return None
+    
+    def is_expired(self, record, now=None):
+        """
+        Verifica se o registro passou da validade (TTL positivo ou negativo)
+        """
+        ttl = self.positive_ttl if record.get("imdb_id") else self.negative_ttl
+        checked_at = record.get("checked_at")
+        
+        if checked_at is None:
+            return not record.get("imdb_id")
+        if not ttl:
+            return False
+        return (now or time.time()) - checked_at > ttl
+    
+    def set_record(self, key, name, is_series, year, language, tmdb_id, imdb_id):
+        """
+        Grava o resultado de uma busca (encontrado ou não) com as datas de criação e verificação
+        """
+        now = time.time()
+        previous = self.backend.get(key)
+        record = {
+            "name": name,
+            "is_series": is_series,
+            "year": year,
+            "language": language,
+            "tmdb_id": tmdb_id,
+            "imdb_id": imdb_id,
+            "created_at": previous.get("created_at", now) if isinstance(previous, dict) else now,
+            "checked_at": now,
+        }
+        self.backend.set(key, record)
+        self.writer.notify(self.backend)
+        return record
+    
+    def iter_resolved(self):
+        """
+        Gera os pares (chave, registro) das buscas com IMDb ID ainda válidas
+        """
+        now = time.time()
+        for key, record in self.backend.items():
+            if not isinstance(record, dict) or not record.get("imdb_id"):
+                continue
+            if not self.is_expired(record, now):
+                yield key, record
+    
+    def iter_expired_negatives(self):
         """
-        Garante que o cache seja salvo quando o objeto for destruído
+        Gera os pares (chave, registro) de buscas sem resultado cuja validade expirou
         """
-        try:
-            self.save_cache(force=True)
-        except:
-            pass 
\ No newline at end of file
+        now = time.time()
+        for key, record in self.backend.items():
+            # Ignora as entradas no formato antigo, que não informam o tipo de mídia
+            if not isinstance(record, dict) or record.get("imdb_id"):
+                continue
+            if self.is_expired(record, now):
+                yield key, record
@@ -0,0 +1,114 @@
+import os
+import threading
+from collections import OrderedDict
+from src.cache.backends import JSONCacheBackend, SQLiteCacheBackend
+from src.cache.writer import CacheWriter
+from config.settings import CACHE_DIR, CACHE_BACKEND, CACHE_FORMAT, LRU_CACHE_SIZE
+
+class PersistentLRUCache:
+    """
+    Cache com um LRU limitado em memória na frente de um backend persistente.
+    
+    Usado para os caches de segundo nível do TMDbClient (busca -> TMDb ID e
+    TMDb ID -> IMDb ID), que registram acertos e falhas separadamente. As gravações
+    no disco ficam a cargo da thread de gravação (CacheWriter), como no CacheManager.
+    """
+    def __init__(self, name, max_size=LRU_CACHE_SIZE, backend=None, save_interval=100, cache_format=None,
+                 writer=None):
+        self.name = name
+        self.max_size = max_size
+        self.cache_format = cache_format or CACHE_FORMAT
+        self.backend = self._create_backend(backend or CACHE_BACKEND)
+        self.entries = OrderedDict()
+        self.mutex = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        
+        # Mesma política de salvamento do CacheManager: por número de alterações ou por tempo
+        self.save_interval = save_interval
+        self.owns_writer = writer is None
+        self.writer = writer or CacheWriter()
+        self.writer.register(self.backend, save_interval, self.name)
+    
+    def _create_backend(self, backend_name):
+        """
+        Cria o backend com um arquivo próprio dentro do diretório de cache
+        """
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        if backend_name == "json":
+            return JSONCacheBackend(os.path.join(CACHE_DIR, f"{self.name}.json"), format=self.cache_format)
+        if backend_name == "sqlite":
+            return SQLiteCacheBackend(os.path.join(CACHE_DIR, f"{self.name}.sqlite3"))
+        raise ValueError(f"Backend de cache desconhecido: {backend_name}")
+    
+    def get(self, key):
+        """
+        Obtém o valor da chave, consultando a memória e depois o disco
+        
+        Returns:
+            O valor armazenado, ou None se a chave não existir
+        """
+        with self.mutex:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        
+        value = self.backend.get(key)
+        
+        with self.mutex:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, value)
+            return value
+    
+    def set(self, key, value):
+        """
+        Grava o valor na memória e no backend persistente
+        """
+        with self.mutex:
+            self._remember(key, value)
+        self.backend.set(key, value)
+        self.writer.notify(self.backend)
+    
+    def _remember(self, key, value):
+        """
+        Insere a chave no LRU, descartando a menos usada se o limite for atingido
+        (deve ser chamado com o mutex adquirido)
+        """
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+    
+    def save(self, force=False):
+        """
+        Salva o backend pela thread de gravação (com force=True, espera a gravação terminar)
+        """
+        self.writer.flush(self.backend, wait=force)
+    
+    def close(self):
+        """
+        Grava as alterações pendentes e fecha o backend
+        """
+        if self.owns_writer:
+            self.writer.close()
+        else:
+            self.writer.flush(self.backend)
+        self.backend.close()
+    
+    def stats(self):
+        """
+        Retorna as estatísticas de acertos e falhas do cache
+        """
+        with self.mutex:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self.entries),
+            }
@@ -0,0 +1,190 @@
+import atexit
+import queue
+import threading
+import time
+from config.settings import CACHE_FLUSH_INTERVAL
+
+# Mensagem que encerra a thread de gravação
+_STOP = object()
+
+class CacheWriter:
+    """
+    Thread única que grava os caches no disco, fora do caminho das buscas.
+
+    As threads de busca só alteram a visão em memória do backend e avisam a
+    alteração por uma fila, sem trava e sem E/S. A thread de gravação junta os
+    avisos em lotes e chama o flush() de cada backend quando ele acumula
+    `batch_size` alterações ou quando a alteração mais antiga ainda não gravada
+    passa de `max_delay` segundos (a defasagem máxima do disco em relação à memória).
+
+    Uso:
+        writer = CacheWriter()
+        writer.register(backend, batch_size=100, label="search_ids")
+        backend.set(key, value)
+        writer.notify(backend)
+        ...
+        writer.close()  # Grava o que estiver pendente e encerra a thread
+
+    Se close() não for chamado, as alterações pendentes são gravadas ao sair do programa (atexit).
+    """
+    def __init__(self, max_delay=CACHE_FLUSH_INTERVAL):
+        self.max_delay = max_delay
+        self.queue = queue.SimpleQueue()
+        # backend -> (alterações por lote, nome usado nas mensagens de erro)
+        self.backends = {}
+        self.closed = False
+        self.close_mutex = threading.Lock()
+
+        # Estatísticas da thread de gravação
+        self.flushes = 0
+        self.flush_seconds = 0.0
+        self.errors = 0
+
+        self.thread = threading.Thread(target=self._run, name="cache-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def register(self, backend, batch_size, label):
+        """
+        Registra um backend a ser gravado por esta thread
+
+        Args:
+            backend: JSONCacheBackend ou SQLiteCacheBackend
+            batch_size (int): Alterações acumuladas que disparam a gravação
+            label (str): Nome do cache nas mensagens de erro
+        """
+        self.backends[backend] = (max(1, batch_size), label)
+
+    def notify(self, backend, changes=1):
+        """
+        Avisa que o backend recebeu alterações (chamado depois de backend.set)
+
+        Depois de close(), não há mais thread para gravar o aviso: o backend é
+        gravado na thread atual, para que a alteração não se perca (ex: uma busca
+        que termina depois do encerramento pelo atexit)
+        """
+        # Mesma trava do close(): o aviso entra na fila antes do encerramento ou é gravado aqui
+        with self.close_mutex:
+            queued = not self.closed
+            if queued:
+                self.queue.put(("change", backend, changes))
+        if not queued:
+            self._flush(backend)
+
+    def flush(self, backend=None, wait=True):
+        """
+        Pede a gravação imediata de um backend (ou de todos, se None)
+
+        Args:
+            wait (bool): Espera a gravação terminar (ex: antes de gravar um checkpoint)
+        """
+        done = threading.Event() if wait else None
+        # O pedido entra na fila antes do encerramento (e é atendido pela thread) ou depois dele
+        with self.close_mutex:
+            queued = not self.closed
+            if queued:
+                self.queue.put(("flush", backend, done))
+        if not queued:
+            # Sem a thread de gravação, grava na thread atual
+            for target in ([backend] if backend is not None else list(self.backends)):
+                self._flush(target)
+            return
+        if done is not None:
+            done.wait()
+
+    def close(self):
+        """
+        Grava todas as alterações pendentes e encerra a thread (pode ser chamado mais de uma vez)
+        """
+        with self.close_mutex:
+            if self.closed:
+                return
+            self.queue.put(_STOP)
+            self.thread.join()
+            self.closed = True
+        atexit.unregister(self.close)
+
+    def stats(self):
+        return {
+            "flushes": self.flushes,
+            "flush_seconds": round(self.flush_seconds, 3),
+            "errors": self.errors,
+        }
+
+    def _flush(self, backend):
+        """
+        Grava um backend, registrando o tempo gasto
+
+        Returns:
+            bool: True se a gravação funcionou
+        """
+        start = time.perf_counter()
+        try:
+            backend.flush()
+            return True
+        except Exception as e:
+            self.errors += 1
+            label = self.backends.get(backend, (None, "cache"))[1]
+            print(f"Erro ao salvar o cache '{label}': {str(e)}")
+            return False
+        finally:
+            self.flushes += 1
+            self.flush_seconds += time.perf_counter() - start
+
+    def _run(self):
+        """
+        Laço da thread de gravação: espera avisos até o prazo do lote mais antigo,
+        junta tudo o que estiver na fila e grava os backends cujo lote fechou
+        """
+        # backend -> [alterações não gravadas, instante da mais antiga]
+        pending = {}
+        while True:
+            timeout = None
+            if pending:
+                oldest = min(first for _, first in pending.values())
+                timeout = max(0.0, oldest + self.max_delay - time.monotonic())
+            try:
+                messages = [self.queue.get(timeout=timeout)]
+            except queue.Empty:
+                messages = []
+            # Tudo o que chegou enquanto a última gravação acontecia entra no mesmo lote
+            while True:
+                try:
+                    messages.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            now = time.monotonic()
+            stop = False
+            requested = {}
+            waiters = []
+            for message in messages:
+                if message is _STOP:
+                    stop = True
+                    continue
+                kind, backend, value = message
+                if kind == "change":
+                    entry = pending.setdefault(backend, [0, now])
+                    entry[0] += value
+                    continue
+                # Pedido de gravação imediata (de um backend ou de todos)
+                for target in ([backend] if backend is not None else list(self.backends)):
+                    requested[target] = True
+                if value is not None:
+                    waiters.append(value)
+
+            for backend, (changes, first) in list(pending.items()):
+                batch_size = self.backends.get(backend, (1, None))[0]
+                if stop or changes >= batch_size or now - first >= self.max_delay:
+                    requested[backend] = True
+
+            for backend in requested:
+                pending.pop(backend, None)
+                if not self._flush(backend) and not stop:
+                    # Tenta novamente quando o prazo vencer
+                    pending[backend] = [1, now]
+            for done in waiters:
+                done.set()
+
+            if stop:
+                return
@@ -1,16 +1,30 @@
+import sys
+
 class MediaEntry:
     """
     Classe que representa uma entrada de mídia (filme ou série)
     """
-    def __init__(self, name, url, language="portuguese", group_title=""):
+    # Sem __dict__ por instância: reduz o consumo de memória em listas com milhões de entradas
+    __slots__ = (
+        "name", "url", "language", "group_title", "tvg_id", "imdb_id",
+        "season", "episode", "is_series", "episode_imdb_id", "fingerprint",
+    )
+
+    def __init__(self, name, url, language="portuguese", group_title="", tvg_id=""):
         self.name = name
         self.url = url
-        self.language = language
-        self.group_title = group_title
+        # Idioma e grupo se repetem em quase todas as entradas; internar compartilha a mesma string
+        self.language = sys.intern(language)
+        self.group_title = sys.intern(group_title)
+        self.tvg_id = tvg_id
         self.imdb_id = None
         self.season = None
         self.episode = None
         self.is_series = False
+        # IMDb ID do episódio (imdb_id é o da série)
+        self.episode_imdb_id = None
+        # Hash do conteúdo da entrada na lista (linha #EXTINF + URL), usado no modo incremental
+        self.fingerprint = None
         
     def set_imdb_id(self, imdb_id):
         """
@@ -19,6 +33,13 @@ class MediaEntry:
         self.imdb_id = imdb_id
         return self
         
+    def set_episode_imdb_id(self, episode_imdb_id):
+        """
+        Define o IMDb ID do episódio, para séries
+        """
+        self.episode_imdb_id = episode_imdb_id
+        return self
+        
     def set_series_info(self, season, episode):
         """
         Define as informações de temporada e episódio para séries
@@ -28,6 +49,18 @@ class MediaEntry:
         self.is_series = True if season is not None and episode is not None else False
         return self
         
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Recria uma entrada a partir do dicionário gerado por to_dict
+        """
+        entry = cls(data["name"], data["url"], data.get("language", "portuguese"))
+        entry.imdb_id = data.get("imdb_id")
+        if "season" in data and "episode" in data:
+            entry.set_series_info(data["season"], data["episode"])
+        entry.episode_imdb_id = data.get("episode_imdb_id")
+        return entry
+        
     def to_dict(self):
         """
         Converte a entrada para um dicionário
@@ -44,5 +77,7 @@ class MediaEntry:
         if self.is_series:
             result["season"] = self.season
             result["episode"] = self.episode
+            if self.episode_imdb_id:
+                result["episode_imdb_id"] = self.episode_imdb_id
             
         return result 
\ No newline at end of file
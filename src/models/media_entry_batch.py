@@ -0,0 +1,164 @@
+from array import array
+from src.models.media_entry import MediaEntry
+
+# Valor usado nas colunas de temporada/episódio quando a entrada não é uma série
+_NO_NUMBER = -1
+
+class MediaEntryBatch:
+    """
+    Contêiner colunar das entradas lidas de uma lista.
+
+    Em vez de um objeto por entrada, cada campo é guardado em uma coluna
+    (listas paralelas e arrays de inteiros). Idioma e grupo são armazenados
+    uma única vez em tabelas de strings e referenciados por índice.
+
+    É o formato em que os processos do ParallelM3UParser devolvem os blocos
+    analisados (muito mais barato de serializar entre processos que uma lista de
+    objetos). O MediaProcessor preenche as colunas de IMDb ID das entradas
+    respondidas sem busca e os exportadores as serializam direto das colunas
+    (write_batch); ao percorrer o lote, as entradas são materializadas como MediaEntry.
+
+    Uso:
+        batch = MediaEntryBatch()
+        batch.append("Irmão Urso", "http://...", "portuguese", "Filmes")
+        batch.set_imdb_id(0, "tt0328880")
+        for data in batch.iter_dicts():
+            ...
+    """
+    def __init__(self):
+        self.names = []
+        self.urls = []
+        self.tvg_ids = []
+        self.imdb_ids = []
+        self.episode_imdb_ids = []
+        self.fingerprints = []
+        # 64 bits: listas malformadas podem ter números enormes em "SxxEyy" (ver _append_number)
+        self.seasons = array('q')
+        self.episodes = array('q')
+        self.language_ids = array('I')
+        self.group_ids = array('I')
+        # Tabelas de strings (valor -> índice e índice -> valor)
+        self.strings = []
+        self._string_index = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        for index in range(len(self.names)):
+            yield self.entry(index)
+
+    def _string_id(self, value):
+        """
+        Retorna o índice da string na tabela, adicionando-a se ainda não existir
+        """
+        index = self._string_index.get(value)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(value)
+            self._string_index[value] = index
+        return index
+
+    @staticmethod
+    def _append_number(column, value):
+        """
+        Adiciona um número à coluna; se ele não couber em 64 bits, a coluna vira uma
+        lista comum, para que o lote continue idêntico à análise sequencial
+
+        Returns:
+            A coluna (o mesmo array ou a lista que o substituiu)
+        """
+        try:
+            column.append(value)
+        except OverflowError:
+            column = list(column)
+            column.append(value)
+        return column
+
+    def append(self, name, url, language="portuguese", group_title="", tvg_id="",
+               season=None, episode=None, fingerprint=None, imdb_id=None, episode_imdb_id=None):
+        """
+        Adiciona uma entrada ao lote
+
+        Returns:
+            int: Índice da entrada no lote
+        """
+        is_series = season is not None and episode is not None
+        self.names.append(name)
+        self.urls.append(url)
+        self.tvg_ids.append(tvg_id)
+        self.imdb_ids.append(imdb_id)
+        self.episode_imdb_ids.append(episode_imdb_id)
+        self.fingerprints.append(fingerprint)
+        self.seasons = self._append_number(self.seasons, season if is_series else _NO_NUMBER)
+        self.episodes = self._append_number(self.episodes, episode if is_series else _NO_NUMBER)
+        self.language_ids.append(self._string_id(language))
+        self.group_ids.append(self._string_id(group_title))
+        return len(self.names) - 1
+
+    def is_series(self, index):
+        return self.seasons[index] != _NO_NUMBER
+
+    def language(self, index):
+        return self.strings[self.language_ids[index]]
+
+    def group_title(self, index):
+        return self.strings[self.group_ids[index]]
+
+    def set_imdb_id(self, index, imdb_id):
+        """
+        Define o IMDb ID da entrada no índice informado
+        """
+        self.imdb_ids[index] = imdb_id
+
+    def set_episode_imdb_id(self, index, episode_imdb_id):
+        """
+        Define o IMDb ID do episódio da entrada no índice informado
+        """
+        self.episode_imdb_ids[index] = episode_imdb_id
+
+    def entry(self, index):
+        """
+        Materializa a entrada do índice informado como um MediaEntry
+        """
+        entry = MediaEntry(
+            self.names[index], self.urls[index], self.language(index),
+            self.group_title(index), self.tvg_ids[index],
+        )
+        entry.imdb_id = self.imdb_ids[index]
+        entry.episode_imdb_id = self.episode_imdb_ids[index]
+        entry.fingerprint = self.fingerprints[index]
+        if self.is_series(index):
+            entry.set_series_info(self.seasons[index], self.episodes[index])
+        return entry
+
+    def to_dict(self, index):
+        """
+        Gera o mesmo dicionário que MediaEntry.to_dict sem criar o objeto intermediário
+        """
+        result = {
+            "name": self.names[index],
+            "url": self.urls[index],
+            "language": self.strings[self.language_ids[index]]
+        }
+
+        imdb_id = self.imdb_ids[index]
+        if imdb_id:
+            result["imdb_id"] = imdb_id
+
+        season = self.seasons[index]
+        if season != _NO_NUMBER:
+            result["season"] = season
+            result["episode"] = self.episodes[index]
+            episode_imdb_id = self.episode_imdb_ids[index]
+            if episode_imdb_id:
+                result["episode_imdb_id"] = episode_imdb_id
+
+        return result
+
+    def iter_dicts(self, indices=None):
+        """
+        Gera os dicionários de exportação das entradas (todas, ou as dos índices informados), em ordem
+        """
+        for index in range(len(self.names)) if indices is None else indices:
+            yield self.to_dict(index)
@@ -1,59 +1,205 @@
+import hashlib
 import re
 from src.models.media_entry import MediaEntry
+from src.models.media_entry_batch import MediaEntryBatch
 from src.utils.text_cleaner import TextCleaner
 
+# Atributos no formato chave="valor" de uma linha #EXTINF (tvg-id, tvg-name, tvg-logo, group-title...)
+# O espaço inicial ancora a busca no começo de cada atributo, evitando tentativas em todas as posições
+_ATTRIBUTE_PATTERN = re.compile(r'\s([\w-]+)="([^"]*)"')
+
 class M3UParser:
     """
     Classe para analisar arquivos M3U e convertê-los em objetos MediaEntry
     """
     def __init__(self):
         self.text_cleaner = TextCleaner()
-    
+
     def parse_file(self, file_path):
         """
         Analisa um arquivo M3U e retorna uma lista de objetos MediaEntry
         """
-        entries = []
-        
-        with open(file_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-        
-        for i, line in enumerate(lines):
+        return list(self.iter_entries(file_path))
+
+    def iter_entries(self, path_or_fileobj, fingerprint=False):
+        """
+        Analisa um arquivo M3U linha a linha, gerando objetos MediaEntry
+        sob demanda sem carregar o arquivo inteiro na memória
+
+        Args:
+            path_or_fileobj: Caminho do arquivo ou objeto de arquivo já aberto (modo texto)
+            fingerprint (bool): Se True, preenche o fingerprint de cada entrada com o
+                hash da linha #EXTINF e da URL (usado no modo incremental)
+
+        Yields:
+            MediaEntry: Cada entrada válida encontrada na lista
+        """
+        if hasattr(path_or_fileobj, 'read'):
+            yield from self._iter_lines(path_or_fileobj, fingerprint)
+            return
+
+        with open(path_or_fileobj, 'r', encoding='utf-8') as file:
+            yield from self._iter_lines(file, fingerprint)
+
+    def iter_positioned(self, file_path, start=0, fingerprint=False):
+        """
+        Analisa o arquivo a partir de uma posição em bytes, gerando cada entrada
+        junto com a posição logo após a sua linha de URL (usado para retomar
+        conversões interrompidas)
+
+        As quebras de linha "\r\n" são tratadas como "\n", como na leitura em modo texto.
+
+        Args:
+            file_path (str): Caminho do arquivo M3U
+            start (int): Posição inicial; deve ser o início de uma linha
+            fingerprint (bool): Se True, preenche o fingerprint de cada entrada
+
+        Yields:
+            tuple: (MediaEntry, posição em bytes do fim da entrada)
+        """
+        position = start
+
+        def lines(file):
+            nonlocal position
+            for raw_line in file:
+                position += len(raw_line)
+                line = raw_line.decode('utf-8')
+                yield line[:-2] + "\n" if line.endswith("\r\n") else line
+
+        with open(file_path, 'rb') as file:
+            file.seek(start)
+            # _iter_fields gera cada entrada logo após consumir a linha da URL
+            for header, url_line, fields in self._iter_fields(lines(file)):
+                entry = self._build_entry(fields)
+                if fingerprint:
+                    entry.fingerprint = self.fingerprint(header, url_line)
+                yield entry, position
+
+    def iter_batches(self, path_or_fileobj, batch_size=10000, fingerprint=False):
+        """
+        Analisa um arquivo M3U preenchendo lotes colunares, sem criar um objeto por entrada
+
+        Args:
+            path_or_fileobj: Caminho do arquivo ou objeto de arquivo já aberto (modo texto)
+            batch_size (int): Número máximo de entradas por lote
+            fingerprint (bool): Se True, preenche o fingerprint de cada entrada
+
+        Yields:
+            MediaEntryBatch: Lotes com até batch_size entradas, na ordem do arquivo
+        """
+        if hasattr(path_or_fileobj, 'read'):
+            yield from self._iter_batch_lines(path_or_fileobj, batch_size, fingerprint)
+            return
+
+        with open(path_or_fileobj, 'r', encoding='utf-8') as file:
+            yield from self._iter_batch_lines(file, batch_size, fingerprint)
+
+    def _iter_lines(self, lines, fingerprint=False):
+        """
+        Percorre as linhas mantendo o cabeçalho #EXTINF pendente até a linha da URL
+        """
+        for header, url_line, fields in self._iter_fields(lines):
+            entry = self._build_entry(fields)
+            if fingerprint:
+                entry.fingerprint = self.fingerprint(header, url_line)
+            yield entry
+
+    def _iter_batch_lines(self, lines, batch_size, fingerprint=False):
+        """
+        Percorre as linhas acumulando as entradas em lotes colunares
+        """
+        batch = MediaEntryBatch()
+        for header, url_line, fields in self._iter_fields(lines):
+            clean_name, url, language, group_title, tvg_id, season, episode = fields
+            batch.append(
+                clean_name, url, language, group_title, tvg_id, season, episode,
+                fingerprint=self.fingerprint(header, url_line) if fingerprint else None,
+            )
+            if len(batch) >= batch_size:
+                yield batch
+                batch = MediaEntryBatch()
+
+        if len(batch):
+            yield batch
+
+    def _iter_fields(self, lines):
+        """
+        Percorre as linhas gerando (linha #EXTINF, linha da URL, campos) de cada entrada válida
+        """
+        pending_header = None
+
+        for line in lines:
+            # A linha seguinte a um #EXTINF é sempre tratada como a URL da entrada
+            if pending_header is not None:
+                fields = self._parse_fields(pending_header, line)
+                if fields:
+                    yield pending_header, line, fields
+                pending_header = None
+
             if line.startswith("#EXTINF"):
-                # Extrai informações da linha
-                match_group_title = re.search(r'group-title="([^"]+)"', line)
-                group_title = match_group_title.group(1) if match_group_title else ""
-                
-                # Ignora canais de TV
-                if group_title.startswith("Canais"):
-                    continue
-                
-                match_name = re.search(r'tvg-name="([^"]+)"', line)
-                if match_name and i + 1 < len(lines):
-                    name = match_name.group(1).strip()
-                    url = lines[i + 1].strip()
-                    
-                    # Verifica se a URL é válida
-                    if not url.startswith("http"):
-                        print(f"URL inválida encontrada: {url}. Ignorando entrada.")
-                        continue
-                    
-                    # Detecta o idioma
-                    language = TextCleaner.detect_language(name, group_title)
-                    
-                    # Cria a entrada
-                    entry = MediaEntry(name, url, language, group_title)
-                    
-                    # Limpa o nome e extrai informações de série, se for o caso
-                    series_name, season, episode = TextCleaner.extract_series_info(name)
-                    
-                    # Se for uma série, atualiza o nome e adiciona informações de temporada e episódio
-                    if season is not None and episode is not None:
-                        entry.name = series_name
-                        entry.set_series_info(season, episode)
-                    else:
-                        entry.name = TextCleaner.clean_name(name)
-                    
-                    entries.append(entry)
-        
-        return entries 
\ No newline at end of file
+                pending_header = line
+
+    @staticmethod
+    def fingerprint(extinf_line, url_line):
+        """
+        Calcula o hash do conteúdo de uma entrada (linha #EXTINF + URL)
+        """
+        content = f"{extinf_line.strip()}\n{url_line.strip()}"
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def _parse_fields(self, line, url_line):
+        """
+        Extrai os campos de uma entrada a partir da linha #EXTINF e da linha da URL
+
+        Returns:
+            tuple: (nome, url, idioma, grupo, tvg-id, temporada, episódio) ou None
+                se a entrada deve ser ignorada
+        """
+        # Atributos e fim do último atributo, onde começa o título exibido (depois da vírgula)
+        attributes = {}
+        match = None
+        for match in _ATTRIBUTE_PATTERN.finditer(line):
+            key, value = match.groups()
+            attributes[key] = value
+        title_start = match.end() if match else 0
+        group_title = attributes.get("group-title", "")
+
+        # Ignora canais de TV
+        if group_title.startswith("Canais"):
+            return None
+
+        # Sem tvg-name, o título exibido é usado como nome
+        name = attributes.get("tvg-name", "").strip()
+        if not name:
+            comma = line.find(",", title_start)
+            if comma == -1:
+                return None
+            name = line[comma + 1:].strip()
+            if not name:
+                return None
+
+        url = url_line.strip()
+
+        # Verifica se a URL é válida
+        if not url.startswith("http"):
+            print(f"URL inválida encontrada: {url}. Ignorando entrada.")
+            return None
+
+        # Limpa o nome, extrai informações de série e detecta o idioma de uma só vez
+        clean_name, season, episode, language = TextCleaner.normalize(name, group_title)
+
+        return clean_name, url, language, group_title, attributes.get("tvg-id", ""), season, episode
+
+    @staticmethod
+    def _build_entry(fields):
+        """
+        Cria um MediaEntry a partir dos campos extraídos por _parse_fields
+        """
+        clean_name, url, language, group_title, tvg_id, season, episode = fields
+        entry = MediaEntry(clean_name, url, language, group_title, tvg_id)
+
+        # Se for uma série, adiciona informações de temporada e episódio
+        if season is not None and episode is not None:
+            entry.set_series_info(season, episode)
+
+        return entry
@@ -0,0 +1,112 @@
+import io
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from config.settings import PARSE_WORKERS, PARSE_CHUNK_SIZE
+from src.parsers.m3u_parser import M3UParser
+
+# Início de um registro: toda quebra de linha seguida de #EXTINF é um ponto de corte válido
+_RECORD_BOUNDARY = b"\n#EXTINF"
+
+def _parse_chunk(file_path, start, end, fingerprint):
+    """
+    Analisa o trecho [start, end) do arquivo em um processo separado
+
+    O trecho sempre começa em uma linha #EXTINF. A primeira linha após o fim
+    do trecho também é lida, para que um cabeçalho no final do bloco receba
+    a linha seguinte exatamente como na análise sequencial.
+
+    Returns:
+        MediaEntryBatch: Entradas do trecho (colunar, barato de transferir entre processos)
+    """
+    with open(file_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            next_line_end = data.find(b"\n", end)
+            stop = len(data) if next_line_end == -1 else next_line_end + 1
+            chunk = data[start:stop]
+
+    # TextIOWrapper mantém as mesmas regras de quebra de linha de open() em modo texto
+    lines = io.TextIOWrapper(io.BytesIO(chunk), encoding='utf-8')
+    batches = list(M3UParser().iter_batches(lines, batch_size=len(chunk) + 1, fingerprint=fingerprint))
+    return batches[0] if batches else None
+
+class ParallelM3UParser:
+    """
+    Analisa arquivos M3U grandes em vários processos.
+
+    O arquivo é dividido em blocos que terminam sempre antes de uma linha #EXTINF
+    (busca no arquivo mapeado em memória). Cada bloco é analisado e normalizado
+    em um ProcessPoolExecutor, e os resultados são entregues na ordem original.
+    """
+    def __init__(self, workers=PARSE_WORKERS, chunk_size=PARSE_CHUNK_SIZE):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def chunk_offsets(file_path, chunk_size):
+        """
+        Calcula os limites dos blocos do arquivo
+
+        Returns:
+            list: Pares (início, fim) em bytes, cobrindo o arquivo inteiro
+        """
+        size = os.path.getsize(file_path)
+        if size == 0:
+            return []
+
+        offsets = []
+        start = 0
+        with open(file_path, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                while start < size:
+                    boundary = data.find(_RECORD_BOUNDARY, start + chunk_size) if start + chunk_size < size else -1
+                    end = size if boundary == -1 else boundary + 1
+                    offsets.append((start, end))
+                    start = end
+        return offsets
+
+    def iter_batches(self, file_path, fingerprint=False):
+        """
+        Analisa o arquivo em paralelo gerando um MediaEntryBatch por bloco, em ordem
+
+        Args:
+            file_path (str): Caminho do arquivo M3U
+            fingerprint (bool): Se True, preenche o fingerprint de cada entrada
+        """
+        offsets = self.chunk_offsets(file_path, self.chunk_size)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            # Mantém no máximo dois blocos por processo em andamento para limitar a memória
+            pending = deque()
+            for start, end in offsets:
+                pending.append(executor.submit(_parse_chunk, file_path, start, end, fingerprint))
+                if len(pending) >= self.workers * 2:
+                    batch = pending.popleft().result()
+                    if batch is not None:
+                        yield batch
+
+            while pending:
+                batch = pending.popleft().result()
+                if batch is not None:
+                    yield batch
+
+    def iter_entries(self, file_path, fingerprint=False):
+        """
+        Mesma interface de M3UParser.iter_entries, analisando o arquivo em paralelo
+
+        Yields:
+            MediaEntry: Cada entrada válida, na ordem do arquivo
+        """
+        if self.workers == 1:
+            yield from M3UParser().iter_entries(file_path, fingerprint=fingerprint)
+            return
+
+        for batch in self.iter_batches(file_path, fingerprint=fingerprint):
+            yield from batch
+
+    def parse_file(self, file_path):
+        """
+        Analisa o arquivo em paralelo e retorna uma lista de objetos MediaEntry
+        """
+        return list(self.iter_entries(file_path))
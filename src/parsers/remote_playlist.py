@@ -0,0 +1,175 @@
+import io
+import json
+import os
+import zlib
+from urllib.parse import urlparse
+import requests
+from config.settings import DOWNLOAD_TIMEOUT, DOWNLOAD_CHUNK_SIZE
+
+# Assinatura de um arquivo gzip (listas publicadas como .m3u.gz, sem Content-Encoding)
+_GZIP_MAGIC = b"\x1f\x8b"
+
+class _ChunkReader(io.RawIOBase):
+    """
+    Arquivo binário somente leitura sobre um iterador de blocos de bytes
+    """
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.pending = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending:
+            self.pending = next(self.chunks, None)
+            if self.pending is None:
+                self.pending = b""
+                return 0
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+class RemotePlaylist:
+    """
+    Lista M3U remota (http/https) lida em streaming, direto da conexão para o parser,
+    sem ser gravada no disco.
+
+    O corpo é descompactado à medida que chega, tanto com Content-Encoding: gzip
+    quanto quando o próprio arquivo é um .m3u.gz. Se state_file for informado, o
+    ETag e o Last-Modified da última lista convertida são guardados nele e enviados
+    na próxima execução (If-None-Match / If-Modified-Since): uma lista inalterada
+    recebe 304 e não é baixada de novo.
+
+    Uso:
+        playlist = RemotePlaylist("https://provedor.example/lista.m3u", "saida.json.source.json")
+        if playlist.open():
+            for entry in parser.iter_entries(playlist.stream()):
+                ...
+            playlist.save_state()  # Só depois que a conversão terminou
+    """
+    def __init__(self, url, state_file=None, session=None, timeout=DOWNLOAD_TIMEOUT, max_bytes=None):
+        self.url = url
+        self.state_file = state_file
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        # Tamanho máximo da lista descompactada (None = sem limite)
+        self.max_bytes = max_bytes
+        self.response = None
+        self.bytes_read = 0
+
+    @staticmethod
+    def is_url(path):
+        """
+        Verifica se o caminho de entrada é uma URL http(s)
+        """
+        return urlparse(path).scheme in ("http", "https")
+
+    def load_state(self):
+        """
+        Validadores da última lista convertida a partir desta URL
+
+        Returns:
+            dict: {"etag": ..., "last_modified": ...} ou {} se não houver estado para a URL
+        """
+        if not self.state_file:
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return state if state.get("url") == self.url else {}
+
+    def open(self, conditional=True):
+        """
+        Inicia o download
+
+        Args:
+            conditional (bool): Envia os validadores salvos, para pular uma lista inalterada
+
+        Returns:
+            bool: True se a lista deve ser convertida, False se não mudou desde a última conversão
+
+        Raises:
+            requests.RequestException: Erro de conexão ou resposta diferente de 200/304
+        """
+        headers = {"Accept-Encoding": "gzip"}
+        state = self.load_state() if conditional else {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+        response = self.session.get(self.url, headers=headers, stream=True, timeout=self.timeout)
+        if response.status_code == 304:
+            response.close()
+            return False
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        self.response = response
+        return True
+
+    def _iter_chunks(self):
+        """
+        Blocos do corpo já descompactados (o requests trata o Content-Encoding;
+        um arquivo .gz é detectado pela assinatura)
+        """
+        decompressor = None
+        first = True
+        try:
+            for chunk in self.response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                if first:
+                    first = False
+                    if chunk.startswith(_GZIP_MAGIC):
+                        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                if decompressor:
+                    chunk = decompressor.decompress(chunk)
+                self._count(len(chunk))
+                yield chunk
+            if decompressor:
+                chunk = decompressor.flush()
+                self._count(len(chunk))
+                yield chunk
+        finally:
+            self.response.close()
+
+    def _count(self, size):
+        self.bytes_read += size
+        if self.max_bytes and self.bytes_read > self.max_bytes:
+            raise ValueError(f"A lista excede {self.max_bytes // (1024 * 1024)} MiB.")
+
+    def stream(self):
+        """
+        Objeto de arquivo em modo texto com o conteúdo da lista, lido sob demanda
+        (mesmas regras de quebra de linha de open() em modo texto)
+        """
+        if self.response is None:
+            raise RuntimeError("A lista remota ainda não foi aberta")
+        reader = io.BufferedReader(_ChunkReader(self._iter_chunks()), DOWNLOAD_CHUNK_SIZE)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+
+    def close(self):
+        if self.response is not None:
+            self.response.close()
+
+    def save_state(self):
+        """
+        Guarda os validadores da lista baixada, para a próxima requisição condicional
+        """
+        if not self.state_file or self.response is None:
+            return
+        state = {
+            "url": self.url,
+            "etag": self.response.headers.get("ETag"),
+            "last_modified": self.response.headers.get("Last-Modified"),
+            "bytes": self.bytes_read,
+        }
+        temp_file = f"{self.state_file}.temp"
+        with open(temp_file, 'w', encoding='utf-8') as file:
+            json.dump(state, file, ensure_ascii=False, indent=4)
+        os.replace(temp_file, self.state_file)
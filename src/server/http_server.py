@@ -0,0 +1,332 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import requests
+from src.parsers.m3u_parser import M3UParser
+from src.parsers.remote_playlist import RemotePlaylist
+from src.utils.json_exporter import StreamingJSONExporter
+from config.settings import SERVER_HOST, SERVER_PORT, SERVER_MAX_JOBS, SERVER_MAX_UPLOAD_MB, MAX_WORKERS
+
+# Tamanho dos blocos lidos do corpo da requisição
+_READ_CHUNK_SIZE = 1024 * 1024
+# Tipo de conteúdo da resposta de /convert em cada formato
+_CONTENT_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson", "m3u": "audio/x-mpegurl"}
+# Tamanho acumulado antes de enviar um bloco da resposta (também enviado a cada flush do exportador)
+_RESPONSE_CHUNK_SIZE = 16 * 1024
+
+class _ChunkedResponse:
+    """
+    Corpo de resposta com Transfer-Encoding: chunked, usado como stream (texto) do exportador
+    """
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.buffer = bytearray()
+
+    def write(self, text):
+        self.buffer += text.encode("utf-8")
+        if len(self.buffer) >= _RESPONSE_CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.wfile.write(f"{len(self.buffer):x}\r\n".encode("ascii") + bytes(self.buffer) + b"\r\n")
+            self.buffer.clear()
+        self.wfile.flush()
+
+    def finish(self):
+        """
+        Envia o que restou e o bloco final, que indica ao cliente que a resposta está completa
+        """
+        self.flush()
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+class ConversionError(Exception):
+    """
+    Erro na preparação de uma conversão, respondido ao cliente com o código HTTP indicado
+    """
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class ConversionServer:
+    """
+    Servidor HTTP local que mantém o MediaProcessor (caches, sessão HTTP, controle
+    de taxa e índices) carregado entre as conversões.
+
+    As conversões simultâneas compartilham o mesmo MediaProcessor, então também
+    compartilham o limite de taxa do TMDb e a deduplicação das buscas em andamento.
+    No máximo max_jobs conversões são feitas ao mesmo tempo; as demais aguardam.
+    As buscas de todas as conversões são feitas pelo mesmo executor, com MAX_WORKERS
+    threads, em vez de um executor por conversão.
+
+    Endpoints:
+        POST /convert          Converte a lista M3U enviada no corpo da requisição
+        GET|POST /convert?url= Converte a lista M3U da URL enquanto ela é baixada
+            Parâmetros opcionais: format=json|ndjson|m3u e compact=1
+        GET /health            Estado do servidor e das conversões
+        GET /metrics           Métricas acumuladas no formato texto do Prometheus
+        GET /stats             Métricas acumuladas em JSON
+
+    A resposta de /convert é enviada em blocos (chunked) à medida que as entradas são
+    resolvidas. Se a conversão falhar depois do início da resposta, a conexão é
+    encerrada sem o bloco final, e o cliente recebe uma resposta incompleta.
+
+    Uso:
+        server = ConversionServer(MediaProcessor(progress=False), port=8080)
+        server.serve_forever()
+    """
+    def __init__(self, media_processor, host=SERVER_HOST, port=SERVER_PORT, max_jobs=SERVER_MAX_JOBS,
+                 max_upload_mb=SERVER_MAX_UPLOAD_MB):
+        self.media_processor = media_processor
+        self.m3u_parser = M3UParser()
+        self.max_upload_bytes = max_upload_mb * 1024 * 1024
+        self.jobs = threading.BoundedSemaphore(max(1, max_jobs))
+        self.session = requests.Session()
+        self.executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="convert")
+        self.started_at = time.time()
+
+        self.mutex = threading.Lock()
+        self.queued_jobs = 0
+        self.active_jobs = 0
+        self.completed_jobs = 0
+        self.failed_jobs = 0
+        self.converted_entries = 0
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        """
+        Atende as requisições até shutdown() ou Ctrl+C, salvando os caches ao final
+        """
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.media_processor.save_caches()
+
+    def shutdown(self):
+        self.server.shutdown()
+
+    def stats(self):
+        """
+        Contadores das conversões feitas pelo servidor
+        """
+        with self.mutex:
+            return {
+                "uptime_seconds": round(time.time() - self.started_at, 3),
+                "queued_jobs": self.queued_jobs,
+                "active_jobs": self.active_jobs,
+                "completed_jobs": self.completed_jobs,
+                "failed_jobs": self.failed_jobs,
+                "converted_entries": self.converted_entries,
+            }
+
+    def report_sections(self):
+        """
+        Seções extras dos relatórios de métricas (as do MediaProcessor e as do servidor)
+        """
+        sections = self.media_processor.report_sections()
+        sections["server"] = self.stats()
+        return sections
+
+    def _count_job(self, name, value=1):
+        with self.mutex:
+            setattr(self, name, getattr(self, name) + value)
+
+    def receive_upload(self, rfile, length):
+        """
+        Copia a lista enviada no corpo da requisição para um arquivo temporário
+
+        Args:
+            rfile: Corpo da requisição
+            length (str): Valor do cabeçalho Content-Length (None ou vazio se ausente)
+
+        Returns:
+            str: Caminho do arquivo temporário (removido pelo chamador)
+        """
+        if not length:
+            raise ConversionError(411, "Informe o Content-Length da lista enviada.")
+        try:
+            length = int(length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise ConversionError(400, "Content-Length inválido.")
+        if length > self.max_upload_bytes:
+            raise ConversionError(413, f"A lista enviada excede {self.max_upload_bytes // (1024 * 1024)} MiB.")
+
+        file = tempfile.NamedTemporaryFile(suffix=".m3u", delete=False)
+        with file:
+            remaining = length
+            while remaining:
+                data = rfile.read(min(_READ_CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                file.write(data)
+                remaining -= len(data)
+        if remaining:
+            os.remove(file.name)
+            raise ConversionError(400, "O corpo da requisição terminou antes do Content-Length informado.")
+        return file.name
+
+    def open_url(self, url):
+        """
+        Inicia o download da lista da URL, que é convertida enquanto é baixada
+
+        Returns:
+            RemotePlaylist: Lista aberta (fechada pelo chamador)
+        """
+        if not RemotePlaylist.is_url(url):
+            raise ConversionError(400, "A URL da lista deve usar http ou https.")
+
+        playlist = RemotePlaylist(url, session=self.session, max_bytes=self.max_upload_bytes)
+        try:
+            playlist.open(conditional=False)
+        except requests.RequestException as error:
+            raise ConversionError(502, f"Erro ao baixar a lista: {error}")
+        return playlist
+
+    def convert(self, source, stream, format="json", indent=4):
+        """
+        Converte a lista, escrevendo as entradas resolvidas no stream à medida que ficam prontas
+
+        Args:
+            source: Caminho do arquivo M3U ou objeto de arquivo em modo texto
+            stream: Destino em modo texto
+            format (str): "json" ou "ndjson"
+            indent (int): Indentação do JSON (None para compacto)
+
+        Returns:
+            int: Número de entradas escritas
+        """
+        self._count_job("queued_jobs")
+        with self.jobs:
+            self._count_job("queued_jobs", -1)
+            self._count_job("active_jobs")
+            try:
+                # O flush a cada 100 entradas envia os resultados mesmo quando as buscas estão lentas
+                exporter = StreamingJSONExporter(None, format=format, indent=indent, fsync_every=100, stream=stream)
+                with exporter:
+                    entries = self.media_processor.metrics.timed_iter("parse", self.m3u_parser.iter_entries(source))
+                    self.media_processor.process_entries(entries, exporter=exporter, executor=self.executor)
+            except Exception:
+                self._count_job("failed_jobs")
+                raise
+            finally:
+                self._count_job("active_jobs", -1)
+        self._count_job("completed_jobs")
+        self._count_job("converted_entries", exporter.count)
+        return exporter.count
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send_body(self, status, body, content_type):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def send_json(self, status, body):
+                self.send_body(status, json.dumps(body, ensure_ascii=False, indent=4), "application/json; charset=utf-8")
+
+            def send_error_json(self, status, message):
+                self.send_json(status, {"error": message})
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/health":
+                    self.send_json(200, dict(status="ok", **server.stats()))
+                elif url.path == "/metrics":
+                    text = server.media_processor.metrics.prometheus_text(extra=server.report_sections())
+                    self.send_body(200, text, "text/plain; version=0.0.4; charset=utf-8")
+                elif url.path == "/stats":
+                    self.send_json(200, server.media_processor.metrics.report(extra=server.report_sections()))
+                elif url.path == "/convert":
+                    self.handle_convert(url, upload=False)
+                else:
+                    self.send_error_json(404, "Endpoint desconhecido.")
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                if url.path == "/convert":
+                    self.handle_convert(url, upload=True)
+                else:
+                    self.send_error_json(404, "Endpoint desconhecido.")
+
+            def handle_convert(self, url, upload):
+                query = parse_qs(url.query)
+                format = query.get("format", ["json"])[0]
+                compact = query.get("compact", ["0"])[0].lower() in ("1", "true", "yes")
+                source = query.get("url", [None])[0]
+                if format not in StreamingJSONExporter.FORMATS:
+                    self.send_error_json(400, f"Formato desconhecido: {format}")
+                    return
+                if not source and not upload:
+                    self.send_error_json(400, "Informe a URL da lista (?url=) ou envie a lista com POST.")
+                    return
+
+                playlist = file_path = None
+                try:
+                    if source:
+                        playlist = server.open_url(source)
+                    else:
+                        file_path = server.receive_upload(self.rfile, self.headers.get("Content-Length"))
+                except ConversionError as error:
+                    self.send_error_json(error.status, str(error))
+                    return
+
+                try:
+                    self.stream_conversion(playlist.stream() if playlist else file_path, source or "upload",
+                                           format, None if compact else 4)
+                finally:
+                    if playlist:
+                        playlist.close()
+                    else:
+                        os.remove(file_path)
+
+            def stream_conversion(self, source, label, format, indent):
+                content_type = _CONTENT_TYPES[format]
+                self.send_response(200)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                body = _ChunkedResponse(self.wfile)
+                start = time.perf_counter()
+                try:
+                    count = server.convert(source, body, format=format, indent=indent)
+                    body.finish()
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+                    print(f"[servidor] O cliente desconectou durante a conversão de {label}.")
+                    return
+                except Exception as error:
+                    # Sem o bloco final, o cliente sabe que a resposta está incompleta
+                    self.close_connection = True
+                    print(f"[servidor] Erro na conversão de {label}: {error}")
+                    return
+                print(f"[servidor] {count} entradas de {label} convertidas em {time.perf_counter() - start:.2f}s.")
+
+        return Handler
@@ -0,0 +1,64 @@
+import os
+import threading
+import traceback
+from config.settings import WATCH_INTERVAL
+
+class PlaylistWatcher:
+    """
+    Observa um arquivo M3U e chama on_change sempre que ele muda.
+
+    A verificação é feita por os.stat (data de modificação, tamanho e inode) a cada
+    `interval` segundos, sem dependências externas, e funciona também quando a lista
+    é substituída por outro arquivo (os.replace). Uma mudança só é entregue depois que
+    o arquivo fica igual em duas verificações seguidas, para não converter uma lista
+    que ainda está sendo copiada.
+
+    Uso:
+        watcher = PlaylistWatcher("lista.m3u", lambda: converter("lista.m3u"))
+        watcher.run()  # Até Ctrl+C ou stop()
+    """
+    def __init__(self, file_path, on_change, interval=WATCH_INTERVAL):
+        self.file_path = file_path
+        self.on_change = on_change
+        self.interval = max(0.1, interval)
+        self.stop_event = threading.Event()
+        self.changes = 0
+
+    def _signature(self):
+        """
+        Identifica a versão atual do arquivo (None se ele não existir no momento)
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def run(self):
+        """
+        Observa o arquivo até stop() ser chamado. A versão presente no início é
+        considerada já convertida
+        """
+        converted = self._signature()
+        candidate = None
+        while not self.stop_event.wait(self.interval):
+            current = self._signature()
+            if current is None or current == converted:
+                candidate = None
+                continue
+            if current != candidate:
+                # Ainda pode estar sendo escrito: confirma na próxima verificação
+                candidate = current
+                continue
+
+            converted, candidate = current, None
+            self.changes += 1
+            try:
+                self.on_change()
+            except Exception:
+                # Uma conversão com erro não encerra a observação
+                print(f"Erro ao converter '{self.file_path}':")
+                traceback.print_exc()
+
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,19 @@
+import asyncio
+
+async def run_blocking(blocking, function, *args):
+    """
+    Executa uma chamada que pode bloquear (ex: consulta ao cache em SQLite) no
+    executor padrão do laço de eventos, sem travar as outras corrotinas.
+    Chamadas que só acessam a memória (blocking=False) são feitas diretamente.
+    
+    Args:
+        blocking (bool): Se a chamada faz E/S (ex: o atributo blocking do backend do cache)
+        function: Função a ser executada
+        *args: Argumentos da função
+        
+    Returns:
+        O retorno da função
+    """
+    if not blocking:
+        return function(*args)
+    return await asyncio.get_running_loop().run_in_executor(None, function, *args)
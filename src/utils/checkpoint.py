@@ -0,0 +1,151 @@
+import json
+import os
+import time
+from collections import deque
+from config.settings import CHECKPOINT_INTERVAL
+
+class JobCheckpoint:
+    """
+    Checkpoint de uma conversão retomável (modo --job / --resume).
+
+    A cada `interval` entradas concluídas, grava no disco a posição (em bytes) do
+    arquivo M3U logo após a última entrada concluída, o tamanho do arquivo parcial
+    de saída e o número de entradas escritas. Antes disso, o arquivo parcial passa
+    por fsync e os caches são salvos, então as buscas já feitas sobrevivem à queda.
+
+    Ao retomar, o arquivo parcial é truncado no tamanho do checkpoint e a leitura
+    continua da posição salva: o que foi escrito depois do checkpoint é descartado
+    e refeito, de forma que cada entrada aparece exatamente uma vez na saída.
+    As entradas que estavam em andamento são lidas de novo (e em geral resolvidas
+    pelo cache), então não é preciso guardar as chaves pendentes.
+
+    Uso:
+        checkpoint = JobCheckpoint("saida.json.checkpoint.json", "lista.m3u", exporter)
+        entries = checkpoint.track(parser.iter_positioned("lista.m3u", checkpoint.offset))
+        processor.process_entries(entries, exporter, on_collect=checkpoint.collected)
+        checkpoint.finish()
+    """
+    VERSION = 1
+
+    def __init__(self, file_path, input_path, exporter, on_save=None, interval=CHECKPOINT_INTERVAL):
+        self.file_path = file_path
+        self.input_path = input_path
+        self.exporter = exporter
+        # Chamada antes de cada checkpoint (ex: MediaProcessor.save_caches)
+        self.on_save = on_save
+        self.interval = max(1, interval)
+        # Posição do fim de cada entrada lida e ainda não concluída, na ordem do arquivo
+        self.offsets = deque()
+        self.offset = 0
+        self.entries = 0
+        self.since_save = 0
+        self.saved = 0
+
+    def _input_identity(self):
+        """
+        Identifica a versão do arquivo de entrada (caminho, tamanho e data de modificação)
+        """
+        stat = os.stat(self.input_path)
+        return {"path": os.path.abspath(self.input_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def load(self):
+        """
+        Carrega o último checkpoint
+
+        Returns:
+            dict: Estado salvo, ou None se não houver checkpoint válido
+        """
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            print(f"Checkpoint não encontrado em: {self.file_path}. A conversão começará do início.")
+            return None
+        except json.JSONDecodeError:
+            print(f"Erro ao decodificar o checkpoint: {self.file_path}. A conversão começará do início.")
+            return None
+        if state.get("version") != self.VERSION:
+            print(f"Checkpoint em formato desconhecido: {self.file_path}. A conversão começará do início.")
+            return None
+        return state
+
+    def validate(self, state, format, indent):
+        """
+        Verifica se o checkpoint pode ser retomado com a entrada e a saída atuais
+
+        Returns:
+            str: Motivo pelo qual não pode ser retomado, ou None
+        """
+        if state["input"] != self._input_identity():
+            return f"O arquivo de entrada '{self.input_path}' mudou desde o checkpoint."
+        if state["format"] != format or state["indent"] != indent:
+            return "O formato de saída é diferente do usado na execução interrompida."
+        try:
+            partial_size = os.path.getsize(self.exporter.partial_path)
+        except FileNotFoundError:
+            return f"O arquivo parcial '{self.exporter.partial_path}' não existe mais."
+        if partial_size < state["partial_size"]:
+            return f"O arquivo parcial '{self.exporter.partial_path}' é menor que o registrado no checkpoint."
+        return None
+
+    def restore(self, state):
+        """
+        Retoma a partir do estado salvo: reabre o arquivo parcial e posiciona a leitura
+        """
+        self.exporter.resume(state["partial_size"], state["written"])
+        self.offset = state["offset"]
+        self.entries = state["entries"]
+
+    def track(self, positioned_entries):
+        """
+        Repassa as entradas de M3UParser.iter_positioned guardando a posição de cada uma
+        """
+        for entry, end_offset in positioned_entries:
+            self.offsets.append(end_offset)
+            yield entry
+
+    def collected(self, entry):
+        """
+        Registra a conclusão da próxima entrada (chamado na ordem do arquivo)
+        """
+        self.offset = self.offsets.popleft()
+        self.entries += 1
+        self.since_save += 1
+        if self.since_save >= self.interval:
+            self.save()
+
+    def save(self):
+        """
+        Grava o checkpoint de forma atômica, depois de garantir que a saída e os caches estão no disco
+        """
+        partial_size = self.exporter.partial_size()
+        if self.on_save:
+            self.on_save()
+
+        state = {
+            "version": self.VERSION,
+            "input": self._input_identity(),
+            "format": self.exporter.format,
+            "indent": self.exporter.indent,
+            "offset": self.offset,
+            "entries": self.entries,
+            "written": self.exporter.count,
+            "partial_size": partial_size,
+            "in_flight": len(self.offsets),
+            "saved_at": time.time(),
+        }
+        temp_file = f"{self.file_path}.temp"
+        with open(temp_file, 'w', encoding='utf-8') as file:
+            json.dump(state, file, ensure_ascii=False, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file, self.file_path)
+        self.since_save = 0
+        self.saved += 1
+
+    def finish(self):
+        """
+        Remove o checkpoint depois que a conversão terminou com sucesso
+        """
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
@@ -0,0 +1,219 @@
+import os
+import sqlite3
+from src.utils import serialization
+
+# Cabeçalho de todo arquivo do SQLite
+_SQLITE_MAGIC = b"SQLite format 3\x00"
+
+class IncrementalManifest:
+    """
+    Manifesto do modo incremental: guarda, para cada entrada da última execução,
+    o hash do conteúdo (linha #EXTINF + URL), a URL e os IMDb IDs exportados.
+
+    Na execução seguinte, as entradas com o mesmo hash reaproveitam o resultado
+    anterior e só as entradas novas ou alteradas passam pela busca de IMDb IDs.
+
+    O manifesto é um banco SQLite: o da execução anterior é consultado no disco e o
+    novo é gravado em um arquivo temporário, que substitui o anterior em save().
+    A memória usada não cresce com o tamanho da lista.
+    """
+    def __init__(self, file_path, previous_path=None, commit_every=10000):
+        """
+        Args:
+            file_path (str): Arquivo do manifesto
+            previous_path (str, optional): Manifesto da execução anterior, se estiver em
+                outro arquivo (ex: o manifesto JSON das versões anteriores)
+            commit_every (int): Entradas gravadas entre dois commits
+        """
+        self.file_path = file_path
+        self.temp_file = f"{file_path}.temp"
+        self.commit_every = commit_every
+        self.pending = 0
+
+        # Um manifesto temporário de uma execução interrompida é descartado
+        self._remove(self.temp_file)
+        self.connection = sqlite3.connect(self.temp_file)
+        # O arquivo temporário só vale depois de save(); durabilidade não importa até lá
+        self.connection.execute("PRAGMA journal_mode=OFF")
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.execute("PRAGMA cache_size=-65536")
+        self._create_tables(self.connection)
+        # Manifesto anterior convertido do formato JSON (removido em save())
+        self.converted_file = None
+        self.has_previous = self._attach_previous(previous_path or file_path)
+        # URLs removidas, contadas em save() antes de o manifesto anterior ser substituído
+        self.removed_urls = None
+
+        self.added = 0
+        self.changed = 0
+        self.unchanged = 0
+
+    @staticmethod
+    def _create_tables(connection):
+        # imdb_id é NULL enquanto a entrada não foi exportada (ou se não foi encontrada)
+        connection.execute("CREATE TABLE entries (fingerprint TEXT PRIMARY KEY, url TEXT NOT NULL, "
+                           "imdb_id TEXT, episode_imdb_id TEXT) WITHOUT ROWID")
+        connection.execute("CREATE INDEX entries_url ON entries (url)")
+
+    @staticmethod
+    def _remove(file_path):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+
+    def _attach_previous(self, file_path):
+        """
+        Anexa o manifesto da execução anterior como o esquema "previous"
+
+        Returns:
+            bool: True se havia um manifesto anterior válido
+        """
+        try:
+            with open(file_path, 'rb') as file:
+                magic = file.read(len(_SQLITE_MAGIC))
+        except FileNotFoundError:
+            print(f"Manifesto não encontrado em: {file_path}. Todas as entradas serão processadas.")
+            return False
+
+        print(f"Carregando manifesto incremental de: {file_path}")
+        if magic != _SQLITE_MAGIC:
+            file_path = self._convert_json(file_path)
+            if file_path is None:
+                return False
+        try:
+            self.connection.execute("ATTACH DATABASE ? AS previous", (file_path,))
+            self.connection.execute("SELECT 1 FROM previous.entries LIMIT 1").fetchall()
+        except sqlite3.DatabaseError:
+            print(f"Erro ao ler o manifesto: {file_path}. Todas as entradas serão processadas.")
+            self._detach_previous()
+            return False
+        return True
+
+    def _convert_json(self, file_path):
+        """
+        Converte o manifesto JSON das versões anteriores em um banco temporário
+
+        Returns:
+            str: Caminho do banco convertido, ou None se o JSON for inválido
+        """
+        try:
+            with open(file_path, 'rb') as file:
+                entries = serialization.loads(file.read()).get("entries", {})
+        except ValueError:
+            print(f"Erro ao decodificar o manifesto: {file_path}. Todas as entradas serão processadas.")
+            return None
+
+        self.converted_file = f"{self.file_path}.previous.temp"
+        self._remove(self.converted_file)
+        connection = sqlite3.connect(self.converted_file)
+        try:
+            self._create_tables(connection)
+            connection.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                ((fingerprint, record["url"], (record.get("output") or {}).get("imdb_id"),
+                  (record.get("output") or {}).get("episode_imdb_id"))
+                 for fingerprint, record in entries.items())
+            )
+            connection.commit()
+        finally:
+            connection.close()
+        return self.converted_file
+
+    def _detach_previous(self):
+        try:
+            self.connection.execute("DETACH DATABASE previous")
+        except sqlite3.OperationalError:
+            pass
+        if self.converted_file:
+            self._remove(self.converted_file)
+            self.converted_file = None
+
+    def prepare(self, entries):
+        """
+        Compara as entradas com o manifesto anterior. As inalteradas que já tinham
+        IMDb ID recebem o resultado anterior (com o IMDb ID preenchido, o
+        MediaProcessor não as busca de novo); as demais seguem para a busca.
+
+        Args:
+            entries: Iterável de MediaEntry com o fingerprint preenchido
+        """
+        for entry in entries:
+            previous = None
+            if self.has_previous:
+                previous = self.connection.execute(
+                    "SELECT imdb_id, episode_imdb_id FROM previous.entries WHERE fingerprint = ?", (entry.fingerprint,)
+                ).fetchone()
+
+            if previous is None:
+                if self.has_previous and self.connection.execute(
+                        "SELECT 1 FROM previous.entries WHERE url = ? LIMIT 1", (entry.url,)).fetchone():
+                    self.changed += 1
+                else:
+                    self.added += 1
+            else:
+                self.unchanged += 1
+                if previous[0]:
+                    # Mesmo hash, mesma entrada lida: só o resultado da busca é reaproveitado,
+                    # mantendo o grupo e o tvg-id usados pelas saídas M3U e particionadas
+                    entry.set_imdb_id(previous[0])
+                    entry.set_episode_imdb_id(previous[1])
+
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries (fingerprint, url) VALUES (?, ?)", (entry.fingerprint, entry.url)
+            )
+            self._written()
+            yield entry
+
+    def record(self, entry):
+        """
+        Registra no novo manifesto o resultado de uma entrada exportada
+        """
+        if entry.fingerprint is None:
+            return
+        self.connection.execute(
+            "UPDATE entries SET imdb_id = ?, episode_imdb_id = ? WHERE fingerprint = ?",
+            (entry.imdb_id, entry.episode_imdb_id, entry.fingerprint)
+        )
+        self._written()
+
+    def _written(self):
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.connection.commit()
+            self.pending = 0
+
+    @property
+    def removed(self):
+        """
+        Número de URLs da execução anterior que não estão mais na lista
+        """
+        if self.removed_urls is not None:
+            return self.removed_urls
+        if not self.has_previous:
+            return 0
+        return self.connection.execute(
+            "SELECT COUNT(DISTINCT url) FROM previous.entries AS old "
+            "WHERE NOT EXISTS (SELECT 1 FROM main.entries WHERE main.entries.url = old.url)"
+        ).fetchone()[0]
+
+    def summary(self):
+        """
+        Resumo das diferenças em relação à execução anterior
+        """
+        return {
+            "added": self.added,
+            "changed": self.changed,
+            "removed": self.removed,
+            "unchanged": self.unchanged,
+        }
+
+    def save(self):
+        """
+        Salva o novo manifesto de forma atômica (arquivo temporário + rename)
+        """
+        self.removed_urls = self.removed
+        self.connection.commit()
+        self._detach_previous()
+        self.connection.close()
+        os.replace(self.temp_file, self.file_path)
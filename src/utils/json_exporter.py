@@ -1,19 +1,272 @@
 import json
+import os
+from src.models.media_entry import MediaEntry
+from src.utils import serialization
+from config.settings import EXPORT_BUFFER_SIZE, GZIP_LEVEL, ZSTD_LEVEL
+
+class StreamingJSONExporter:
+    """
+    Exportador que grava as entradas no disco à medida que são resolvidas.
+
+    Suporta array JSON (com ou sem indentação), NDJSON (um objeto por linha) e
+    M3U anotado (a lista de volta, só com as entradas resolvidas e o IMDb ID no tvg-id).
+    O conteúdo é escrito em "<arquivo>.partial", com fsync a cada fsync_every
+    entradas, e só substitui o arquivo final quando close() é chamado.
+
+    Arquivos terminados em .gz ou .zst são compactados (gzip ou zstd) à medida que
+    são escritos; a cada fsync o bloco compactado atual é encerrado.
+
+    Se stream for informado (ex: a resposta do modo servidor), as entradas são
+    escritas nele, sem arquivo parcial: a cada fsync_every entradas é feito apenas flush.
+
+    Uso:
+        with StreamingJSONExporter("output.json") as exporter:
+            for entry in entries:
+                exporter.write(entry)
+    """
+    FORMATS = ("json", "ndjson", "m3u")
+    # Formato indicado pela extensão do arquivo (sem a extensão de compactação)
+    EXTENSIONS = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".m3u": "m3u", ".m3u8": "m3u"}
+
+    def __init__(self, file_path, format="json", indent=4, fsync_every=1000, on_write=None, stream=None,
+                 buffer_size=EXPORT_BUFFER_SIZE, compression=None):
+        if format not in self.FORMATS:
+            raise ValueError(f"Formato de exportação desconhecido: {format}")
+        # Sem compactação explícita, ela é detectada pela extensão (.gz ou .zst)
+        self.compression = compression or (None if stream else serialization.compression_for(file_path))
+        serialization.require_compression(self.compression)
+        self.file_path = file_path
+        self.partial_path = f"{file_path}.partial" if file_path else None
+        # Destino já aberto em modo texto; não é fechado pelo exportador
+        self.stream = stream
+        # Buffer de escrita do arquivo parcial (cada exportador tem o seu)
+        self.buffer_size = buffer_size
+        self.format = format
+        self.indent = indent
+        self.fsync_every = fsync_every
+        # Função chamada com cada entrada escrita (ex: IncrementalManifest.record)
+        self.on_write = on_write
+        self.file = None
+        self.count = 0
+
+    @classmethod
+    def detect_format(cls, file_path, default="json"):
+        """
+        Formato de saída indicado pela extensão do arquivo
+        (ex: "saida.ndjson.zst" -> "ndjson", "saida.m3u" -> "m3u")
+        """
+        extension = os.path.splitext(serialization.strip_compression(file_path))[1].lower()
+        return cls.EXTENSIONS.get(extension, default)
+
+    def __enter__(self):
+        # Um exportador retomado com resume() já está aberto
+        if self.file is None:
+            self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        # Em caso de erro, o arquivo parcial é mantido para inspeção e o final não é alterado
+        self.close(finalize=exc_type is None)
+
+    def open(self):
+        """
+        Abre o arquivo parcial e escreve o início do array (JSON) ou o cabeçalho (M3U)
+        """
+        if self.stream is not None:
+            self.file = self.stream
+        else:
+            level = GZIP_LEVEL if self.compression == "gzip" else ZSTD_LEVEL
+            self.file = serialization.open_text_writer(self.partial_path, self.compression, self.buffer_size, level)
+        self.count = 0
+        if self.format == "json":
+            self.file.write("[")
+        elif self.format == "m3u":
+            self.file.write("#EXTM3U\n")
+
+    def resume(self, partial_size, count):
+        """
+        Reabre o arquivo parcial de uma execução interrompida, descartando o que
+        foi escrito depois do último checkpoint, e continua a partir dele
+
+        Args:
+            partial_size (int): Tamanho em bytes do arquivo parcial no checkpoint
+            count (int): Número de entradas escritas até o checkpoint
+
+        Raises:
+            ValueError: Saída compactada (o fluxo compactado não pode ser cortado e continuado)
+        """
+        if self.compression:
+            raise ValueError("Uma saída compactada não pode ser retomada")
+        self.file = open(self.partial_path, 'r+', encoding='utf-8', buffering=self.buffer_size)
+        self.file.truncate(partial_size)
+        self.file.seek(0, os.SEEK_END)
+        self.count = count
+
+    def suspend(self):
+        """
+        Fecha o arquivo parcial sem finalizá-lo, liberando o descritor e o buffer;
+        reopen() continua a escrita de onde parou
+        """
+        self.file.close()
+        self.file = None
+
+    def reopen(self):
+        """
+        Reabre no modo de acréscimo o arquivo parcial fechado por suspend()
+
+        Raises:
+            ValueError: Saída compactada (o fluxo compactado não pode ser continuado)
+        """
+        if self.compression:
+            raise ValueError("Uma saída compactada não pode ser reaberta")
+        self.file = open(self.partial_path, 'a', encoding='utf-8', buffering=self.buffer_size)
+
+    def partial_size(self):
+        """
+        Grava no disco o que foi escrito até aqui e retorna o tamanho do arquivo parcial
+        """
+        self.checkpoint()
+        return os.fstat(self.file.fileno()).st_size
+
+    def _serialize(self, data):
+        """
+        Serializa uma entrada no formato configurado
+        """
+        if self.format == "ndjson":
+            return serialization.dumps(data) + "\n"
+
+        prefix = "," if self.count else ""
+        if self.indent is None:
+            return f"{prefix}\n" + serialization.dumps(data)
+
+        # Mantém o mesmo formato de json.dump(..., indent=N) para a lista inteira
+        padding = " " * self.indent
+        item = json.dumps(data, indent=self.indent, ensure_ascii=False)
+        return f"{prefix}\n{padding}" + item.replace("\n", f"\n{padding}")
+
+    @staticmethod
+    def _m3u_attribute(value):
+        return str(value).replace('"', "'")
+
+    def _serialize_m3u(self, entry):
+        """
+        Serializa uma entrada como um par de linhas #EXTINF + URL. O tvg-id recebe o
+        IMDb ID (o da série, nos episódios) e o nome volta a ter o SxxEyy
+        """
+        if isinstance(entry, dict):
+            entry = MediaEntry.from_dict(entry)
+        return self._m3u_record(entry.name, entry.url, entry.group_title, entry.imdb_id or entry.tvg_id,
+                                entry.season if entry.is_series else None, entry.episode)
+
+    def _m3u_record(self, name, url, group_title, tvg_id, season=None, episode=None):
+        """
+        Par de linhas #EXTINF + URL a partir dos campos (season=None para filmes)
+        """
+        if season is not None:
+            name = f"{name} S{season:02d}E{episode:02d}"
+        attribute = self._m3u_attribute
+        return (f'#EXTINF:-1 tvg-id="{attribute(tvg_id or "")}" '
+                f'tvg-name="{attribute(name)}" group-title="{attribute(group_title)}",{name}\n{url}\n')
+
+    def write(self, entry, data=None):
+        """
+        Escreve uma entrada (MediaEntry ou dicionário)
+
+        Args:
+            entry: Entrada a ser escrita
+            data (dict, optional): entry.to_dict() já calculado (ex: pelo MultiExporter)
+        """
+        if self.format == "m3u":
+            self.file.write(self._serialize_m3u(entry))
+        else:
+            if data is None:
+                data = entry if isinstance(entry, dict) else entry.to_dict()
+            self.file.write(self._serialize(data))
+        self.count += 1
+
+        if self.on_write:
+            self.on_write(entry)
+
+        if self.fsync_every and self.count % self.fsync_every == 0:
+            self.checkpoint()
+
+    def write_batch(self, batch, indices=None, rows=None):
+        """
+        Escreve as entradas de um MediaEntryBatch, serializando direto das colunas
+        sem criar um MediaEntry por entrada
+
+        Args:
+            batch (MediaEntryBatch): Lote com as colunas de IMDb ID preenchidas
+            indices (list, optional): Índices das entradas a escrever, em ordem (padrão: todas)
+            rows (list, optional): batch.to_dict() de cada índice, já calculado (ex: pelo MultiExporter)
+        """
+        if indices is None:
+            indices = range(len(batch))
+        for position, index in enumerate(indices):
+            self.write_row(batch, index, rows[position] if rows is not None else None)
+
+    def write_row(self, batch, index, data=None):
+        """
+        Escreve a entrada do índice informado de um MediaEntryBatch
+        """
+        if self.format == "m3u":
+            self.file.write(self._m3u_record(
+                batch.names[index], batch.urls[index], batch.group_title(index),
+                batch.imdb_ids[index] or batch.tvg_ids[index],
+                batch.seasons[index] if batch.is_series(index) else None, batch.episodes[index],
+            ))
+        else:
+            self.file.write(self._serialize(data if data is not None else batch.to_dict(index)))
+        self.count += 1
+
+        if self.on_write:
+            self.on_write(batch.entry(index))
+
+        if self.fsync_every and self.count % self.fsync_every == 0:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """
+        Garante que tudo o que foi escrito até aqui está no disco (ou enviado ao stream)
+        """
+        self.file.flush()
+        if self.stream is None:
+            os.fsync(self.file.fileno())
+
+    def close(self, finalize=True):
+        """
+        Fecha o arquivo e, se finalize=True, move o arquivo parcial para o destino
+        de forma atômica
+        """
+        if self.file is None:
+            return
+
+        if finalize and self.format == "json":
+            self.file.write("\n]" if self.count else "]")
+        self.checkpoint()
+        if self.stream is not None:
+            self.file = None
+            return
+        self.file.close()
+        self.file = None
+
+        if finalize:
+            os.replace(self.partial_path, self.file_path)
 
 class JSONExporter:
     """
     Classe para exportar entradas para um arquivo JSON
     """
     @staticmethod
-    def export_to_file(entries, file_path):
-        """
-        Exporta uma lista de entradas para um arquivo JSON
-        """
-        # Converte as entradas para dicionários
-        json_entries = [entry.to_dict() for entry in entries]
-        
-        # Salva no arquivo
-        with open(file_path, 'w', encoding='utf-8') as file:
-            json.dump(json_entries, file, indent=4, ensure_ascii=False)
-            
-        return len(json_entries) 
\ No newline at end of file
+    def export_to_file(entries, file_path, format="json", indent=4):
+        """
+        Exporta as entradas para um arquivo JSON (ou NDJSON).
+
+        As entradas são escritas uma a uma conforme o iterável é consumido,
+        então geradores podem ser passados sem que a lista seja montada em memória.
+        """
+        with StreamingJSONExporter(file_path, format=format, indent=indent) as exporter:
+            for entry in entries:
+                exporter.write(entry)
+
+        return exporter.count
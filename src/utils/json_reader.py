@@ -0,0 +1,90 @@
+import io
+import json
+from src.utils import serialization
+
+class JSONReader:
+    """
+    Leitor incremental de arquivos JSON (array de objetos) e NDJSON.
+
+    Os registros são decodificados um a um a partir de blocos do arquivo,
+    então o consumo de memória não depende do tamanho da entrada. Arquivos
+    compactados com gzip ou zstd são detectados pela assinatura e lidos da mesma forma.
+    """
+    CHUNK_SIZE = 1 << 16
+
+    @staticmethod
+    def iter_records(file_path, chunk_size=None):
+        """
+        Gera os registros de um arquivo, detectando o formato pelo primeiro caractere:
+        "[" indica um array JSON; qualquer outro, NDJSON (um objeto por linha)
+
+        Args:
+            file_path (str): Caminho do arquivo
+            chunk_size (int): Tamanho dos blocos lidos do disco
+
+        Yields:
+            dict: Cada registro do arquivo, na ordem em que aparece
+        """
+        chunk_size = chunk_size or JSONReader.CHUNK_SIZE
+        with io.TextIOWrapper(serialization.open_binary_reader(file_path), encoding='utf-8-sig') as file:
+            buffer = file.read(chunk_size)
+            if buffer.lstrip()[:1] == "[":
+                yield from JSONReader._iter_array(file, buffer, chunk_size)
+            else:
+                yield from JSONReader._iter_ndjson(file, buffer)
+
+    @staticmethod
+    def _iter_ndjson(file, buffer):
+        """
+        Decodifica um objeto por linha, ignorando linhas em branco
+        """
+        # O primeiro bloco já foi lido para detectar o formato; completa a sua última linha
+        lines = (buffer + file.readline()).splitlines()
+        for line in lines:
+            if line.strip():
+                yield serialization.loads(line)
+        for line in file:
+            if line.strip():
+                yield serialization.loads(line)
+
+    @staticmethod
+    def _iter_array(file, buffer, chunk_size):
+        """
+        Decodifica os elementos de um array JSON com JSONDecoder.raw_decode,
+        lendo novos blocos sempre que um elemento fica incompleto no buffer
+        """
+        decoder = json.JSONDecoder()
+        position = buffer.index("[") + 1
+        eof = False
+
+        while True:
+            # Pula espaços e vírgulas entre os elementos
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+
+            if position >= len(buffer):
+                if eof:
+                    raise ValueError("Array JSON não terminado")
+                buffer, position = buffer[position:], 0
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+
+            if buffer[position] == "]":
+                return
+
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Elemento cortado no fim do bloco: lê mais e tenta novamente
+                if eof:
+                    raise
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+
+            yield record
+            position = end
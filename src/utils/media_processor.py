@@ -1,73 +1,841 @@
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import atexit
+import itertools
+import threading
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 from src.api.tmdb_client import TMDbClient
+from src.api.offline_resolver import OfflineResolver
+from src.api.throttle import ThrottleController
 from src.cache.cache_manager import CacheManager
-from config.settings import MAX_WORKERS
+from src.cache.lru_cache import PersistentLRUCache
+from src.cache.writer import CacheWriter
+from src.utils.blocking import run_blocking
+from src.utils.metrics import RunMetrics
+from src.utils.single_flight import SingleFlight
+from src.utils.text_cleaner import TextCleaner
+from src.utils.title_matcher import TitleIndex
+from config.settings import (
+    MAX_WORKERS, MAX_PENDING_ENTRIES, ASYNC_CONCURRENCY, DEFAULT_LANGUAGE,
+    SEARCH_CACHE_NAME, EXTERNAL_IDS_CACHE_NAME, SEASON_CACHE_NAME, TITLE_MATCHING, NEAR_DUPLICATE_MIN_SIMILARITY,
+    TITLE_INDEX_MAX_TITLES,
+    SERIES_EPISODE_IDS
+)
 
 class MediaProcessor:
     """
     Classe para processar entradas de mídia e buscar os IMDb IDs
     """
-    def __init__(self, verbose=False):
-        self.tmdb_client = TMDbClient(verbose=verbose)
-        self.cache_manager = CacheManager()
+    def __init__(self, verbose=False, offline_index=None, metrics=None, progress=True):
+        # Métricas da execução (tempos por etapa, latência das requisições, cache)
+        self.metrics = metrics or RunMetrics()
+        # Controlador de taxa único para os modos síncrono e assíncrono
+        self.throttle = ThrottleController()
+        # Thread única que grava todos os caches no disco, fora das threads de busca
+        self.cache_writer = CacheWriter()
+        # Caches de segundo nível, compartilhados pelos modos síncrono e assíncrono
+        self.search_cache = PersistentLRUCache(SEARCH_CACHE_NAME, writer=self.cache_writer)
+        self.external_ids_cache = PersistentLRUCache(EXTERNAL_IDS_CACHE_NAME, writer=self.cache_writer)
+        self.season_cache = PersistentLRUCache(SEASON_CACHE_NAME, writer=self.cache_writer)
+        self.tmdb_client = TMDbClient(verbose=verbose, throttle=self.throttle,
+                                      search_cache=self.search_cache,
+                                      external_ids_cache=self.external_ids_cache,
+                                      metrics=self.metrics, season_cache=self.season_cache)
+        self.cache_manager = CacheManager(writer=self.cache_writer)
+        # Grava os caches e encerra a thread de gravação ao sair do programa
+        atexit.register(self.close)
+        # Índice offline dos dumps do TMDb/IMDb, consultado antes da API (None se não existir)
+        self.offline_resolver = OfflineResolver.open_default(offline_index)
+        # Índice de trigramas dos títulos já resolvidos, para variações quase idênticas do mesmo nome.
+        # Só é montado na primeira busca que não está no cache (ver _get_title_index)
+        self.title_index = None
+        self.title_index_mutex = threading.Lock()
+        self.single_flight = SingleFlight()
         self.verbose = verbose
-    
-    def _process_entry(self, entry):
+        # Barra de progresso no terminal (desativada no modo servidor, com várias conversões simultâneas)
+        self.progress = progress
+        
+        # Contadores usados para calcular as requisições por título resolvido
+        self.stats_mutex = threading.Lock()
+        self.api_lookups = 0
+        self.resolved_titles = 0
+        self.tvg_id_shortcuts = 0
+        self.near_duplicates = 0
+        self.episode_lookups = 0
+        self.episode_ids = 0
+
+    def _build_title_index(self):
+        """
+        Monta o índice de trigramas com os registros resolvidos do cache (no máximo
+        TITLE_INDEX_MAX_TITLES)
+        """
+        title_index = TitleIndex(NEAR_DUPLICATE_MIN_SIMILARITY)
+        for key, record in itertools.islice(self.cache_manager.iter_resolved(), TITLE_INDEX_MAX_TITLES):
+            # A chave termina com o nome normalizado, o mesmo usado nas consultas ao índice
+            normalized_name = key.split("|", 3)[-1]
+            title_index.add(normalized_name, record.get("is_series"), record.get("year"),
+                            (record.get("tmdb_id"), record["imdb_id"]))
+        return title_index
+
+    def _get_title_index(self):
         """
-        Processa uma entrada de mídia para buscar o IMDb ID
+        Índice de trigramas, montado na primeira chamada: uma execução em que todos os
+        títulos estão no cache (ou o modo servidor, até a primeira busca) não lê o cache inteiro
+
+        Returns:
+            TitleIndex: O índice, ou None se TITLE_MATCHING estiver desativado
+        """
+        if self.title_index is None and TITLE_MATCHING:
+            with self.title_index_mutex:
+                if self.title_index is None:
+                    self.title_index = self._build_title_index()
+        return self.title_index
+
+    def _near_duplicate(self, name, lookup_key):
         """
-        name = entry.name
-        is_series = entry.is_series
+        Procura no índice de trigramas um título já resolvido quase idêntico ao nome
+
+        Returns:
+            tuple: (TMDb ID, IMDb ID) ou None
+        """
+        title_index = self._get_title_index()
+        if title_index is None:
+            return None
+        match = title_index.lookup(lookup_key[0], lookup_key[1], lookup_key[2])
+        if match is None:
+            return None
+        with self.stats_mutex:
+            self.near_duplicates += 1
+        if self.verbose:
+            print(f"Reaproveitando título parecido já resolvido (similaridade {match[0]:.2f}) para: {name}")
+        return match[1]
+
+    def _remember(self, key, name, lookup_key, tmdb_id, imdb_id):
+        """
+        Grava o resultado no cache e, se encontrado, no índice de trigramas (se ainda
+        não foi montado, o resultado entra nele a partir do cache)
+        """
+        normalized_name, is_series, year = lookup_key
+        self.cache_manager.set_record(key, name, is_series, year, DEFAULT_LANGUAGE, tmdb_id, imdb_id)
+        if imdb_id and self.title_index is not None:
+            self.title_index.add(normalized_name, is_series, year, (tmdb_id, imdb_id))
+
+    def _cached_record(self, name, lookup_key):
+        """
+        Obtém o registro válido (não expirado) do cache para a chave de busca
         
-        # Verifica se já temos o ID no cache
-        if self.cache_manager.has_id(name):
-            imdb_id = self.cache_manager.get_id(name)
-            if self.verbose:
+        Returns:
+            tuple: (Chave do cache, Registro válido ou None)
+        """
+        normalized_name, is_series, year = lookup_key
+        key = CacheManager.make_key(normalized_name, is_series, year, DEFAULT_LANGUAGE)
+        record = self.cache_manager.get_record(key, legacy_name=name)
+        
+        if record is None:
+            self.metrics.increment("record_cache_misses")
+            return key, None
+        if self.cache_manager.is_expired(record):
+            self.metrics.increment("record_cache_expired")
+            return key, None
+        self.metrics.increment("record_cache_hits" if record["imdb_id"] is not None else "record_cache_negative_hits")
+        
+        if self.verbose:
+            if record["imdb_id"] is not None:
                 print(f"Usando IMDb ID do cache para: {name}")
+            else:
+                # Se o ID no cache for None, significa que já buscamos e não encontramos
+                print(f"ID no cache é null para: {name}, já buscado anteriormente")
+        return key, record
+    
+    def _resolve(self, name, lookup_key):
+        """
+        Busca o IMDb ID de um nome, consultando primeiro o cache
+        
+        Args:
+            name (str): Nome usado na busca
+            lookup_key (tuple): Chave gerada por TextCleaner.lookup_key
             
-            # Se o ID no cache não for None, atualiza a entrada
-            if imdb_id is not None:
-                entry.set_imdb_id(imdb_id)
-                return entry
+        Returns:
+            str: IMDb ID se encontrado, None caso contrário
+        """
+        key, record = self._cached_record(name, lookup_key)
+        if record is not None:
+            return record["imdb_id"]
+        return self._resolve_uncached(key, name, lookup_key)
+
+    def _resolve_uncached(self, key, name, lookup_key):
+        """
+        Continuação de _resolve quando o cache não tem um registro válido: índice de
+        títulos resolvidos, índice offline e, por fim, a API
+
+        Args:
+            key (str): Chave do registro no cache (CacheManager.make_key)
+        """
+        is_series = lookup_key[1]
+
+        # Variação quase idêntica de um título já resolvido: nenhuma requisição
+        near_duplicate = self._near_duplicate(name, lookup_key)
+        if near_duplicate:
+            self._remember(key, name, lookup_key, *near_duplicate)
+            return near_duplicate[1]
+
+        # Tenta o índice offline; se ele só souber o TMDb ID, basta a consulta de IDs externos
+        offline = self._offline_lookup(name, lookup_key)
+        if offline:
+            tmdb_id, imdb_id = offline
+            if imdb_id is None:
+                imdb_id = self.tmdb_client.get_external_ids(tmdb_id, is_series)
+            if imdb_id:
+                self._remember(key, name, lookup_key, tmdb_id, imdb_id)
+                return imdb_id
+
+        # Busca o IMDb ID na API
+        tmdb_id, imdb_id = self.tmdb_client.resolve_ids(name, is_series)
+        self._count_lookup(imdb_id)
+
+        # Atualiza o cache em todos os casos, mesmo quando o ID não for encontrado
+        self._remember(key, name, lookup_key, tmdb_id, imdb_id)
+        return imdb_id
+
+    def _offline_lookup(self, name, lookup_key):
+        """
+        Consulta o índice offline, se houver
+
+        Returns:
+            tuple: (TMDb ID, IMDb ID) ou None se o índice não existe ou não tem uma resposta segura
+        """
+        if self.offline_resolver is None:
+            return None
+        result = self.offline_resolver.lookup(lookup_key)
+        if result and self.verbose:
+            print(f"Encontrado no índice offline: {name}")
+        return result
+
+    def _resolve_tvg_id(self, tvg_id, is_series):
+        """
+        Obtém o IMDb ID diretamente do tvg-id da lista, sem busca por nome
+        """
+        tmdb_id, imdb_id = self.tmdb_client.resolve_tvg_id(tvg_id, is_series)
+        with self.stats_mutex:
+            self.tvg_id_shortcuts += 1
+        return imdb_id
+
+    def _show_tmdb_id(self, lookup_key):
+        """
+        TMDb ID da série já resolvida, guardado no registro do cache
+        """
+        normalized_name, is_series, year = lookup_key
+        record = self.cache_manager.get_record(CacheManager.make_key(normalized_name, is_series, year, DEFAULT_LANGUAGE))
+        return record.get("tmdb_id") if record else None
+
+    def _resolve_episode(self, lookup_key, season, episode):
+        """
+        Busca o IMDb ID de um episódio de uma série já resolvida
+
+        Returns:
+            str: IMDb ID do episódio, ou None se a série não tem TMDb ID conhecido
+                (ex: registros antigos do cache) ou o episódio não foi encontrado
+        """
+        tmdb_id = self._show_tmdb_id(lookup_key)
+        if not tmdb_id:
+            return None
+        episode_imdb_id = self.tmdb_client.resolve_episode_id(tmdb_id, season, episode)
+        self._count_episode(episode_imdb_id)
+        return episode_imdb_id
+
+    def _count_episode(self, episode_imdb_id):
+        with self.stats_mutex:
+            self.episode_lookups += 1
+            if episode_imdb_id:
+                self.episode_ids += 1
+
+    def _count_lookup(self, imdb_id):
+        """
+        Registra uma resolução feita pela API
+        """
+        with self.stats_mutex:
+            self.api_lookups += 1
+            if imdb_id:
+                self.resolved_titles += 1
+
+    def lookup_stats(self):
+        """
+        Retorna as estatísticas de resolução, incluindo as requisições por título resolvido
+        """
+        requests = self.throttle.stats()["requests"]
+        with self.stats_mutex:
+            return {
+                "api_lookups": self.api_lookups,
+                "resolved_titles": self.resolved_titles,
+                "tvg_id_shortcuts": self.tvg_id_shortcuts,
+                "near_duplicates": self.near_duplicates,
+                "episode_lookups": self.episode_lookups,
+                "episode_ids": self.episode_ids,
+                "requests": requests,
+                "requests_per_resolved_title": round(requests / self.resolved_titles, 3) if self.resolved_titles else 0.0,
+            }
+
+    def report_sections(self):
+        """
+        Seções do relatório de métricas vindas dos outros componentes
+        (controle de taxa, resoluções, caches e índice offline)
+        """
+        records = {name: self.metrics.counter(f"record_cache_{name}")
+                   for name in ("hits", "negative_hits", "misses", "expired")}
+        lookups = sum(records.values())
+        records["hit_rate"] = round(records["hits"] / lookups, 4) if lookups else 0.0
+        records["negative_hit_rate"] = round(records["negative_hits"] / lookups, 4) if lookups else 0.0
+
+        sections = {
+            "throttle": self.throttle.stats(),
+            "lookups": self.lookup_stats(),
+            "cache_records": records,
+            "cache_search": self.search_cache.stats(),
+            "cache_external_ids": self.external_ids_cache.stats(),
+            "cache_seasons": self.season_cache.stats(),
+            "cache_writer": self.cache_writer.stats(),
+        }
+        if self.offline_resolver:
+            sections["offline_index"] = self.offline_resolver.stats()
+        return sections
+
+    def process_entries(self, entries, exporter=None, on_collect=None, executor=None):
+        """
+        Processa uma lista de entradas de mídia em paralelo
+        
+        Args:
+            entries: Iterável de MediaEntry
+            exporter (StreamingJSONExporter, optional): Se informado, cada entrada válida é
+                gravada no disco assim que é resolvida, em vez de acumulada em uma lista
+            on_collect (callable, optional): Chamada com cada entrada concluída, na ordem
+                original, depois que a entrada válida já foi entregue (ex: JobCheckpoint.collected)
+            executor (ThreadPoolExecutor, optional): Executor das buscas, compartilhado entre
+                várias chamadas simultâneas (ex: as conversões do servidor HTTP). Sem ele, cada
+                chamada cria o seu, com MAX_WORKERS threads
             
-            # Se o ID no cache for None, significa que já buscamos e não encontramos
-            # então retorna None para não incluir no resultado
-            if self.verbose:
-                print(f"ID no cache é null para: {name}, já buscado anteriormente")
+        Returns:
+            list: Entradas válidas, ou o número de entradas gravadas se houver exportador
+        """
+        if exporter is None:
+            return list(self.iter_processed(entries, on_collect, executor))
+        
+        for entry in self.iter_processed(entries, on_collect, executor):
+            with self.metrics.stage("export"):
+                exporter.write(entry)
+        return exporter.count
+
+    def iter_processed(self, entries, on_collect=None, executor=None):
+        """
+        Processa as entradas de forma preguiçosa, consumindo o iterável sob demanda
+        e gerando as entradas válidas na ordem original.
+
+        Entradas com a mesma chave de busca (nome normalizado, tipo e ano) compartilham
+        uma única consulta: a primeira dispara a busca e as demais aguardam o mesmo resultado.
+
+        O número de entradas em processamento é limitado por MAX_PENDING_ENTRIES,
+        de forma que o consumo de memória não cresce com o tamanho da lista.
+
+        Se on_collect for informado, ele é chamado com cada entrada concluída (válida
+        ou não), na ordem original e só depois que a entrada válida foi consumida.
+
+        Um executor informado é usado sem ser encerrado ao final.
+        """
+        total = len(entries) if hasattr(entries, '__len__') else None
+        entry_count = 0
+        lookup_count = 0
+
+        with (nullcontext(executor) if executor else ThreadPoolExecutor(max_workers=MAX_WORKERS)) as executor, \
+                tqdm(total=total, desc="Consultando TMDb", disable=not self.progress) as progress:
+            pending = deque()
+
+            for entry in entries:
+                with self.metrics.stage("dedupe"):
+                    future, created = self._submit_lookup(executor, entry)
+                pending.append((entry, future))
+                entry_count += 1
+                lookup_count += created
+                if not created and not entry.imdb_id:
+                    # A entrada aguarda uma busca já em andamento para a mesma chave
+                    self.metrics.increment("deduplicated_entries")
+
+                # Aguarda a entrada mais antiga quando a janela está cheia
+                if len(pending) >= MAX_PENDING_ENTRIES:
+                    collected, future = pending.popleft()
+                    result = self._collect(collected, future)
+                    progress.update(1)
+                    if result:
+                        yield result
+                    if on_collect:
+                        on_collect(collected)
+
+            while pending:
+                collected, future = pending.popleft()
+                result = self._collect(collected, future)
+                progress.update(1)
+                if result:
+                    yield result
+                if on_collect:
+                    on_collect(collected)
+
+        self.metrics.increment("entries_total", entry_count)
+        if self.verbose:
+            print(f"{entry_count} entradas resolvidas com {lookup_count} buscas distintas")
+
+        # Forçar o salvamento do cache ao final do processamento
+        self.save_caches()
+
+    def process_batches(self, batches, exporter, executor=None):
+        """
+        Processa lotes colunares (MediaEntryBatch), gravando-os com exporter.write_batch
+
+        As entradas respondidas sem nenhuma busca (registro válido no cache, tvg-id com
+        o IMDb ID e, nos episódios, a temporada já em cache) têm o IMDb ID preenchido
+        direto nas colunas do lote e são serializadas sem criar um MediaEntry. Só as
+        demais são materializadas e resolvidas como em process_entries, com a mesma
+        deduplicação; a ordem do arquivo é mantida.
+
+        Args:
+            batches: Iterável de MediaEntryBatch (ex: M3UParser.iter_batches)
+            exporter: StreamingJSONExporter ou MultiExporter
+            executor (ThreadPoolExecutor, optional): Executor das buscas (ver process_entries)
+
+        Returns:
+            int: Número de entradas gravadas
+        """
+        entry_count = 0
+        with (nullcontext(executor) if executor else ThreadPoolExecutor(max_workers=MAX_WORKERS)) as executor, \
+                tqdm(desc="Consultando TMDb", disable=not self.progress) as progress:
+            for batch in batches:
+                # Índice no lote -> (MediaEntry, Future) das entradas que precisam de busca
+                lookups = {}
+                # Buscas por nome já agendadas neste lote (chave de busca -> Future)
+                scheduled = {}
+                for index in range(len(batch)):
+                    with self.metrics.stage("dedupe"):
+                        answered = self._answer_row(batch, index, executor, scheduled)
+                    if answered is not True:
+                        lookups[index] = answered
+
+                # Trechos contíguos de entradas respondidas vão direto das colunas para a saída
+                run = []
+                for index in range(len(batch)):
+                    lookup = lookups.get(index)
+                    if lookup is None:
+                        if batch.imdb_ids[index]:
+                            run.append(index)
+                        continue
+                    if run:
+                        with self.metrics.stage("export"):
+                            exporter.write_batch(batch, run)
+                        run = []
+                    result = self._collect(*lookup)
+                    if result:
+                        with self.metrics.stage("export"):
+                            exporter.write(result)
+                if run:
+                    with self.metrics.stage("export"):
+                        exporter.write_batch(batch, run)
+
+                self.metrics.increment("batch_entries_without_lookup", len(batch) - len(lookups))
+                entry_count += len(batch)
+                progress.update(len(batch))
+
+        self.metrics.increment("entries_total", entry_count)
+        self.save_caches()
+        return exporter.count
+
+    def _answer_row(self, batch, index, executor, scheduled):
+        """
+        Responde uma entrada do lote sem busca, preenchendo as colunas de IMDb ID, ou
+        agenda a busca que falta para ela
+
+        Args:
+            scheduled (dict): Buscas por nome já agendadas no lote (chave de busca -> Future)
+
+        Returns:
+            True se a entrada foi respondida (com ou sem IMDb ID), ou a tupla
+            (MediaEntry, Future) da busca agendada
+        """
+        name, is_series = batch.names[index], batch.is_series(index)
+        ids = TMDbClient.parse_tvg_id(batch.tvg_ids[index])
+        if ids is not None:
+            if ids[1] is None:
+                # O tvg-id só tem o TMDb ID: falta a consulta dos IDs externos
+                entry = batch.entry(index)
+                return entry, self._submit_lookup(executor, entry)[0]
+            with self.stats_mutex:
+                self.tvg_id_shortcuts += 1
+            batch.set_imdb_id(index, ids[1])
+            return True
+
+        lookup_key = TextCleaner.lookup_key(name, is_series)
+        future = scheduled.get(lookup_key)
+        if future is not None:
+            self.metrics.increment("deduplicated_entries")
+        else:
+            key, record = self._cached_record(name, lookup_key)
+            if record is None:
+                future, _ = self.single_flight.submit(executor, lookup_key, self._resolve_uncached,
+                                                      key, name, lookup_key)
+                scheduled[lookup_key] = future
+            elif not (record["imdb_id"] and SERIES_EPISODE_IDS and is_series):
+                batch.set_imdb_id(index, record["imdb_id"])
+                return True
+            else:
+                # Registros antigos sem TMDb ID: o episódio não tem como ser buscado (ver _resolve_episode)
+                known, episode_imdb_id = (True, None)
+                if record.get("tmdb_id"):
+                    known, episode_imdb_id = self.tmdb_client.cached_episode_id(
+                        record["tmdb_id"], batch.seasons[index], batch.episodes[index]
+                    )
+                if known:
+                    batch.set_imdb_id(index, record["imdb_id"])
+                    batch.set_episode_imdb_id(index, episode_imdb_id)
+                    return True
+                # A série está no cache, mas o episódio não: só a busca do episódio é feita
+                future = Future()
+                future.set_result(record["imdb_id"])
+
+        entry = batch.entry(index)
+        if SERIES_EPISODE_IDS and is_series:
+            future = self._chain_episode(executor, future, lookup_key, entry.season, entry.episode)
+        return entry, future
+
+    def _submit_lookup(self, executor, entry):
+        """
+        Agenda a resolução da entrada: pelo tvg-id, quando ele já identifica o título,
+        ou pela chave de busca do nome
+        
+        Returns:
+            tuple: (Future com o IMDb ID, Booleano indicando se uma nova busca foi criada)
+        """
+        # Entradas que já têm o IMDb ID (ex: reaproveitadas no modo incremental) não são buscadas
+        if entry.imdb_id:
+            future = Future()
+            future.set_result(entry.imdb_id)
+            return future, False
+        
+        if TMDbClient.parse_tvg_id(entry.tvg_id) is not None:
+            key = ("tvg-id", entry.tvg_id, entry.is_series)
+            return self.single_flight.submit(executor, key, self._resolve_tvg_id, entry.tvg_id, entry.is_series)
+        
+        key = TextCleaner.lookup_key(entry.name, entry.is_series)
+        future, created = self.single_flight.submit(executor, key, self._resolve, entry.name, key)
+        if SERIES_EPISODE_IDS and entry.is_series:
+            future = self._chain_episode(executor, future, key, entry.season, entry.episode)
+        return future, created
+
+    def _chain_episode(self, executor, show_future, lookup_key, season, episode):
+        """
+        Encadeia a busca do episódio à busca da série: a série é resolvida uma única
+        vez e, quando termina, cada episódio distinto agenda a sua própria busca
+
+        Os callbacks só agendam tarefas, sem bloquear nenhuma thread do executor.
+
+        Returns:
+            Future: Resultado (IMDb ID da série, IMDb ID do episódio)
+        """
+        result = Future()
+
+        def on_episode(done, imdb_id):
+            try:
+                result.set_result((imdb_id, done.result()))
+            except Exception as error:
+                result.set_exception(error)
+
+        def on_show(done):
+            try:
+                imdb_id = done.result()
+            except Exception as error:
+                result.set_exception(error)
+                return
+            if not imdb_id:
+                result.set_result((None, None))
+                return
+            try:
+                episode_future, _ = self.single_flight.submit(
+                    executor, ("episode", lookup_key, season, episode),
+                    self._resolve_episode, lookup_key, season, episode
+                )
+            except RuntimeError as error:
+                # O executor já foi encerrado (conversão interrompida ou cliente desconectado)
+                result.set_exception(error)
+                return
+            episode_future.add_done_callback(lambda done: on_episode(done, imdb_id))
+
+        show_future.add_done_callback(on_show)
+        return result
+
+    def _collect(self, entry, future):
+        """
+        Aplica à entrada o resultado da busca compartilhada
+        """
+        # O tempo de espera pela busca é o que a thread principal gasta na etapa de resolução
+        with self.metrics.stage("lookup"):
+            result = future.result()
+        return self._apply_result(entry, result)
+
+    @staticmethod
+    def _apply_result(entry, result):
+        """
+        Preenche a entrada com o resultado da busca: o IMDb ID ou, para episódios,
+        o par (IMDb ID da série, IMDb ID do episódio)
+
+        Returns:
+            MediaEntry: A entrada, ou None se o IMDb ID não foi encontrado
+        """
+        imdb_id, episode_imdb_id = result if isinstance(result, tuple) else (result, None)
+        if not imdb_id:
             return None
+        entry.set_imdb_id(imdb_id)
+        if episode_imdb_id:
+            entry.set_episode_imdb_id(episode_imdb_id)
+        return entry
+
+    async def _resolve_async(self, client, name, lookup_key):
+        """
+        Versão assíncrona de _resolve, usando o AsyncTMDbClient; as consultas ao
+        cache em SQLite e ao índice offline são feitas fora do laço de eventos
+        """
+        blocking = self.cache_manager.backend.blocking
+        key, record = await run_blocking(blocking, self._cached_record, name, lookup_key)
+        if record is not None:
+            return record["imdb_id"]
+
+        is_series = lookup_key[1]
+
+        # A montagem do índice lê o cache: também é feita fora do laço de eventos
+        building = self.title_index is None and TITLE_MATCHING
+        near_duplicate = await run_blocking(building, self._near_duplicate, name, lookup_key)
+        if near_duplicate:
+            await run_blocking(blocking, self._remember, key, name, lookup_key, *near_duplicate)
+            return near_duplicate[1]
+
+        offline = await run_blocking(self.offline_resolver is not None, self._offline_lookup, name, lookup_key)
+        if offline:
+            tmdb_id, imdb_id = offline
+            if imdb_id is None:
+                imdb_id = await client.get_external_ids(tmdb_id, is_series)
+            if imdb_id:
+                await run_blocking(blocking, self._remember, key, name, lookup_key, tmdb_id, imdb_id)
+                return imdb_id
+
+        tmdb_id, imdb_id = await client.resolve_ids(name, is_series)
+        self._count_lookup(imdb_id)
+        await run_blocking(blocking, self._remember, key, name, lookup_key, tmdb_id, imdb_id)
+        return imdb_id
+
+    async def _resolve_tvg_id_async(self, client, tvg_id, is_series):
+        """
+        Versão assíncrona de _resolve_tvg_id
+        """
+        tmdb_id, imdb_id = await client.resolve_tvg_id(tvg_id, is_series)
+        with self.stats_mutex:
+            self.tvg_id_shortcuts += 1
+        return imdb_id
+
+    async def _resolve_episode_async(self, client, lookup_key, season, episode):
+        """
+        Versão assíncrona de _resolve_episode
+        """
+        tmdb_id = await run_blocking(self.cache_manager.backend.blocking, self._show_tmdb_id, lookup_key)
+        if not tmdb_id:
+            return None
+        episode_imdb_id = await client.resolve_episode_id(tmdb_id, season, episode)
+        self._count_episode(episode_imdb_id)
+        return episode_imdb_id
+
+    async def iter_processed_async(self, entries, concurrency=ASYNC_CONCURRENCY, on_collect=None):
+        """
+        Modo assíncrono de iter_processed: as buscas são feitas por um AsyncTMDbClient
+        com pool de conexões e limite de taxa, permitindo centenas de consultas simultâneas.
+
+        Gera as entradas válidas na ordem original, chamando on_collect como iter_processed.
+        """
+        # Importado aqui para que o modo síncrono não dependa do aiohttp
+        from src.api.async_tmdb_client import AsyncTMDbClient
+
+        window = max(MAX_PENDING_ENTRIES, concurrency * 2)
+        flights = {}
+
+        async with AsyncTMDbClient(verbose=self.verbose, concurrency=concurrency,
+                                   throttle=self.throttle, search_cache=self.search_cache,
+                                   external_ids_cache=self.external_ids_cache,
+                                   season_cache=self.season_cache,
+                                   metrics=self.metrics) as client:
+            with tqdm(total=len(entries) if hasattr(entries, '__len__') else None,
+                      desc="Consultando TMDb", disable=not self.progress) as progress:
+                pending = deque()
+
+                for entry in entries:
+                    with self.metrics.stage("dedupe"):
+                        task = self._schedule_async(client, entry, flights)
+                    pending.append((entry, task))
+                    self.metrics.increment("entries_total")
+
+                    if len(pending) >= window:
+                        collected, task = pending.popleft()
+                        result = await self._collect_async(collected, task)
+                        progress.update(1)
+                        if result:
+                            yield result
+                        if on_collect:
+                            on_collect(collected)
+
+                while pending:
+                    collected, task = pending.popleft()
+                    result = await self._collect_async(collected, task)
+                    progress.update(1)
+                    if result:
+                        yield result
+                    if on_collect:
+                        on_collect(collected)
+
+        self.save_caches()
+
+    def _schedule_async(self, client, entry, flights):
+        """
+        Cria (ou reaproveita) a tarefa que resolve o IMDb ID da entrada no modo assíncrono,
+        com a mesma deduplicação do modo síncrono: uma tarefa por chave em andamento
         
-        # Busca o IMDb ID na API
-        imdb_id = self.tmdb_client.get_imdb_id(name, is_series)
+        Args:
+            client (AsyncTMDbClient): Cliente usado nas buscas
+            entry (MediaEntry): Entrada a ser resolvida
+            flights (dict): Tarefas em andamento por chave
+        """
+        if entry.imdb_id:
+            # Entrada que já tem o IMDb ID: não há nada a buscar
+            task = asyncio.get_running_loop().create_future()
+            task.set_result(entry.imdb_id)
+            return task
         
-        # Atualiza o cache em todos os casos, mesmo quando o ID não for encontrado
-        self.cache_manager.set_id(name, imdb_id)
+        by_tvg_id = TMDbClient.parse_tvg_id(entry.tvg_id) is not None
+        if by_tvg_id:
+            key = ("tvg-id", entry.tvg_id, entry.is_series)
+            task, created = self._flight(
+                flights, key, lambda: self._resolve_tvg_id_async(client, entry.tvg_id, entry.is_series)
+            )
+        else:
+            key = TextCleaner.lookup_key(entry.name, entry.is_series)
+            task, created = self._flight(flights, key, lambda: self._resolve_async(client, entry.name, key))
+        if not created:
+            self.metrics.increment("deduplicated_entries")
         
-        # Se encontrou o ID, atualiza a entrada e retorna
-        if imdb_id:
-            entry.set_imdb_id(imdb_id)
-            return entry
+        if SERIES_EPISODE_IDS and entry.is_series and not by_tvg_id:
+            task = asyncio.ensure_future(
+                self._episode_async(client, task, key, entry.season, entry.episode, flights)
+            )
+        return task
+
+    @staticmethod
+    def _flight(flights, key, make_coroutine):
+        """
+        Reaproveita a tarefa em andamento para a chave ou cria uma nova com make_coroutine()
         
-        # Não encontrou o ID, então não inclui no resultado
-        return None
-    
-    def process_entries(self, entries):
+        Returns:
+            tuple: (Tarefa, Booleano indicando se uma nova tarefa foi criada)
         """
-        Processa uma lista de entradas de mídia em paralelo
+        task = flights.get(key)
+        if task is not None:
+            return task, False
+        
+        task = asyncio.ensure_future(make_coroutine())
+        flights[key] = task
+        
+        def forget(done):
+            if flights.get(key) is done:
+                del flights[key]
+        task.add_done_callback(forget)
+        return task, True
+
+    async def _episode_async(self, client, show_task, lookup_key, season, episode, flights):
         """
-        valid_entries = []
+        Versão assíncrona de _chain_episode: aguarda a série e busca o episódio,
+        com uma tarefa por episódio distinto em andamento
         
-        # Processa as entradas em paralelo
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            for result in tqdm(
-                executor.map(self._process_entry, entries), 
-                total=len(entries), 
-                desc="Consultando TMDb"
-            ):
-                if result:
-                    valid_entries.append(result)
+        Returns:
+            tuple: (IMDb ID da série, IMDb ID do episódio)
+        """
+        imdb_id = await show_task
+        if not imdb_id:
+            return None, None
+        episode_task, _ = self._flight(
+            flights, ("episode", lookup_key, season, episode),
+            lambda: self._resolve_episode_async(client, lookup_key, season, episode)
+        )
+        return imdb_id, await episode_task
+
+    async def process_entries_async(self, entries, concurrency=ASYNC_CONCURRENCY, exporter=None, on_collect=None):
+        """
+        Processa as entradas no modo assíncrono
         
-        # Forçar o salvamento do cache ao final do processamento
-        self.cache_manager.save_cache(force=True)
+        Returns:
+            list: Entradas válidas, ou o número de entradas gravadas se houver exportador
+        """
+        if exporter is None:
+            return [entry async for entry in self.iter_processed_async(entries, concurrency, on_collect)]
+        
+        async for entry in self.iter_processed_async(entries, concurrency, on_collect):
+            with self.metrics.stage("export"):
+                exporter.write(entry)
+        return exporter.count
+
+    async def _collect_async(self, entry, task):
+        """
+        Aplica à entrada o resultado da tarefa de busca compartilhada
+        """
+        with self.metrics.stage("lookup"):
+            result = await task
+        return self._apply_result(entry, result)
+
+    def refresh_expired(self):
+        """
+        Busca novamente, em lote, apenas os registros do cache sem IMDb ID cuja
+        validade expirou, sem precisar reprocessar nenhuma lista
+        
+        Returns:
+            tuple: (Registros verificados, Registros em que o IMDb ID foi encontrado)
+        """
+        expired = list(self.cache_manager.iter_expired_negatives())
+        recovered = 0
         
-        return valid_entries 
\ No newline at end of file
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = [executor.submit(self._refresh_record, key, record) for key, record in expired]
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Atualizando cache"):
+                if future.result():
+                    recovered += 1
+        
+        self.save_caches()
+        return len(expired), recovered
+    
+    def _refresh_record(self, key, record):
+        """
+        Refaz a busca de um registro do cache e grava o novo resultado
+        """
+        tmdb_id, imdb_id = self.tmdb_client.resolve_ids(record["name"], record["is_series"])
+        self.cache_manager.set_record(
+            key, record["name"], record["is_series"], record["year"], record["language"], tmdb_id, imdb_id
+        )
+        return imdb_id
+
+    def save_caches(self):
+        """
+        Força o salvamento do cache principal e dos caches de segundo nível,
+        esperando a thread de gravação terminar
+        """
+        self.cache_writer.flush()
+    
+    def close(self):
+        """
+        Grava as alterações pendentes, encerra a thread de gravação, fecha os caches
+        e o cliente do TMDb (registrado no atexit; pode ser chamado mais de uma vez)
+        """
+        if self.cache_writer.closed:
+            return
+        self.cache_writer.close()
+        atexit.unregister(self.close)
+        for cache in (self.cache_manager, self.search_cache, self.external_ids_cache, self.season_cache):
+            cache.backend.close()
+        self.tmdb_client.close()
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+from src.utils.json_reader import JSONReader
+
+class StreamingMerger:
+    """
+    Mescla vários arquivos de saída (JSON ou NDJSON) removendo duplicatas.
+
+    As entradas são lidas em streaming e as chaves já vistas ficam em um índice
+    SQLite temporário no disco, então a memória usada não cresce com o volume
+    de dados mesclados.
+
+    Chaves de deduplicação:
+        - "url": a URL do stream
+        - "imdb": (imdb_id, temporada, episódio); entradas sem imdb_id usam a URL
+        - "none": não remove duplicatas
+
+    Política:
+        - "first": mantém a primeira ocorrência (uma passagem)
+        - "last": mantém a última ocorrência, na posição em que ela aparece (duas passagens)
+    """
+    DEDUPE_KEYS = ("url", "imdb", "none")
+    POLICIES = ("first", "last")
+
+    def __init__(self, dedupe="url", keep="first", temp_dir=None, commit_every=10000):
+        if dedupe not in self.DEDUPE_KEYS:
+            raise ValueError(f"Chave de deduplicação desconhecida: {dedupe}")
+        if keep not in self.POLICIES:
+            raise ValueError(f"Política de deduplicação desconhecida: {keep}")
+        self.dedupe = dedupe
+        self.keep = keep
+        self.temp_dir = temp_dir
+        self.commit_every = commit_every
+        self.read = 0
+        self.written = 0
+
+    def record_key(self, record):
+        """
+        Gera a chave de deduplicação de um registro (hash SHA-1 de 20 bytes)
+        """
+        imdb_id = record.get("imdb_id")
+        if self.dedupe == "imdb" and imdb_id:
+            key = f"imdb|{imdb_id}|{record.get('season', '')}|{record.get('episode', '')}"
+        else:
+            key = f"url|{record.get('url', '')}"
+        return hashlib.sha1(key.encode('utf-8')).digest()
+
+    def iter_inputs(self, input_files):
+        """
+        Gera os registros de todos os arquivos de entrada, em ordem
+        """
+        for file_path in input_files:
+            yield from JSONReader.iter_records(file_path)
+
+    def merge(self, input_files, exporter):
+        """
+        Mescla os arquivos de entrada escrevendo o resultado no exportador
+
+        Args:
+            input_files (list): Caminhos dos arquivos de entrada
+            exporter (StreamingJSONExporter): Exportador já aberto
+
+        Returns:
+            int: Número de entradas escritas
+        """
+        self.read = self.written = 0
+
+        if self.dedupe == "none":
+            for record in self.iter_inputs(input_files):
+                self.read += 1
+                self._write(exporter, record)
+            return self.written
+
+        temp_dir = tempfile.mkdtemp(prefix="merge-", dir=self.temp_dir)
+        try:
+            connection = self._open_index(os.path.join(temp_dir, "index.sqlite3"))
+            try:
+                if self.keep == "first":
+                    self._merge_keep_first(connection, input_files, exporter)
+                else:
+                    self._merge_keep_last(connection, input_files, exporter)
+            finally:
+                connection.close()
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        return self.written
+
+    @staticmethod
+    def _open_index(file_path):
+        """
+        Abre o índice temporário de chaves. Durabilidade não importa aqui,
+        então journal e sincronização ficam desligados
+        """
+        connection = sqlite3.connect(file_path)
+        connection.execute("PRAGMA journal_mode=OFF")
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.execute("PRAGMA temp_store=FILE")
+        # Cache de páginas limitado (64 MiB): o índice pode crescer no disco sem ocupar mais memória
+        connection.execute("PRAGMA cache_size=-65536")
+        connection.execute("CREATE TABLE seen (key BLOB PRIMARY KEY, position INTEGER) WITHOUT ROWID")
+        return connection
+
+    def _write(self, exporter, record):
+        exporter.write(record)
+        self.written += 1
+
+    def _merge_keep_first(self, connection, input_files, exporter):
+        """
+        Uma passagem: o registro é escrito se a inserção da sua chave não for ignorada
+        """
+        cursor = connection.cursor()
+        for record in self.iter_inputs(input_files):
+            self.read += 1
+            cursor.execute("INSERT OR IGNORE INTO seen (key) VALUES (?)", (self.record_key(record),))
+            if cursor.rowcount == 1:
+                self._write(exporter, record)
+            if self.read % self.commit_every == 0:
+                connection.commit()
+        connection.commit()
+
+    def _merge_keep_last(self, connection, input_files, exporter):
+        """
+        Duas passagens: a primeira guarda a posição da última ocorrência de cada chave;
+        a segunda relê as entradas e escreve apenas as posições vencedoras
+        """
+        def positions():
+            for position, record in enumerate(self.iter_inputs(input_files)):
+                self.read += 1
+                yield self.record_key(record), position
+
+        connection.executemany("INSERT OR REPLACE INTO seen (key, position) VALUES (?, ?)", positions())
+        connection.execute("CREATE INDEX seen_position ON seen (position)")
+        connection.commit()
+
+        # As posições vencedoras são percorridas em ordem junto com a releitura das entradas
+        winners = connection.execute("SELECT position FROM seen ORDER BY position")
+        next_winner = winners.fetchone()
+        for position, record in enumerate(self.iter_inputs(input_files)):
+            if next_winner is None:
+                break
+            if position == next_winner[0]:
+                self._write(exporter, record)
+                next_winner = winners.fetchone()
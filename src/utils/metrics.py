@@ -0,0 +1,249 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites (em segundos) dos buckets do histograma de latência das requisições
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class LatencyHistogram:
+    """
+    Histograma de latências com buckets fixos (mesmo formato dos histogramas do Prometheus)
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # O último bucket é o +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        index = 0
+        while index < len(self.buckets) and seconds > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def percentile(self, fraction):
+        """
+        Estimativa do percentil pelo limite superior do bucket em que ele cai
+        (None se cair acima do último limite)
+        """
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[index] if index < len(self.buckets) else None
+        return None
+
+    def to_dict(self):
+        cumulative = 0
+        buckets = {}
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            label = str(self.buckets[index]) if index < len(self.buckets) else "+Inf"
+            buckets[label] = cumulative
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.sum, 6),
+            "mean_seconds": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50_seconds": self.percentile(0.5),
+            "p90_seconds": self.percentile(0.9),
+            "p99_seconds": self.percentile(0.99),
+            "buckets": buckets,
+        }
+
+class RunMetrics:
+    """
+    Coleta as métricas de uma execução: tempo (relógio e CPU) por etapa,
+    latência das requisições por endpoint, respostas por código de status
+    e contadores diversos (cache, retentativas, deduplicação).
+
+    Todos os métodos podem ser chamados de várias threads.
+
+    Uso:
+        metrics = RunMetrics()
+        with metrics.stage("export"):
+            exporter.write(entry)
+        metrics.observe_request("search_movie", 0.12, 200)
+        metrics.write_json("report.json", extra={...})
+    """
+    def __init__(self):
+        self.mutex = threading.Lock()
+        self.started_at = time.time()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.stages = {}
+        self.latencies = {}
+        self.statuses = {}
+        self.counters = {}
+
+    def add_stage_time(self, name, wall, cpu):
+        """
+        Soma um intervalo de tempo à etapa
+        """
+        with self.mutex:
+            stage = self.stages.setdefault(name, [0.0, 0.0, 0])
+            stage[0] += wall
+            stage[1] += cpu
+            stage[2] += 1
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Mede o tempo de relógio e de CPU (da thread atual) gasto no bloco
+        """
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.add_stage_time(name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def timed_iter(self, name, iterable):
+        """
+        Repassa os itens do iterável medindo o tempo gasto para produzir cada um.
+        Usado nas etapas preguiçosas, como a análise do M3U, que só trabalham quando consumidas
+        """
+        iterator = iter(iterable)
+        while True:
+            wall, cpu = time.perf_counter(), time.thread_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_stage_time(name, time.perf_counter() - wall, time.thread_time() - cpu)
+                return
+            self.add_stage_time(name, time.perf_counter() - wall, time.thread_time() - cpu)
+            yield item
+
+    def observe_request(self, endpoint, seconds, status):
+        """
+        Registra uma requisição HTTP
+
+        Args:
+            endpoint (str): Nome do endpoint (ex: "search_movie", "external_ids_tv")
+            seconds (float): Latência da requisição
+            status: Código HTTP ou "error" para falhas de conexão
+        """
+        with self.mutex:
+            histogram = self.latencies.get(endpoint)
+            if histogram is None:
+                histogram = self.latencies[endpoint] = LatencyHistogram()
+            histogram.observe(seconds)
+            statuses = self.statuses.setdefault(endpoint, {})
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    def increment(self, name, value=1):
+        """
+        Incrementa um contador (aceita valores fracionários, como segundos de espera)
+        """
+        with self.mutex:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def counter(self, name):
+        """
+        Valor atual de um contador (0 se nunca foi incrementado)
+        """
+        with self.mutex:
+            return self.counters.get(name, 0)
+
+    def report(self, extra=None):
+        """
+        Monta o relatório da execução
+
+        Args:
+            extra (dict, optional): Seções adicionais (throttle, caches, resoluções...)
+
+        Returns:
+            dict: Relatório pronto para ser serializado em JSON
+        """
+        with self.mutex:
+            report = {
+                "started_at": self.started_at,
+                "wall_seconds": round(time.perf_counter() - self.start_wall, 6),
+                "cpu_seconds": round(time.process_time() - self.start_cpu, 6),
+                "stages": {
+                    name: {"wall_seconds": round(wall, 6), "cpu_seconds": round(cpu, 6), "calls": calls}
+                    for name, (wall, cpu, calls) in self.stages.items()
+                },
+                "http": {
+                    endpoint: {"latency": histogram.to_dict(), "statuses": dict(self.statuses.get(endpoint, {}))}
+                    for endpoint, histogram in self.latencies.items()
+                },
+                "counters": {name: round(value, 6) for name, value in self.counters.items()},
+            }
+        report.update(extra or {})
+        return report
+
+    @staticmethod
+    def _write_atomic(file_path, content):
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(temp_path, file_path)
+
+    def write_json(self, file_path, extra=None):
+        """
+        Salva o relatório em JSON
+        """
+        self._write_atomic(file_path, json.dumps(self.report(extra), ensure_ascii=False, indent=4))
+
+    def write_prometheus(self, file_path, extra=None, prefix="m3u_converter"):
+        """
+        Salva as métricas no formato texto do Prometheus (para o textfile collector
+        do node_exporter)
+        """
+        self._write_atomic(file_path, self.prometheus_text(extra, prefix))
+
+    def prometheus_text(self, extra=None, prefix="m3u_converter"):
+        """
+        Métricas no formato texto do Prometheus. Os valores numéricos das seções extras viram gauges
+        """
+        report = self.report(extra)
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        metric("run_wall_seconds", "gauge", "Tempo total de relógio da execução")
+        lines.append(f"{prefix}_run_wall_seconds {report['wall_seconds']}")
+        metric("run_cpu_seconds", "gauge", "Tempo total de CPU do processo")
+        lines.append(f"{prefix}_run_cpu_seconds {report['cpu_seconds']}")
+
+        metric("stage_wall_seconds", "gauge", "Tempo de relógio por etapa")
+        for name, stage in report["stages"].items():
+            lines.append(f'{prefix}_stage_wall_seconds{{stage="{name}"}} {stage["wall_seconds"]}')
+        metric("stage_cpu_seconds", "gauge", "Tempo de CPU por etapa (thread que executou a etapa)")
+        for name, stage in report["stages"].items():
+            lines.append(f'{prefix}_stage_cpu_seconds{{stage="{name}"}} {stage["cpu_seconds"]}')
+
+        metric("http_request_duration_seconds", "histogram", "Latência das requisições por endpoint")
+        for endpoint, data in report["http"].items():
+            latency = data["latency"]
+            for bucket, count in latency["buckets"].items():
+                lines.append(f'{prefix}_http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bucket}"}} {count}')
+            lines.append(f'{prefix}_http_request_duration_seconds_sum{{endpoint="{endpoint}"}} {latency["sum_seconds"]}')
+            lines.append(f'{prefix}_http_request_duration_seconds_count{{endpoint="{endpoint}"}} {latency["count"]}')
+
+        metric("http_responses_total", "counter", "Respostas por endpoint e código de status")
+        for endpoint, data in report["http"].items():
+            for status, count in data["statuses"].items():
+                lines.append(f'{prefix}_http_responses_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+
+        for name, value in report["counters"].items():
+            metric(name, "counter", f"Contador {name}")
+            lines.append(f"{prefix}_{name} {value}")
+
+        for section, values in (extra or {}).items():
+            if not isinstance(values, dict):
+                continue
+            for name, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric(f"{section}_{name}", "gauge", f"{section}: {name}")
+                    lines.append(f"{prefix}_{section}_{name} {value}")
+
+        return "\n".join(lines) + "\n"
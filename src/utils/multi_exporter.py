@@ -0,0 +1,248 @@
+import json
+import os
+from collections import OrderedDict
+from src.utils.json_exporter import StreamingJSONExporter
+from src.utils.text_cleaner import TextCleaner
+from config.settings import SHARD_BUFFER_SIZE, SHARD_MAX_OPEN_FILES
+
+# Critérios de particionamento das saídas (--shard-by): nome -> valor da entrada
+SHARD_KEYS = {
+    "type": lambda entry: "series" if entry.is_series else "filmes",
+    "language": lambda entry: entry.language,
+    "group": lambda entry: entry.group_title or "sem grupo",
+}
+# Os mesmos critérios para uma entrada de um MediaEntryBatch: (lote, índice) -> valor
+SHARD_BATCH_KEYS = {
+    "type": lambda batch, index: "series" if batch.is_series(index) else "filmes",
+    "language": lambda batch, index: batch.language(index),
+    "group": lambda batch, index: batch.group_title(index) or "sem grupo",
+}
+
+class ShardedExporter:
+    """
+    Exportador particionado: cada valor do critério (tipo, idioma ou grupo) tem o seu
+    arquivo em "<diretório>/<critério>/<valor>.<formato>", aberto na primeira entrada
+    com aquele valor e gravado por um StreamingJSONExporter próprio (com buffer e
+    arquivo parcial). Ao final, "index.json" lista os arquivos e o número de entradas
+    de cada um, e os arquivos de valores que não aparecem mais são removidos.
+
+    No máximo max_open_files arquivos ficam abertos: ao abrir mais um, o usado há
+    mais tempo é fechado (sem ser finalizado) e reaberto no modo de acréscimo quando
+    o seu valor aparecer de novo. Assim, milhares de grupos não esgotam os descritores
+    de arquivo nem a memória dos buffers.
+
+    Uso:
+        with ShardedExporter("saida", "group", format="ndjson") as exporter:
+            exporter.write(entry)
+    """
+    INDEX_FILE = "index.json"
+
+    def __init__(self, directory, by, format="ndjson", indent=None, fsync_every=1000, buffer_size=SHARD_BUFFER_SIZE,
+                 max_open_files=SHARD_MAX_OPEN_FILES):
+        if by not in SHARD_KEYS:
+            raise ValueError(f"Critério de particionamento desconhecido: {by}")
+        if format not in StreamingJSONExporter.FORMATS:
+            raise ValueError(f"Formato de exportação desconhecido: {format}")
+        self.directory = os.path.join(directory, by)
+        self.by = by
+        self.key = SHARD_KEYS[by]
+        self.batch_key = SHARD_BATCH_KEYS[by]
+        self.format = format
+        self.indent = indent
+        self.fsync_every = fsync_every
+        self.buffer_size = buffer_size
+        # valor -> StreamingJSONExporter, e nomes de arquivo já usados (valores diferentes
+        # podem gerar o mesmo nome depois da normalização)
+        self.shards = {}
+        self.file_names = set()
+        # valor -> StreamingJSONExporter dos arquivos abertos, do usado há mais tempo ao mais recente
+        self.open_shards = OrderedDict()
+        self.max_open_files = max(1, max_open_files)
+
+    @property
+    def count(self):
+        return sum(shard.count for shard in self.shards.values())
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close(finalize=exc_type is None)
+
+    def open(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _file_name(self, value):
+        """
+        Nome de arquivo único para o valor: sem acentos, minúsculo e com hífens
+        (ex: "Filmes | Ação" -> "filmes-acao.ndjson")
+        """
+        base = TextCleaner.normalize_title(str(value)).replace(" ", "-") or "sem-nome"
+        name, suffix = base, 1
+        while f"{name}.{self.format}" in self.file_names:
+            suffix += 1
+            name = f"{base}-{suffix}"
+        file_name = f"{name}.{self.format}"
+        self.file_names.add(file_name)
+        return file_name
+
+    def _shard(self, value):
+        if value in self.open_shards:
+            self.open_shards.move_to_end(value)
+            return self.open_shards[value]
+
+        shard = self.shards.get(value)
+        if shard is None:
+            file_path = os.path.join(self.directory, self._file_name(value))
+            shard = StreamingJSONExporter(file_path, format=self.format, indent=self.indent,
+                                          fsync_every=self.fsync_every, buffer_size=self.buffer_size)
+            shard.open()
+            self.shards[value] = shard
+        else:
+            shard.reopen()
+        self.open_shards[value] = shard
+        if len(self.open_shards) > self.max_open_files:
+            self.open_shards.popitem(last=False)[1].suspend()
+        return shard
+
+    def write(self, entry, data=None):
+        """
+        Escreve a entrada (MediaEntry) no arquivo do seu valor
+        """
+        self._shard(self.key(entry)).write(entry, data)
+
+    def write_batch(self, batch, indices=None, rows=None):
+        """
+        Escreve as entradas de um MediaEntryBatch nos arquivos dos seus valores, sem
+        criar um MediaEntry por entrada (ver StreamingJSONExporter.write_batch)
+        """
+        if indices is None:
+            indices = range(len(batch))
+        for position, index in enumerate(indices):
+            self._shard(self.batch_key(batch, index)).write_row(
+                batch, index, rows[position] if rows is not None else None
+            )
+
+    def checkpoint(self):
+        # Os arquivos fechados já tiveram o buffer gravado ao serem fechados
+        for shard in self.open_shards.values():
+            shard.checkpoint()
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, self.INDEX_FILE), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def close(self, finalize=True):
+        """
+        Fecha todos os arquivos e, se finalize=True, grava o índice e remove os
+        arquivos da execução anterior que não foram gerados nesta
+        """
+        for value, shard in self.shards.items():
+            # Um arquivo fechado é reaberto só para ser finalizado (fim do array JSON e rename)
+            if finalize and value not in self.open_shards:
+                shard.reopen()
+            shard.close(finalize)
+            self.open_shards.pop(value, None)
+        if not finalize:
+            return
+
+        index = {str(value): {"file": os.path.basename(shard.file_path), "count": shard.count}
+                 for value, shard in self.shards.items()}
+        for previous in self._load_index().values():
+            if previous.get("file") not in self.file_names:
+                stale = os.path.join(self.directory, previous.get("file", ""))
+                if os.path.isfile(stale):
+                    os.remove(stale)
+
+        index_path = os.path.join(self.directory, self.INDEX_FILE)
+        with open(f"{index_path}.temp", 'w', encoding='utf-8') as file:
+            json.dump(index, file, ensure_ascii=False, indent=4)
+        os.replace(f"{index_path}.temp", index_path)
+
+class MultiExporter:
+    """
+    Grava as entradas resolvidas em várias saídas de uma só vez (JSON, NDJSON, M3U
+    anotado e saídas particionadas), em uma única passagem: cada entrada é convertida
+    em dicionário uma vez e entregue a todas as saídas, cada uma com o seu buffer.
+
+    Tem a mesma interface do StreamingJSONExporter usada pelo MediaProcessor
+    (write, write_batch, count e on_write).
+
+    Uso:
+        exporter = MultiExporter([
+            StreamingJSONExporter("saida.json"),
+            StreamingJSONExporter("saida.m3u", format="m3u"),
+            ShardedExporter("saidas", "type"),
+        ])
+        with exporter:
+            media_processor.process_entries(entries, exporter=exporter)
+    """
+    def __init__(self, sinks, on_write=None):
+        self.sinks = sinks
+        # Função chamada com cada entrada escrita (ex: IncrementalManifest.record)
+        self.on_write = on_write
+        self.count = 0
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close(finalize=exc_type is None)
+
+    def open(self):
+        for sink in self.sinks:
+            sink.open()
+        self.count = 0
+
+    def write(self, entry):
+        data = entry if isinstance(entry, dict) else entry.to_dict()
+        for sink in self.sinks:
+            sink.write(entry, data)
+        self.count += 1
+
+        if self.on_write:
+            self.on_write(entry)
+
+    def write_batch(self, batch, indices=None):
+        """
+        Escreve as entradas de um MediaEntryBatch em todas as saídas, convertendo
+        cada uma em dicionário uma única vez, direto das colunas do lote
+        """
+        if indices is None:
+            indices = range(len(batch))
+        rows = [batch.to_dict(index) for index in indices]
+        for sink in self.sinks:
+            sink.write_batch(batch, indices, rows)
+        self.count += len(rows)
+
+        if self.on_write:
+            for index in indices:
+                self.on_write(batch.entry(index))
+
+    def checkpoint(self):
+        for sink in self.sinks:
+            sink.checkpoint()
+
+    def close(self, finalize=True):
+        for sink in self.sinks:
+            sink.close(finalize)
+
+    def outputs(self):
+        """
+        Descrição de cada saída para o resumo da execução
+
+        Returns:
+            list: (caminho do arquivo ou diretório, número de entradas ou de arquivos, descrição)
+        """
+        outputs = []
+        for sink in self.sinks:
+            if isinstance(sink, ShardedExporter):
+                outputs.append((sink.directory, len(sink.shards), f"arquivos {sink.format} por {sink.by}"))
+            else:
+                outputs.append((sink.file_path, sink.count, f"entradas {sink.format}"))
+        return outputs
@@ -0,0 +1,180 @@
+import gzip
+import io
+import json
+
+# Dependências opcionais: orjson (JSON mais rápido), msgpack (cache binário) e
+# zstandard (saídas .zst). Sem elas, o json da biblioteca padrão e o gzip são usados
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Assinaturas usadas para detectar a compactação de um arquivo
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Compactação das saídas, pela extensão do arquivo
+COMPRESSIONS = {".gz": "gzip", ".zst": "zstd"}
+
+def dumps(data):
+    """
+    Serializa em JSON compacto (sem espaços e sem escapar acentos), com orjson se disponível
+
+    Returns:
+        str: Texto JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(data).decode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+def dumps_bytes(data, indent=False):
+    """
+    Serializa em JSON codificado em UTF-8
+
+    Args:
+        data: Objeto a ser serializado
+        indent (bool): Gera o JSON indentado com 4 espaços, como o cache_ids.json original.
+            Sempre usa o json padrão: o orjson só indenta com 2 espaços, e o arquivo não
+            deve mudar de formato conforme os pacotes instalados
+
+    Returns:
+        bytes: JSON em UTF-8
+    """
+    if indent:
+        return json.dumps(data, ensure_ascii=False, indent=4).encode('utf-8')
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def loads(data):
+    """
+    Decodifica JSON a partir de str ou bytes, com orjson se disponível
+
+    Raises:
+        ValueError: JSON inválido (json.JSONDecodeError e orjson.JSONDecodeError são subclasses)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def compression_for(file_path):
+    """
+    Compactação indicada pela extensão do arquivo
+
+    Returns:
+        str: "gzip", "zstd" ou None (sem compactação)
+    """
+    for extension, compression in COMPRESSIONS.items():
+        if file_path and file_path.endswith(extension):
+            return compression
+    return None
+
+def strip_compression(file_path):
+    """
+    Caminho sem a extensão de compactação (ex: "saida.ndjson.zst" -> "saida.ndjson")
+    """
+    compression = compression_for(file_path)
+    if compression is None:
+        return file_path
+    return file_path[:file_path.rindex(".")]
+
+def require_compression(compression):
+    """
+    Verifica se a compactação pode ser usada neste ambiente
+
+    Raises:
+        ValueError: Compactação desconhecida ou zstandard não instalado
+    """
+    if compression not in (None, "gzip", "zstd"):
+        raise ValueError(f"Compactação desconhecida: {compression}")
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("A compactação zstd requer o pacote zstandard (pip install zstandard).")
+
+def open_text_writer(file_path, compression=None, buffer_size=-1, level=None):
+    """
+    Abre um arquivo para escrita em modo texto (UTF-8), compactado ou não.
+
+    Em um arquivo compactado, flush() encerra o bloco atual (Z_SYNC_FLUSH no gzip,
+    FLUSH_BLOCK no zstd): tudo o que foi escrito até ali pode ser descompactado.
+
+    Args:
+        file_path (str): Caminho do arquivo
+        compression (str): "gzip", "zstd" ou None
+        buffer_size (int): Buffer de escrita do arquivo no disco
+        level (int): Nível de compactação (None = padrão de cada formato)
+    """
+    require_compression(compression)
+    if compression is None:
+        return open(file_path, 'w', encoding='utf-8', buffering=buffer_size)
+
+    raw = open(file_path, 'wb', buffering=buffer_size)
+    try:
+        if compression == "gzip":
+            # O GzipFile não fecha o arquivo recebido em fileobj; o _ClosingWriter fecha os dois
+            writer = _ClosingWriter(gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=level or 6, mtime=0), raw)
+        else:
+            writer = zstandard.ZstdCompressor(level=level or 3).stream_writer(raw, closefd=True)
+    except Exception:
+        raw.close()
+        raise
+    return io.TextIOWrapper(writer, encoding='utf-8', write_through=False)
+
+class _ClosingWriter(io.RawIOBase):
+    """
+    Escritor que repassa as escritas para `writer` e, ao fechar, fecha também o arquivo
+    em que ele escreve
+    """
+    def __init__(self, writer, file):
+        self.writer = writer
+        self.file = file
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.writer.write(data)
+
+    def flush(self):
+        if not self.writer.closed:
+            self.writer.flush()
+            self.file.flush()
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self.writer.close()
+        finally:
+            self.file.close()
+            super().close()
+
+def open_binary_reader(file_path):
+    """
+    Abre um arquivo para leitura binária, descompactando-o de forma transparente
+    se ele começar com a assinatura do gzip ou do zstd (a extensão não é considerada)
+
+    Raises:
+        ValueError: Arquivo zstd sem o pacote zstandard instalado
+    """
+    with open(file_path, 'rb') as file:
+        magic = file.read(4)
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(file_path, 'rb')
+    if magic == ZSTD_MAGIC:
+        if zstandard is None:
+            raise ValueError(f"O arquivo '{file_path}' está compactado com zstd; instale o pacote zstandard.")
+        return zstandard.open(file_path, 'rb')
+    return open(file_path, 'rb')
@@ -0,0 +1,44 @@
+import threading
+
+class SingleFlight:
+    """
+    Garante que tarefas concorrentes com a mesma chave sejam executadas uma única vez.
+    Chamadas feitas enquanto a tarefa está em andamento recebem o mesmo Future.
+    """
+    def __init__(self):
+        self.mutex = threading.Lock()
+        self.calls = {}
+    
+    def submit(self, executor, key, func, *args):
+        """
+        Submete a função ao executor, a menos que já exista uma execução em andamento
+        para a mesma chave
+        
+        Args:
+            executor: Executor usado para rodar a função
+            key: Chave que identifica a tarefa
+            func: Função a ser executada
+            *args: Argumentos da função
+            
+        Returns:
+            tuple: (Future da execução, Booleano indicando se uma nova execução foi criada)
+        """
+        with self.mutex:
+            future = self.calls.get(key)
+            if future is not None:
+                return future, False
+            future = executor.submit(func, *args)
+            self.calls[key] = future
+        
+        # O callback é registrado fora do mutex, pois pode rodar imediatamente
+        # se a tarefa já tiver terminado
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future, True
+    
+    def _forget(self, key, future):
+        """
+        Remove a execução concluída; as próximas chamadas passam a usar o cache
+        """
+        with self.mutex:
+            if self.calls.get(key) is future:
+                del self.calls[key]
@@ -1,10 +1,20 @@
 import re
+import unicodedata
+
+# Padrões pré-compilados utilizados na limpeza dos nomes
+_SERIES_PATTERN = re.compile(r'[Ss](\d+)[Ee](\d+)')
+_SUBTITLE_TAG_PATTERN = re.compile(r'\[[Ll]\]|\(\s?[Ll]\s?\)')  # "[L]" e "(L)" para legendado
+_TRAILING_YEAR_PATTERN = re.compile(r'-\s?\d{4}$')
+_PARENTHESIS_YEAR_PATTERN = re.compile(r'\(\d{4}\)')
+_YEAR_PATTERN = re.compile(r'(19\d{2}|20\d{2})')
+_4K_SUFFIX_PATTERN = re.compile(r'\s+4K$', re.IGNORECASE)
+_NON_ALNUM_PATTERN = re.compile(r'[^0-9a-z]+')
 
 class TextCleaner:
     """
     Classe para limpar e processar textos de nomes de filmes e séries
     """
-    
+
     @staticmethod
     def clean_name(name):
         """
@@ -12,10 +22,13 @@ class TextCleaner:
         - Remove tags como "[L]" e "(L)".
         - Remove anos no formato " - 2018", "(2019)".
         """
-        name = re.sub(r'\[[Ll]\]', '', name)  # Remove tags como "[L]"
-        name = re.sub(r'\(\s?[Ll]\s?\)', '', name)  # Remove "(L)" para legendado
-        name = re.sub(r'-\s?\d{4}$', '', name)  # Remove o ano no final do nome
-        name = re.sub(r'\(\d{4}\)', '', name).strip()  # Remove o ano entre parênteses
+        # As verificações de substring evitam executar as regex na maioria dos nomes
+        if '[' in name or '(' in name:
+            name = _SUBTITLE_TAG_PATTERN.sub('', name)  # Remove tags como "[L]" e "(L)"
+        if '-' in name:
+            name = _TRAILING_YEAR_PATTERN.sub('', name)  # Remove o ano no final do nome
+        if '(' in name:
+            name = _PARENTHESIS_YEAR_PATTERN.sub('', name)  # Remove o ano entre parênteses
         return name.strip()
     
     @staticmethod
@@ -25,15 +38,15 @@ class TextCleaner:
         Retorna uma tupla (nome_da_série, temporada, episódio).
         Se não for uma série, retorna (nome_limpo, None, None).
         """
-        match = re.search(r'[Ss](\d+)[Ee](\d+)', name)
+        match = _SERIES_PATTERN.search(name)
         if match:
             season = int(match.group(1))
             episode = int(match.group(2))
-            series_name = re.sub(r'[Ss]\d+[Ee]\d+', '', name).strip()
+            series_name = _SERIES_PATTERN.sub('', name).strip()
             series_name = TextCleaner.clean_name(series_name)  # Limpa o nome da série
             return series_name, season, episode
         return TextCleaner.clean_name(name), None, None
-    
+
     @staticmethod
     def detect_language(name, group_title=""):
         """
@@ -42,4 +55,54 @@ class TextCleaner:
         """
         if "[L]" in name or "(L)" in name or "Legendado" in group_title:
             return "legendado"
-        return "portuguese" 
\ No newline at end of file
+        return "portuguese"
+
+    @staticmethod
+    def normalize(name, group_title=""):
+        """
+        Executa a limpeza completa do nome de uma só vez, combinando
+        detect_language, extract_series_info e clean_name.
+
+        Returns:
+            tuple: (nome_limpo, temporada, episódio, idioma)
+        """
+        if "[L]" in name or "(L)" in name or "Legendado" in group_title:
+            language = "legendado"
+        else:
+            language = "portuguese"
+
+        season = episode = None
+        match = _SERIES_PATTERN.search(name)
+        if match:
+            season = int(match.group(1))
+            episode = int(match.group(2))
+            name = _SERIES_PATTERN.sub('', name).strip()
+
+        return TextCleaner.clean_name(name), season, episode, language
+
+    @staticmethod
+    def normalize_title(name):
+        """
+        Normaliza um título para comparação: remove acentos, converte para
+        minúsculas e troca pontuação e espaços repetidos por um único espaço.
+        Ex: "Irmão  Urso!" -> "irmao urso"
+        """
+        name = unicodedata.normalize('NFKD', name)
+        name = ''.join(char for char in name if not unicodedata.combining(char))
+        return _NON_ALNUM_PATTERN.sub(' ', name.casefold()).strip()
+
+    @staticmethod
+    def lookup_key(name, is_series=False):
+        """
+        Gera a chave de busca usada para agrupar entradas que resultam na mesma
+        consulta ao TMDb (sufixo 4K e ano são tratados como na busca)
+
+        Returns:
+            tuple: (nome_normalizado, is_series, ano ou None)
+        """
+        name = _4K_SUFFIX_PATTERN.sub('', name)
+        year_match = _YEAR_PATTERN.search(name)
+        year = int(year_match.group(1)) if year_match else None
+        if year_match:
+            name = name[:year_match.start()] + ' ' + name[year_match.end():]
+        return TextCleaner.normalize_title(name), is_series, year
@@ -0,0 +1,265 @@
+import math
+import threading
+from src.utils.text_cleaner import TextCleaner
+
+# Palavras ignoradas na comparação de títulos (artigos e preposições em português e inglês)
+_STOP_WORDS = frozenset({
+    "o", "a", "os", "as", "um", "uma", "de", "do", "da", "dos", "das",
+    "e", "em", "no", "na", "nos", "nas", "the", "of", "and",
+})
+
+# Algarismos romanos de sequências (II a XX). "i" e "x" soltos ficam de fora: "I" costuma
+# ser um pronome em inglês e "x" aparece em títulos como "X-Men" e "Godzilla x Kong"
+_ROMAN_NUMERALS = {
+    "ii": "2", "iii": "3", "iv": "4", "v": "5", "vi": "6", "vii": "7", "viii": "8",
+    "ix": "9", "xi": "11", "xii": "12", "xiii": "13", "xiv": "14", "xv": "15",
+    "xvi": "16", "xvii": "17", "xviii": "18", "xix": "19", "xx": "20",
+}
+
+# Palavras que indicam a parte de uma série de filmes: o número seguinte sempre conta,
+# inclusive o 1 ("Parte 1" x "Parte 2", "Episódio I" x "Episódio II")
+_PART_WORDS = frozenset({
+    "part", "parte", "capitulo", "chapter", "episodio", "episode", "volume", "vol",
+})
+_PART_NUMBERS = dict(_ROMAN_NUMERALS, i="1", x="10", one="1", dois="2", duas="2", two="2",
+                     tres="3", three="3")
+
+class TitleMatcher:
+    """
+    Compara títulos e ordena os resultados de uma busca no TMDb.
+
+    A similaridade combina tokens normalizados (sem acentos, pontuação e
+    stop words) e trigramas de caracteres. A pontuação final também considera
+    a proximidade do ano, a popularidade e a posição do resultado na busca.
+    """
+
+    @staticmethod
+    def tokens(title):
+        """
+        Tokens normalizados do título, sem stop words (mantidas se o título só tiver stop words)
+        Ex: "O Irmão Urso!" -> ["irmao", "urso"]
+        """
+        tokens = TextCleaner.normalize_title(title).split()
+        significant = [token for token in tokens if token not in _STOP_WORDS]
+        return significant or tokens
+
+    @staticmethod
+    def trigrams(tokens):
+        """
+        Conjunto de trigramas de caracteres dos tokens, com bordas marcadas por espaços
+        """
+        text = f"  {' '.join(tokens)} "
+        return {text[index:index + 3] for index in range(len(text) - 2)}
+
+    @staticmethod
+    def numbers(tokens):
+        """
+        Números do título (sequências), como algarismos: dígitos, algarismos romanos
+        de II a XX e o número depois de "parte", "capítulo", "episódio"...
+        O "1" solto é ignorado, pois às vezes marca a primeira parte ("Shrek 1" = "Shrek").
+        Ex: ["rocky", "iii"] -> {"3"}; ["parte", "1"] -> {"1"}
+        """
+        numbers = set()
+        after_part = False
+        for token in tokens:
+            if token.isdigit():
+                number = str(int(token))
+                if number != "1" or after_part:
+                    numbers.add(number)
+            elif after_part and token in _PART_NUMBERS:
+                numbers.add(_PART_NUMBERS[token])
+            elif token in _ROMAN_NUMERALS:
+                numbers.add(_ROMAN_NUMERALS[token])
+            after_part = token in _PART_WORDS
+        return numbers
+
+    @staticmethod
+    def similarity(query_tokens, candidate_tokens):
+        """
+        Similaridade entre dois títulos já tokenizados, de 0 a 1
+
+        Média entre o coeficiente de Dice dos tokens e o Jaccard dos trigramas.
+        Títulos com números diferentes ("Toy Story 2" x "Toy Story 3") são penalizados.
+        """
+        if not query_tokens or not candidate_tokens:
+            return 0.0
+
+        query_set, candidate_set = set(query_tokens), set(candidate_tokens)
+        token_score = 2 * len(query_set & candidate_set) / (len(query_set) + len(candidate_set))
+
+        query_trigrams = TitleMatcher.trigrams(query_tokens)
+        candidate_trigrams = TitleMatcher.trigrams(candidate_tokens)
+        shared = len(query_trigrams & candidate_trigrams)
+        trigram_score = shared / (len(query_trigrams) + len(candidate_trigrams) - shared)
+
+        score = (token_score + trigram_score) / 2
+        if TitleMatcher.numbers(query_tokens) != TitleMatcher.numbers(candidate_tokens):
+            score *= 0.5
+        return score
+
+    @staticmethod
+    def result_titles(result):
+        """
+        Títulos de um resultado do TMDb (localizado e original, de filme ou série)
+        """
+        titles = [result.get("title"), result.get("original_title"),
+                  result.get("name"), result.get("original_name")]
+        return [title for title in titles if title]
+
+    @staticmethod
+    def result_year(result):
+        date = result.get("release_date") or result.get("first_air_date") or ""
+        return int(date[:4]) if date[:4].isdigit() else None
+
+    @staticmethod
+    def year_score(year, candidate_year):
+        """
+        Bônus (ou penalidade) pela proximidade entre o ano buscado e o do resultado
+        """
+        if not year or not candidate_year:
+            return 0.0
+        difference = abs(year - candidate_year)
+        if difference == 0:
+            return 0.15
+        if difference == 1:
+            return 0.05
+        return -0.2
+
+    @staticmethod
+    def popularity_score(popularity):
+        """
+        Pequeno bônus logarítmico pela popularidade, usado como desempate (no máximo 0.05)
+        """
+        return 0.05 * min(1.0, math.log10(1 + max(popularity or 0.0, 0.0)) / 3)
+
+    @staticmethod
+    def rank(queries, results, year=None):
+        """
+        Pontua e ordena os resultados de uma busca
+
+        Args:
+            queries (list): Variantes do nome buscado (ex: "Shrek 1" e "Shrek"); vale a melhor
+            results (list): Resultados da busca no TMDb, na ordem da API
+            year (int, optional): Ano esperado
+
+        Returns:
+            list: Pares (pontuação, similaridade do título, resultado), do melhor para o pior
+        """
+        query_tokens = [TitleMatcher.tokens(query) for query in queries]
+        ranked = []
+        for position, result in enumerate(results):
+            candidate_tokens = [TitleMatcher.tokens(title) for title in TitleMatcher.result_titles(result)]
+            title_score = max(
+                (TitleMatcher.similarity(query, candidate) for query in query_tokens for candidate in candidate_tokens),
+                default=0.0
+            )
+            # A ordem do TMDb também considera títulos alternativos que não vêm na resposta
+            position_score = 0.1 * (1 - position / len(results))
+            score = (title_score + position_score
+                     + TitleMatcher.year_score(year, TitleMatcher.result_year(result))
+                     + TitleMatcher.popularity_score(result.get("popularity")))
+            ranked.append((score, title_score, result))
+
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return ranked
+
+    @staticmethod
+    def best_match(queries, results, year=None, min_similarity=0.0):
+        """
+        Escolhe o melhor resultado da busca
+
+        Returns:
+            dict: O resultado escolhido, ou None se não houver resultados ou se a
+                similaridade do título do melhor ficar abaixo de min_similarity
+        """
+        ranked = TitleMatcher.rank(queries, results, year)
+        if not ranked or ranked[0][1] < min_similarity:
+            return None
+        return ranked[0][2]
+
+class TitleIndex:
+    """
+    Índice de trigramas sobre os títulos já resolvidos.
+
+    Permite encontrar variações quase idênticas de um título já buscado
+    ("Irmao Urso" x "O Irmão Urso") sem nenhuma requisição. Filmes e séries,
+    anos diferentes (ou ano informado em só um dos dois) e números diferentes
+    nunca são considerados iguais.
+
+    A consulta só percorre as listas dos trigramas mais raros do título (filtro
+    de prefixo): um título com similaridade acima de min_similarity tem, com
+    certeza, algum deles. Trigramas frequentes (ex: "  a") não são percorridos, e
+    a comparação é feita fora da trava, sobre os títulos que já estavam no índice.
+    """
+    def __init__(self, min_similarity=0.85):
+        self.min_similarity = min_similarity
+        self.entries = []
+        self.postings = {}
+        self.mutex = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, title, is_series, year, value):
+        """
+        Adiciona um título resolvido ao índice
+
+        Args:
+            title (str): Título (normalizado ou não)
+            is_series (bool): Se é série
+            year (int, optional): Ano do título
+            value: Valor devolvido por lookup (ex: (TMDb ID, IMDb ID))
+        """
+        tokens = TitleMatcher.tokens(title)
+        if not tokens:
+            return
+        trigrams = frozenset(TitleMatcher.trigrams(tokens))
+        with self.mutex:
+            entry_id = len(self.entries)
+            self.entries.append((trigrams, bool(is_series), year, TitleMatcher.numbers(tokens), value))
+            for trigram in trigrams:
+                self.postings.setdefault(trigram, []).append(entry_id)
+
+    def lookup(self, title, is_series, year=None):
+        """
+        Procura o título resolvido mais parecido
+
+        Returns:
+            tuple: (Similaridade, valor) do melhor título com similaridade de trigramas
+                acima de min_similarity, ou None
+        """
+        tokens = TitleMatcher.tokens(title)
+        if not tokens:
+            return None
+        trigrams = TitleMatcher.trigrams(tokens)
+        numbers = TitleMatcher.numbers(tokens)
+        # Similaridade = comuns / (len(trigrams) + tamanho - comuns) >= min_similarity exige
+        # comuns >= min_similarity * len(trigrams): basta percorrer os len(trigrams) - comuns + 1 mais raros
+        prefix = len(trigrams) - math.ceil(self.min_similarity * len(trigrams)) + 1
+
+        # Sob a trava, só as referências às listas e o tamanho de cada uma: as listas e
+        # self.entries só crescem, então os itens até esse tamanho não mudam
+        with self.mutex:
+            postings = [(posting, len(posting)) for posting in
+                        (self.postings.get(trigram) for trigram in trigrams) if posting]
+        # Trigramas que nenhum título tem são os mais raros de todos
+        prefix -= len(trigrams) - len(postings)
+        if prefix <= 0:
+            return None
+        postings.sort(key=lambda item: item[1])
+
+        candidates = set()
+        for posting, size in postings[:prefix]:
+            candidates.update(posting[:size])
+
+        best = None
+        for entry_id in candidates:
+            entry_trigrams, entry_is_series, entry_year, entry_numbers, value = self.entries[entry_id]
+            if entry_is_series != bool(is_series) or entry_numbers != numbers or year != entry_year:
+                continue
+            count = len(trigrams & entry_trigrams)
+            similarity = count / (len(trigrams) + len(entry_trigrams) - count)
+            if similarity < self.min_similarity or (best and similarity <= best[0]):
+                continue
+            best = (similarity, value)
+        return best
@@ -0,0 +1,36 @@
+import os
+import sys
+import pytest
+
+# Permite importar src e config ao rodar o pytest de qualquer diretório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+
+# Módulos que importam as URLs do TMDb com "from config.settings import ..."
+_TMDB_URL_MODULES = ("src.api.tmdb_base", "src.api.tmdb_client", "src.api.async_tmdb_client")
+
+@pytest.fixture
+def point_tmdb(monkeypatch):
+    """
+    Aponta os clientes do TMDb para um servidor local
+
+    Uso:
+        point_tmdb("http://127.0.0.1:8765/3")
+    """
+    def point(base_url):
+        for module_name in _TMDB_URL_MODULES:
+            module = sys.modules.get(module_name) or __import__(module_name, fromlist=["*"])
+            for name in dir(settings):
+                if name.startswith("TMDB_") and name != "TMDB_BASE_URL" and hasattr(module, name):
+                    url = getattr(settings, name).replace(settings.TMDB_BASE_URL, base_url, 1)
+                    monkeypatch.setattr(module, name, url)
+    return point
+
+@pytest.fixture
+def work_dir(tmp_path, monkeypatch):
+    """
+    Diretório de trabalho temporário: os caches (CACHE_DIR é relativo) são criados nele
+    """
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,223 @@
+"""
+Testes do AsyncTMDbClient contra um servidor aiohttp local que imita o TMDb:
+limite de taxa (token bucket), pausa global por 429/Retry-After, novas tentativas
+após 5xx, deduplicação das buscas no modo assíncrono do MediaProcessor, a busca
+sem ano, que não é repetida depois da busca ranqueada, e os caches em SQLite,
+consultados fora do laço de eventos.
+"""
+import asyncio
+import time
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.api.async_tmdb_client import AsyncTMDbClient
+from src.api.throttle import ThrottleController
+from src.models.media_entry import MediaEntry
+
+class StubTMDb:
+    """
+    TMDb falso: a busca devolve o próprio título buscado e os IDs externos são
+    derivados do TMDb ID. As primeiras `fail_first` respostas têm o status `fail_status`.
+    Os títulos em `missing` não têm nenhum resultado.
+    """
+    def __init__(self, fail_first=0, fail_status=429, retry_after="1", missing=()):
+        self.fail_first = fail_first
+        self.missing = set(missing)
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        # (momento da chegada, caminho, status devolvido) de cada requisição
+        self.requests = []
+        # (título, ano) de cada busca
+        self.searches = []
+        self.titles = {}
+        self.server = None
+
+    def count(self, fragment):
+        return sum(1 for _, path, _ in self.requests if fragment in path)
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get("/3/search/{kind}", self.search)
+        app.router.add_get("/3/{kind}/{tmdb_id}/external_ids", self.external_ids)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.server.close()
+
+    @property
+    def base_url(self):
+        return str(self.server.make_url("/3"))
+
+    def _failure(self, request):
+        if len(self.requests) < self.fail_first:
+            self.requests.append((time.monotonic(), request.path, self.fail_status))
+            headers = {"Retry-After": self.retry_after} if self.fail_status == 429 else {}
+            return web.json_response({}, status=self.fail_status, headers=headers)
+        self.requests.append((time.monotonic(), request.path, 200))
+        return None
+
+    async def search(self, request):
+        failure = self._failure(request)
+        if failure is not None:
+            return failure
+        title = request.query["query"]
+        self.searches.append((title, request.query.get("year")))
+        if title in self.missing:
+            return web.json_response({"results": []})
+        tmdb_id = self.titles.setdefault(title, len(self.titles) + 1)
+        return web.json_response({"results": [
+            {"id": tmdb_id, "title": title, "original_title": title, "release_date": "2001-05-18", "popularity": 10}
+        ]})
+
+    async def external_ids(self, request):
+        failure = self._failure(request)
+        if failure is not None:
+            return failure
+        return web.json_response({"imdb_id": f"tt{int(request.match_info['tmdb_id']):07d}"})
+
+def test_token_bucket_spaces_requests(point_tmdb):
+    async def scenario():
+        async with StubTMDb() as stub:
+            point_tmdb(stub.base_url)
+            throttle = ThrottleController(rate=20, burst=1, max_rate=20)
+            async with AsyncTMDbClient(api_key="x", bearer_token="x", throttle=throttle) as client:
+                started = time.monotonic()
+                ids = await asyncio.gather(*(client.get_external_ids(tmdb_id) for tmdb_id in range(1, 12)))
+                elapsed = time.monotonic() - started
+            return stub, ids, elapsed
+
+    stub, ids, elapsed = asyncio.run(scenario())
+    assert ids == [f"tt{tmdb_id:07d}" for tmdb_id in range(1, 12)]
+    assert stub.count("external_ids") == 11
+    # Um token na rajada e os outros 10 repostos a 20 por segundo
+    assert elapsed >= 0.45
+    arrivals = [arrival for arrival, _, _ in stub.requests]
+    assert arrivals[-1] - arrivals[0] >= 0.45
+
+def test_429_pauses_every_request_for_retry_after(point_tmdb):
+    async def scenario():
+        async with StubTMDb(fail_first=1, retry_after="1") as stub:
+            point_tmdb(stub.base_url)
+            throttle = ThrottleController(rate=100, burst=100, max_rate=100)
+            async with AsyncTMDbClient(api_key="x", bearer_token="x", throttle=throttle) as client:
+                first = asyncio.ensure_future(client.get_external_ids(1))
+                await asyncio.sleep(0.2)
+                # A segunda requisição começa durante a pausa e só é enviada depois dela
+                second = await client.get_external_ids(2)
+                return stub, throttle.stats(), await first, second
+
+    stub, stats, first, second = asyncio.run(scenario())
+    assert (first, second) == ("tt0000001", "tt0000002")
+    assert [status for _, _, status in stub.requests] == [429, 200, 200]
+    throttled_at = stub.requests[0][0]
+    assert all(arrival - throttled_at >= 0.95 for arrival, _, _ in stub.requests[1:])
+    assert stats["requests"] == 3
+    assert stats["throttled_responses"] == 1
+    assert stats["throttled_seconds"] == 1
+    # A taxa é reduzida pela metade a cada pausa (AIMD)
+    assert stats["current_rate"] < 60
+
+def test_5xx_is_retried_with_backoff(point_tmdb):
+    async def scenario():
+        async with StubTMDb(fail_first=1, fail_status=503) as stub:
+            point_tmdb(stub.base_url)
+            async with AsyncTMDbClient(api_key="x", bearer_token="x", throttle=ThrottleController()) as client:
+                return stub, await client.get_external_ids(7)
+
+    stub, imdb_id = asyncio.run(scenario())
+    assert imdb_id == "tt0000007"
+    assert [status for _, _, status in stub.requests] == [503, 200]
+
+def test_async_mode_deduplicates_lookups(point_tmdb, work_dir):
+    from src.utils.media_processor import MediaProcessor
+
+    entries = [MediaEntry(name, f"http://provider.example/{index}.mp4", "pt-br", "Filmes", "")
+               for index, name in enumerate(["Shrek", "Matrix", "Shrek", "Shrek", "Matrix"])]
+
+    async def scenario():
+        async with StubTMDb() as stub:
+            point_tmdb(stub.base_url)
+            processor = MediaProcessor(progress=False)
+            try:
+                processor.throttle = ThrottleController(rate=100, burst=100)
+                results = await processor.process_entries_async(entries, concurrency=8)
+            finally:
+                processor.close()
+            return stub, results
+
+    stub, results = asyncio.run(scenario())
+    # Os TMDb IDs seguem a ordem de chegada das buscas, que não é a ordem das entradas
+    expected = {title: f"tt{tmdb_id:07d}" for title, tmdb_id in stub.titles.items()}
+    assert [entry.imdb_id for entry in results] == [expected[entry.name] for entry in entries]
+    assert sorted(expected.values()) == ["tt0000001", "tt0000002"]
+    # Uma busca e uma consulta de IDs externos por título distinto
+    assert stub.count("/search/") == 2
+    assert stub.count("external_ids") == 2
+
+def test_no_year_search_is_not_repeated(point_tmdb):
+    async def scenario():
+        async with StubTMDb(missing={"Inexistente"}) as stub:
+            point_tmdb(stub.base_url)
+            async with AsyncTMDbClient(api_key="x", bearer_token="x", throttle=ThrottleController()) as client:
+                return stub, await client.resolve_ids("Inexistente 2001")
+
+    stub, ids = asyncio.run(scenario())
+    assert ids == (None, None)
+    # A busca ranqueada (sem ano) é reaproveitada: só a busca com ano é feita em seguida
+    assert stub.searches == [("Inexistente", None), ("Inexistente", "2001")]
+
+def test_sync_client_does_not_repeat_no_year_search(point_tmdb):
+    from src.api.tmdb_client import TMDbClient
+
+    async def scenario():
+        async with StubTMDb(missing={"Inexistente"}) as stub:
+            point_tmdb(stub.base_url)
+            client = TMDbClient(api_key="x", bearer_token="x", throttle=ThrottleController())
+            try:
+                # O cliente síncrono bloqueia; roda fora do laço de eventos do servidor
+                ids = await asyncio.to_thread(client.resolve_ids, "Inexistente")
+            finally:
+                client.close()
+            return stub, ids
+
+    stub, ids = asyncio.run(scenario())
+    assert ids == (None, None)
+    assert stub.searches == [("Inexistente", None)]
+
+def test_sqlite_caches_are_used_off_the_event_loop(point_tmdb, work_dir):
+    import threading
+    from src.cache.lru_cache import PersistentLRUCache
+
+    # Threads em que o backend SQLite foi consultado ou alterado
+    threads = set()
+
+    def spy(cache):
+        for method in ("get", "set"):
+            original = getattr(cache.backend, method)
+
+            def call(*args, original=original):
+                threads.add(threading.get_ident())
+                return original(*args)
+            setattr(cache.backend, method, call)
+        return cache
+
+    search_cache = spy(PersistentLRUCache("buscas", backend="sqlite"))
+    external_ids_cache = spy(PersistentLRUCache("ids_externos", backend="sqlite"))
+
+    async def scenario():
+        async with StubTMDb() as stub:
+            point_tmdb(stub.base_url)
+            async with AsyncTMDbClient(api_key="x", bearer_token="x", throttle=ThrottleController(),
+                                       search_cache=search_cache,
+                                       external_ids_cache=external_ids_cache) as client:
+                assert client.session is not None and not hasattr(client, "search_executor")
+                return await client.get_imdb_id("Shrek"), threading.get_ident()
+
+    try:
+        imdb_id, loop_thread = asyncio.run(scenario())
+    finally:
+        search_cache.close()
+        external_ids_cache.close()
+    assert imdb_id == "tt0000001"
+    assert threads and loop_thread not in threads
@@ -0,0 +1,106 @@
+"""
+Testes da exportação em lotes colunares: write_batch gera as mesmas saídas que
+write com um MediaEntry por entrada, e o MediaProcessor grava direto das colunas
+as entradas respondidas sem busca, na ordem do arquivo
+"""
+import io
+import pytest
+from src.cache.cache_manager import CacheManager
+from src.parsers.m3u_parser import M3UParser
+from src.utils.json_exporter import StreamingJSONExporter
+from src.utils.multi_exporter import MultiExporter, ShardedExporter
+from src.utils.text_cleaner import TextCleaner
+from config.settings import DEFAULT_LANGUAGE
+
+PLAYLIST = """#EXTM3U
+#EXTINF:-1 tvg-id="" tvg-name="Irmão Urso" group-title="Filmes | Animação",Irmão Urso
+http://provider.example/1.mp4
+#EXTINF:-1 tvg-id="" tvg-name="Filme Inexistente" group-title="Filmes",Filme Inexistente
+http://provider.example/2.mp4
+#EXTINF:-1 tvg-id="" tvg-name="Matrix" group-title="Filmes",Matrix
+http://provider.example/3.mp4
+#EXTINF:-1 tvg-id="tt0126029" tvg-name="Shrek" group-title="Filmes | Animação",Shrek
+http://provider.example/4.mp4
+#EXTINF:-1 tvg-id="" tvg-name="Lost S01E02" group-title="Séries",Lost S01E02
+http://provider.example/5.mp4
+#EXTINF:-1 tvg-id="" tvg-name="Matrix" group-title="Filmes",Matrix
+http://provider.example/6.mp4
+#EXTINF:-1 tvg-id="" tvg-name="Lost S01E03" group-title="Séries",Lost S01E03
+http://provider.example/7.mp4
+"""
+
+def parse_batch():
+    return next(M3UParser().iter_batches(io.StringIO(PLAYLIST)))
+
+def outputs(directory):
+    return {path.relative_to(directory).as_posix(): path.read_bytes()
+            for path in sorted(directory.rglob("*")) if path.is_file()}
+
+def exporter_for(directory):
+    directory.mkdir()
+    return MultiExporter([
+        StreamingJSONExporter(str(directory / "saida.json")),
+        StreamingJSONExporter(str(directory / "saida.ndjson"), format="ndjson"),
+        StreamingJSONExporter(str(directory / "saida.m3u"), format="m3u"),
+        ShardedExporter(str(directory / "partes"), "group", format="json", indent=4),
+    ])
+
+def test_write_batch_matches_write(tmp_path):
+    batch = parse_batch()
+    for index, imdb_id in enumerate(["tt0328880", None, "tt0133093", "tt0126029", "tt0411008", "tt0133093", None]):
+        batch.set_imdb_id(index, imdb_id)
+    batch.set_episode_imdb_id(4, "tt0636289")
+    written = [index for index in range(len(batch)) if batch.imdb_ids[index]]
+
+    with exporter_for(tmp_path / "entradas") as exporter:
+        for index in written:
+            exporter.write(batch.entry(index))
+    with exporter_for(tmp_path / "lote") as exporter:
+        exporter.write_batch(batch, written)
+        assert exporter.count == len(written)
+
+    assert outputs(tmp_path / "lote") == outputs(tmp_path / "entradas")
+    assert list(batch.iter_dicts(written)) == [batch.entry(index).to_dict() for index in written]
+
+@pytest.fixture
+def processor(work_dir, monkeypatch):
+    from src.utils.media_processor import MediaProcessor
+
+    processor = MediaProcessor(progress=False)
+    cache = processor.cache_manager
+    for name, is_series, tmdb_id, imdb_id in [("Irmão Urso", False, 10009, "tt0328880"),
+                                              ("Filme Inexistente", False, None, None),
+                                              ("Lost", True, 4607, "tt0411008")]:
+        normalized_name, _, year = TextCleaner.lookup_key(name, is_series)
+        key = CacheManager.make_key(normalized_name, is_series, year, DEFAULT_LANGUAGE)
+        cache.set_record(key, name, is_series, year, DEFAULT_LANGUAGE, tmdb_id, imdb_id)
+    # Temporada em cache: o episódio 2 é conhecido, o 3 ainda não foi buscado
+    processor.season_cache.set("tv|4607|1", {"2": "tt0636289", "3": None})
+
+    # Só "Matrix" e o episódio 3 chegam à API
+    searched = []
+
+    def resolve_ids(name, is_series=False):
+        searched.append(name)
+        return 603, "tt0133093"
+    monkeypatch.setattr(processor.tmdb_client, "resolve_ids", resolve_ids)
+    monkeypatch.setattr(processor.tmdb_client, "get_episode_external_ids",
+                        lambda tmdb_id, season, episode: searched.append((tmdb_id, season, episode)) or "tt0636290")
+    processor.searched = searched
+    yield processor
+    processor.close()
+
+def test_process_batches_matches_process_entries(processor, tmp_path):
+    with exporter_for(tmp_path / "lote") as exporter:
+        assert processor.process_batches(M3UParser().iter_batches(io.StringIO(PLAYLIST)), exporter) == 6
+    assert processor.searched == ["Matrix", (4607, 1, 3)]
+    # Irmão Urso, Filme Inexistente (sem IMDb ID), Shrek (tvg-id) e Lost S01E02 vêm do cache
+    assert processor.metrics.counter("batch_entries_without_lookup") == 4
+    assert processor.metrics.counter("deduplicated_entries") == 1
+
+    with exporter_for(tmp_path / "entradas") as exporter:
+        processor.process_entries(M3UParser().iter_entries(io.StringIO(PLAYLIST)), exporter=exporter)
+    assert outputs(tmp_path / "lote") == outputs(tmp_path / "entradas")
+    names = [line.split(",", 1)[1] for line in (tmp_path / "lote" / "saida.m3u").read_text(encoding="utf-8").splitlines()
+             if line.startswith("#EXTINF")]
+    assert names == ["Irmão Urso", "Matrix", "Shrek", "Lost S01E02", "Matrix", "Lost S01E03"]
@@ -0,0 +1,71 @@
+"""
+Testes da thread de gravação dos caches: nenhuma alteração avisada é perdida no
+encerramento, nem as feitas depois dele
+"""
+import threading
+import pytest
+from src.cache.cache_manager import CacheManager
+from src.cache.writer import CacheWriter
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_close_flushes_every_queued_write(work_dir, backend):
+    # Lotes e prazo grandes: nada é gravado antes de close()
+    writer = CacheWriter(max_delay=3600)
+    cache = CacheManager("cache_ids.json", save_interval=10 ** 9, backend=backend, writer=writer)
+
+    def fill(thread):
+        for index in range(500):
+            cache.set_id(f"titulo {thread}-{index}", f"tt{thread:02d}{index:05d}")
+
+    threads = [threading.Thread(target=fill, args=(thread,)) for thread in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert writer.flushes == 0
+
+    writer.close()
+    assert writer.flushes == 1
+    assert writer.errors == 0
+
+    reloaded = CacheManager("cache_ids.json", backend=backend, writer=CacheWriter())
+    try:
+        for thread in range(8):
+            for index in range(500):
+                assert reloaded.get_id(f"titulo {thread}-{index}") == f"tt{thread:02d}{index:05d}"
+    finally:
+        reloaded.close()
+        cache.close()
+
+def test_flush_after_close_runs_in_the_caller(work_dir):
+    writer = CacheWriter(max_delay=3600)
+    cache = CacheManager("cache_ids.json", save_interval=10 ** 9, writer=writer)
+    writer.close()
+    # Sem a thread de gravação, o pedido é atendido na thread atual
+    cache.set_id("Irmão Urso", "tt0328880")
+    flushes = writer.flushes
+    cache.save_cache(force=True)
+    assert writer.flushes == flushes + 1
+
+    reloaded = CacheManager("cache_ids.json", writer=CacheWriter())
+    try:
+        assert reloaded.get_id("Irmão Urso") == "tt0328880"
+    finally:
+        reloaded.close()
+        cache.close()
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_change_after_close_is_written(work_dir, backend):
+    writer = CacheWriter(max_delay=3600)
+    cache = CacheManager("cache_ids.json", save_interval=10 ** 9, backend=backend, writer=writer)
+    writer.close()
+    # Ex: uma busca que termina depois do encerramento; nenhum flush é pedido
+    cache.set_id("Irmão Urso", "tt0328880")
+    assert writer.flushes == 1
+
+    reloaded = CacheManager("cache_ids.json", backend=backend, writer=CacheWriter())
+    try:
+        assert reloaded.get_id("Irmão Urso") == "tt0328880"
+    finally:
+        reloaded.close()
+        cache.close()
@@ -0,0 +1,48 @@
+"""
+Testes das saídas particionadas (--shard-by) com mais valores do que arquivos abertos
+"""
+import json
+import pytest
+from src.models.media_entry import MediaEntry
+from src.utils.multi_exporter import ShardedExporter
+
+def entries(groups=10, per_group=5):
+    # Os grupos se alternam a cada entrada, forçando o fechamento e a reabertura dos arquivos
+    return [MediaEntry(f"Filme {index}", f"http://provider.example/{index}.mp4", "pt-br", f"Grupo {index % groups}", "")
+            for index in range(groups * per_group)]
+
+def read_shard(path, format):
+    text = path.read_text(encoding="utf-8")
+    if format == "json":
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines()]
+
+@pytest.mark.parametrize("format", ["json", "ndjson"])
+def test_open_files_are_capped(tmp_path, format):
+    exporter = ShardedExporter(str(tmp_path), "group", format=format, indent=4 if format == "json" else None,
+                               max_open_files=3)
+    with exporter:
+        for entry in entries():
+            exporter.write(entry)
+            assert sum(shard.file is not None for shard in exporter.shards.values()) <= 3
+        exporter.checkpoint()
+
+    index = json.loads((tmp_path / "group" / "index.json").read_text(encoding="utf-8"))
+    assert len(index) == 10
+    for group in range(10):
+        shard = index[f"Grupo {group}"]
+        assert shard == {"file": f"grupo-{group}.{format}", "count": 5}
+        rows = read_shard(tmp_path / "group" / shard["file"], format)
+        assert [row["url"] for row in rows] == [f"http://provider.example/{index}.mp4"
+                                                for index in range(group, 50, 10)]
+    assert not list((tmp_path / "group").glob("*.partial"))
+
+def test_interrupted_run_keeps_partial_files(tmp_path):
+    exporter = ShardedExporter(str(tmp_path), "group", max_open_files=2)
+    exporter.open()
+    for entry in entries(groups=4, per_group=1):
+        exporter.write(entry)
+    exporter.close(finalize=False)
+
+    assert len(list((tmp_path / "group").glob("*.partial"))) == 4
+    assert not (tmp_path / "group" / "index.json").exists()
@@ -0,0 +1,84 @@
+"""
+Testes do índice offline, montado a partir de pequenos dumps do IMDb e do TMDb
+em tests/fixtures, sem acesso à rede
+"""
+import gzip
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+from src.api.offline_resolver import OfflineIndexBuilder, OfflineResolver
+from src.utils.text_cleaner import TextCleaner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+@pytest.fixture
+def resolver(tmp_path):
+    # O title.basics é compactado para exercitar a leitura de dumps .gz, como os publicados pelo IMDb
+    basics = tmp_path / "title.basics.tsv.gz"
+    with open(os.path.join(FIXTURES, "title.basics.tsv"), 'rb') as source, gzip.open(basics, 'wb') as target:
+        shutil.copyfileobj(source, target)
+
+    index_path = str(tmp_path / "offline_index.sqlite3")
+    builder = OfflineIndexBuilder(index_path)
+    builder.import_imdb_basics(str(basics))
+    builder.import_imdb_akas(os.path.join(FIXTURES, "title.akas.tsv"))
+    builder.import_tmdb_ids(os.path.join(FIXTURES, "movie_ids.json"), "movie")
+    builder.import_tmdb_ids(os.path.join(FIXTURES, "tv_series_ids.json"), "tv")
+    counts = builder.finish()
+
+    # Episódios e títulos adultos são ignorados; só os akas do Brasil ou em português são importados
+    assert counts == {"imdb_basics": 5, "imdb_akas": 1, "tmdb_movie": 3, "tmdb_tv": 1}
+    assert not os.path.exists(f"{index_path}.building")
+
+    resolver = OfflineResolver.open_default(index_path)
+    yield resolver
+    resolver.close()
+
+def lookup(resolver, name, is_series=False):
+    return resolver.lookup(TextCleaner.lookup_key(name, is_series))
+
+def test_resolves_movie_by_regional_title(resolver):
+    assert lookup(resolver, "Irmão Urso") == (None, "tt0328880")
+    assert lookup(resolver, "Shrek 1") == (None, "tt0126029")
+
+def test_resolves_series(resolver):
+    assert lookup(resolver, "Lost", is_series=True) == (None, "tt0411008")
+    # O mesmo título como filme não existe no índice
+    assert lookup(resolver, "Lost") is None
+
+def test_year_breaks_ties(resolver):
+    assert lookup(resolver, "The Thing (1982)") == (None, "tt0084787")
+    assert lookup(resolver, "The Thing 2012") == (None, "tt0905372")
+    # Sem ano, dois IMDb IDs: ambíguo, segue para a API
+    assert lookup(resolver, "The Thing") is None
+
+def test_tmdb_only_title_is_a_partial_hit(resolver):
+    assert lookup(resolver, "Um Filme Só do TMDb") == (555001, None)
+
+def test_miss(resolver):
+    assert lookup(resolver, "Título Que Não Existe") is None
+    assert lookup(resolver, "Adult Title") is None
+    assert resolver.stats() == {"hits": 0, "partial_hits": 0, "ambiguous": 0, "misses": 2}
+
+def test_open_default_without_index(tmp_path):
+    assert OfflineResolver.open_default(str(tmp_path / "inexistente.sqlite3")) is None
+
+def test_build_offline_index_script(tmp_path):
+    index_path = tmp_path / "indice.sqlite3"
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "build_offline_index.py"),
+         "--imdb-basics", os.path.join(FIXTURES, "title.basics.tsv"),
+         "--imdb-akas", os.path.join(FIXTURES, "title.akas.tsv"),
+         "--tmdb-tv", os.path.join(FIXTURES, "tv_series_ids.json"),
+         "-o", str(index_path)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    resolver = OfflineResolver(str(index_path))
+    try:
+        assert lookup(resolver, "Irmão Urso") == (None, "tt0328880")
+    finally:
+        resolver.close()
@@ -0,0 +1,61 @@
+"""
+Testes da análise de listas M3U: lotes colunares e análise em paralelo
+"""
+import io
+from src.parsers.m3u_parser import M3UParser
+from src.parsers.parallel_parser import ParallelM3UParser
+
+PLAYLIST = """#EXTM3U
+#EXTINF:-1 tvg-id="" tvg-name="Irmão Urso" group-title="Filmes | Animação",Irmão Urso
+http://provider.example/1.mp4
+#EXTINF:-1 tvg-id="" tvg-name="Série Enorme S99999999999999999999E01" group-title="Séries",Série Enorme
+http://provider.example/2.mp4
+#EXTINF:-1 tvg-id="" tvg-name="Lost S01E02" group-title="Séries",Lost S01E02
+http://provider.example/3.mp4
+"""
+
+def entry_fields(entry):
+    return (entry.name, entry.url, entry.language, entry.group_title, entry.tvg_id,
+            entry.season, entry.episode, entry.is_series, entry.fingerprint)
+
+def test_batches_match_sequential_parse_with_huge_numbers():
+    parser = M3UParser()
+    sequential = [entry_fields(entry) for entry in parser.iter_entries(io.StringIO(PLAYLIST), fingerprint=True)]
+    batched = [entry_fields(entry) for batch in parser.iter_batches(io.StringIO(PLAYLIST), batch_size=2, fingerprint=True)
+               for entry in batch]
+    assert batched == sequential
+    # A temporada não cabe em 64 bits e é mantida sem truncamento
+    assert sequential[1][5] == 99999999999999999999
+
+def test_parallel_parse_keeps_order(tmp_path):
+    # Vários registros por bloco e blocos pequenos o bastante para exigir muitos cortes
+    lines = ["#EXTM3U\n"]
+    for index in range(300):
+        name = f"Série {index} S01E{index % 20 + 1:02d}" if index % 3 == 0 else f"Filme {index} ({1980 + index % 40})"
+        lines.append(f'#EXTINF:-1 tvg-id="" tvg-name="{name}" group-title="Grupo {index % 7}",{name}\n')
+        lines.append(f"http://provider.example/{index}.mp4\n")
+    file_path = tmp_path / "lista.m3u"
+    file_path.write_text("".join(lines), encoding="utf-8")
+
+    sequential = [entry_fields(entry) for entry in M3UParser().iter_entries(str(file_path), fingerprint=True)]
+    parallel = ParallelM3UParser(workers=2, chunk_size=1024)
+    assert len(parallel.chunk_offsets(str(file_path), 1024)) > 10
+    assert [entry_fields(entry) for entry in parallel.iter_entries(str(file_path), fingerprint=True)] == sequential
+
+def test_display_title_is_used_without_tvg_name():
+    playlist = """#EXTM3U
+#EXTINF:-1 tvg-id="" group-title="Filmes, Animação",Irmão Urso, o Filme (2003)
+http://provider.example/1.mp4
+#EXTINF:-1 tvg-name="" group-title="Séries",Lost S01E02
+http://provider.example/2.mp4
+#EXTINF:-1,Shrek
+http://provider.example/3.mp4
+#EXTINF:-1 tvg-name="" group-title="Filmes",
+http://provider.example/4.mp4
+"""
+    entries = list(M3UParser().iter_entries(io.StringIO(playlist)))
+    # A vírgula do group-title não é confundida com o início do título exibido
+    assert [(entry.name, entry.group_title) for entry in entries] == [
+        ("Irmão Urso, o Filme", "Filmes, Animação"), ("Lost", "Séries"), ("Shrek", ""),
+    ]
+    assert (entries[1].season, entries[1].episode) == (1, 2)
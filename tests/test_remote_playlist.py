@@ -0,0 +1,122 @@
+"""
+Testes da lista remota contra um servidor HTTP local: requisição condicional
+(ETag / 304) e listas compactadas, com e sem Content-Encoding
+"""
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.parsers.m3u_parser import M3UParser
+from src.parsers.remote_playlist import RemotePlaylist
+
+PLAYLIST = """#EXTM3U
+#EXTINF:-1 tvg-id="" tvg-name="Irmão Urso" group-title="Filmes | Animação",Irmão Urso
+http://provider.example/1.mp4
+#EXTINF:-1 tvg-id="" tvg-name="Lost S01E02" group-title="Séries",Lost S01E02
+http://provider.example/2.mp4
+""".encode("utf-8")
+# (nome, URL) das entradas lidas da lista
+EXPECTED = [("Irmão Urso", "http://provider.example/1.mp4"), ("Lost", "http://provider.example/2.mp4")]
+
+class PlaylistServer:
+    """
+    Servidor local que publica a mesma lista em /lista.m3u (com ETag e, se o cliente
+    aceitar, Content-Encoding: gzip) e em /lista.m3u.gz (arquivo compactado, sem
+    Content-Encoding). Guarda os cabeçalhos e o status de cada requisição.
+    """
+    def __init__(self):
+        self.etag = '"v1"'
+        # (caminho, cabeçalhos, status) de cada requisição
+        self.requests = []
+        self.encode = False
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                headers = {}
+                if self.path == "/lista.m3u.gz":
+                    status, body = 200, gzip.compress(PLAYLIST)
+                    headers["Content-Type"] = "application/gzip"
+                elif self.headers.get("If-None-Match") == server.etag:
+                    status, body = 304, b""
+                else:
+                    status, body = 200, PLAYLIST
+                    headers["ETag"] = server.etag
+                    if server.encode and "gzip" in self.headers.get("Accept-Encoding", ""):
+                        body = gzip.compress(body)
+                        headers["Content-Encoding"] = "gzip"
+                server.requests.append((self.path, dict(self.headers), status))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if status != 304:
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+@pytest.fixture
+def playlist_server():
+    server = PlaylistServer()
+    server.thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+def read_entries(playlist):
+    return [(entry.name, entry.url) for entry in M3UParser().iter_entries(playlist.stream())]
+
+def test_unchanged_playlist_is_skipped_with_304(playlist_server, tmp_path):
+    state_file = str(tmp_path / "saida.json.source.json")
+    url = playlist_server.url("/lista.m3u")
+
+    playlist = RemotePlaylist(url, state_file)
+    assert playlist.open()
+    assert read_entries(playlist) == EXPECTED
+    playlist.save_state()
+
+    # O ETag salvo é enviado e a lista inalterada não é baixada de novo
+    assert not RemotePlaylist(url, state_file).open()
+    assert playlist_server.requests[-1][1].get("If-None-Match") == '"v1"'
+    assert [status for _, _, status in playlist_server.requests] == [200, 304]
+
+    # Com outro ETag no servidor, a lista é convertida de novo
+    playlist_server.etag = '"v2"'
+    playlist = RemotePlaylist(url, state_file)
+    assert playlist.open()
+    assert read_entries(playlist) == EXPECTED
+
+    # Sem requisição condicional o estado salvo é ignorado
+    playlist_server.etag = '"v1"'
+    playlist = RemotePlaylist(url, state_file)
+    assert playlist.open(conditional=False)
+    playlist.close()
+    assert "If-None-Match" not in playlist_server.requests[-1][1]
+
+def test_gzip_file_is_decompressed_by_magic(playlist_server):
+    playlist = RemotePlaylist(playlist_server.url("/lista.m3u.gz"))
+    assert playlist.open()
+    assert read_entries(playlist) == EXPECTED
+    assert playlist.bytes_read == len(PLAYLIST)
+
+def test_gzip_content_encoding(playlist_server):
+    playlist_server.encode = True
+    playlist = RemotePlaylist(playlist_server.url("/lista.m3u"))
+    assert playlist.open()
+    assert read_entries(playlist) == EXPECTED
+    assert playlist_server.requests[-1][1].get("Accept-Encoding") == "gzip"
+
+def test_max_bytes_applies_to_decompressed_size(playlist_server):
+    playlist = RemotePlaylist(playlist_server.url("/lista.m3u.gz"), max_bytes=64)
+    assert playlist.open()
+    with pytest.raises(ValueError):
+        read_entries(playlist)
@@ -0,0 +1,36 @@
+"""
+Testes da serialização: o cache "json" mantém o layout do cache_ids.json original
+(indentado com 4 espaços) e nenhuma saída depende de o orjson estar instalado
+"""
+import json
+import pytest
+from src.cache.cache_manager import CacheManager
+from src.utils import serialization
+
+def record(name, is_series, year, tmdb_id, imdb_id):
+    return {"name": name, "is_series": is_series, "year": year, "language": "pt-br",
+            "tmdb_id": tmdb_id, "imdb_id": imdb_id, "created_at": 1700000000.5, "checked_at": 1700000000.5}
+
+# Registros com as chaves no formato de CacheManager.make_key
+DATA = {
+    CacheManager.make_key("irmao urso", False, 2003, "pt-br"): record("Irmão Urso", False, 2003, 10009, "tt0328880"),
+    CacheManager.make_key("lost", True, None, "pt-br"): record("Lost", True, None, 4607, None),
+    # Entrada no formato antigo (nome -> IMDb ID)
+    "Shrek 2": "tt0298148",
+}
+
+@pytest.mark.parametrize("indent", [False, True])
+def test_dumps_bytes_is_the_same_without_orjson(monkeypatch, indent):
+    if serialization.orjson is None:
+        pytest.skip("orjson não instalado")
+    with_orjson = serialization.dumps_bytes(DATA, indent=indent)
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert serialization.dumps_bytes(DATA, indent=indent) == with_orjson
+    assert serialization.loads(with_orjson) == DATA
+
+def test_indented_layout_matches_original_cache():
+    assert list(DATA)[:2] == ["movie|2003|pt-br|irmao urso", "tv||pt-br|lost"]
+    # O cache_ids.json original era gravado com json.dump(..., indent=4, ensure_ascii=False)
+    original = json.dumps(DATA, indent=4, ensure_ascii=False).encode("utf-8")
+    assert serialization.dumps_bytes(DATA, indent=True) == original
+    assert serialization.loads(original) == DATA
@@ -0,0 +1,81 @@
+"""
+Testes da comparação de títulos: sequências (algarismos, romanos e "parte N")
+nunca são tratadas como variações do mesmo título
+"""
+import pytest
+from src.utils.title_matcher import TitleIndex, TitleMatcher
+
+SEQUELS = [
+    ("Rocky III", "Rocky II"),
+    ("Star Wars Episódio III", "Star Wars Episódio II"),
+    ("Star Wars Episódio I", "Star Wars Episódio II"),
+    ("The Godfather Part III", "The Godfather Part II"),
+    ("O Poderoso Chefão Parte III", "O Poderoso Chefão Parte II"),
+    ("Harry Potter e as Relíquias da Morte Parte 1", "Harry Potter e as Relíquias da Morte Parte 2"),
+]
+
+def numbers(title):
+    return TitleMatcher.numbers(TitleMatcher.tokens(title))
+
+def test_numbers_normalizes_roman_numerals_and_parts():
+    assert numbers("Rocky III") == {"3"}
+    assert numbers("Toy Story 03") == {"3"}
+    assert numbers("O Poderoso Chefão Parte III") == {"3"}
+    assert numbers("Duna: Parte Dois") == {"2"}
+    assert numbers("Star Wars Episódio I") == {"1"}
+    # O "1" solto não conta; "x" solto não é um algarismo romano
+    assert numbers("Shrek 1") == set()
+    assert numbers("Godzilla x Kong") == set()
+
+@pytest.mark.parametrize("query, resolved", SEQUELS)
+def test_index_rejects_other_sequel(query, resolved):
+    index = TitleIndex()
+    index.add(resolved, False, None, (1, "tt0000001"))
+    assert index.lookup(query, False) is None
+    assert TitleMatcher.similarity(TitleMatcher.tokens(query), TitleMatcher.tokens(resolved)) < 0.6
+
+def test_index_matches_same_sequel_in_other_notation():
+    index = TitleIndex(min_similarity=0.5)
+    index.add("Toy Story III", False, None, (1, "tt0435761"))
+    assert index.lookup("Toy Story 3", False)[1] == (1, "tt0435761")
+    index.add("O Irmão Urso", False, None, (2, "tt0328880"))
+    assert index.lookup("Irmao Urso", False)[1] == (2, "tt0328880")
+
+def test_lookup_matches_full_scan():
+    # Muitos títulos com palavras em comum: as listas dos trigramas frequentes não são percorridas
+    words = ["amor", "guerra", "noite", "cidade", "irmao", "urso", "rei", "leao", "mar", "estrela"]
+    titles = [f"{words[index % 10]} {words[index // 10 % 10]} {words[index // 100 % 10]}" for index in range(1000)]
+    index = TitleIndex(min_similarity=0.6)
+    for position, title in enumerate(titles):
+        index.add(title, False, None, position)
+
+    queries = ["amor guerra noit", "cidade irmao", "o rei leao mar", "estrelas mar rei", "noite"]
+    for query in queries:
+        trigrams = TitleMatcher.trigrams(TitleMatcher.tokens(query))
+        scores = []
+        for position, title in enumerate(titles):
+            other = TitleMatcher.trigrams(TitleMatcher.tokens(title))
+            shared = len(trigrams & other)
+            scores.append((shared / (len(trigrams) + len(other) - shared), position))
+        expected = max(scores)
+        match = index.lookup(query, False)
+        if expected[0] < 0.6:
+            assert match is None
+        else:
+            assert match is not None and match[0] == pytest.approx(expected[0])
+
+def test_title_index_is_built_on_first_miss(work_dir):
+    from src.cache.cache_manager import CacheManager
+    from src.utils.media_processor import MediaProcessor
+    from config.settings import DEFAULT_LANGUAGE
+
+    processor = MediaProcessor(progress=False)
+    try:
+        key = CacheManager.make_key("o irmao urso", False, None, DEFAULT_LANGUAGE)
+        processor.cache_manager.set_record(key, "O Irmão Urso", False, None, DEFAULT_LANGUAGE, 10009, "tt0328880")
+        # A inicialização não lê o cache
+        assert processor.title_index is None
+        assert processor._near_duplicate("Irmão Urso", ("irmao urso", False, None)) == (10009, "tt0328880")
+        assert len(processor.title_index) == 1
+    finally:
+        processor.close()